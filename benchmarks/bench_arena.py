@@ -0,0 +1,61 @@
+"""Замер масштабирования арены по числу змеек.
+
+Запуск: `python benchmarks/bench_arena.py`.
+
+Для каждого числа змеек печатает время хода арены (ботов и самого хода
+отдельно) и время хода на одну змейку. Поле растёт вместе с числом
+змеек, около `CELLS_PER_SNAKE` клеток на змейку, поэтому плотность
+остаётся прежней; при разборе столкновений по сетке время на змейку не
+должно расти.
+"""
+import sys
+from math import isqrt
+from pathlib import Path
+from time import perf_counter
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from snake_arena import Arena, bot_actions  # noqa: E402
+
+SNAKES = (10, 100, 1_000, 4_000)
+CELLS_PER_SNAKE = 256
+# Ходы до замера, чтобы змейки успели вырасти:
+WARMUP = 200
+TICKS = 100
+# Частота ходов игры:
+TICK_RATE = 15
+
+
+def measure(snakes: int) -> tuple:
+    """Возвращает (мс ботов, мс хода, средняя длина) на ход."""
+    side = isqrt(snakes * CELLS_PER_SNAKE)
+    arena = Arena(side, side, snakes, seed=0)
+    for _ in range(WARMUP):
+        arena.step(bot_actions(arena))
+    bots = step = 0.0
+    for _ in range(TICKS):
+        started = perf_counter()
+        actions = bot_actions(arena)
+        middle = perf_counter()
+        arena.step(actions)
+        bots += middle - started
+        step += perf_counter() - middle
+    length = sum(arena.lengths()) / snakes
+    return bots / TICKS * 1e3, step / TICKS * 1e3, length
+
+
+def main() -> None:
+    """Печатает таблицу масштабирования."""
+    print(f'{"змеек":>7} {"поле":>11} {"боты, мс":>9} {"ход, мс":>8} '
+          f'{"мкс/змейку":>11} {"длина":>6} {"запас":>6}')
+    for snakes in SNAKES:
+        side = isqrt(snakes * CELLS_PER_SNAKE)
+        bots, step, length = measure(snakes)
+        budget = 1e3 / TICK_RATE / (bots + step)
+        print(f'{snakes:>7} {f"{side}x{side}":>11} {bots:>9.2f} '
+              f'{step:>8.2f} {step / snakes * 1e3:>11.2f} {length:>6.1f} '
+              f'{budget:>5.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""Замер стоимости плоскостей наблюдения в зависимости от длины змейки.
+
+Запуск: `python benchmarks/bench_observation.py`.
+
+Сравнивает ход `Snake.move` без плоскостей, с плоскостями
+`Observation`, которые обновляются по изменениям хода, и со сборкой
+плоскостей заново после каждого хода (`Observation.rebuild`).
+"""
+import os
+import sys
+from pathlib import Path
+from timeit import timeit
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+import the_snake  # noqa: E402
+from bench_suite import game  # noqa: E402
+from snake_observation import Observation  # noqa: E402
+
+LENGTHS = (1, 100, 500)
+TICKS = 5_000
+
+
+def tick_time(length: int, mode: str) -> float:
+    """Время хода змейки длины `length` в микросекундах."""
+    the_snake.observation = None
+    snake, _, rock, steer = game(length, 0)
+    if mode == 'incremental':
+        the_snake.enable_observation(directions=True)
+    rebuilt = Observation(
+        the_snake.WORLD_WIDTH, the_snake.WORLD_HEIGHT, directions=True
+    )
+
+    def tick():
+        steer()
+        snake.move(rock)
+        if mode == 'rebuild':
+            rebuilt.rebuild(the_snake.board)
+
+    seconds = timeit(tick, number=TICKS)
+    the_snake.observation = None
+    return seconds / TICKS * 1e6
+
+
+def main() -> None:
+    """Печатает время хода в микросекундах для каждой длины."""
+    modes = ('none', 'incremental', 'rebuild')
+    print(f'{"длина":>8}' + ''.join(f'{mode + ", мкс":>18}' for mode in modes))
+    for length in LENGTHS:
+        print(f'{length:>8}' + ''.join(
+            f'{tick_time(length, mode):>18.2f}' for mode in modes
+        ))
+
+
+if __name__ == '__main__':
+    main()
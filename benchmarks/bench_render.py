@@ -0,0 +1,76 @@
+"""Замер времени кадра: `pygame.draw.rect` против кэша спрайтов.
+
+Запуск: `python benchmarks/bench_render.py`. Окно не открывается:
+используется драйвер SDL `dummy`, как в тестах.
+
+Кадр - перерисовка всех сегментов змейки, как делал `draw_snake` до
+перехода на обновление изменившихся клеток, и вывод кадра на дисплей.
+Новый путь замеряется целиком, как в игре: `GameObject.draw` ставит
+клетку в очередь `DirtyRects`, а `DirtyRects.flush` копирует спрайты
+одним `Surface.blits` и обновляет их прямоугольники. Последний столбец -
+обычный кадр игры, где меняются только клетки головы и хвоста.
+"""
+import os
+import sys
+from pathlib import Path
+from timeit import timeit
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+import pygame  # noqa: E402
+
+import the_snake  # noqa: E402
+
+LENGTHS = (10, 100, 768)
+FRAMES = 200
+
+
+def snake_positions(length: int) -> list:
+    """Возвращает `length` клеток поля построчно."""
+    count = the_snake.GRID_WIDTH * the_snake.GRID_HEIGHT
+    return [index % count for index in range(length)]
+
+
+def draw_rect_frame(positions: list) -> None:
+    """Кадр по-старому: два `pygame.draw.rect` на клетку и весь экран."""
+    screen = the_snake.screen
+    for cell in positions:
+        rect = pygame.Rect(
+            the_snake.camera.to_screen(cell), (the_snake.GRID_SIZE,) * 2
+        )
+        pygame.draw.rect(screen, the_snake.SNAKE_COLOR, rect)
+        pygame.draw.rect(screen, the_snake.BORDER_COLOR, rect, 1)
+    pygame.display.update()
+
+
+def dirty_rects_frame(snake: the_snake.Snake, positions: list) -> None:
+    """Кадр как в игре: `GameObject.draw` на клетку и `flush`."""
+    draw = snake.draw
+    for cell in positions:
+        draw(cell)
+    the_snake.dirty_rects.flush()
+
+
+def main() -> None:
+    """Печатает время кадра в микросекундах для разных длин змейки."""
+    the_snake.open_window()
+    snake = the_snake.Snake()
+    the_snake.dirty_rects.flush()
+    print(f'{"длина":>6} {"draw.rect, мкс":>15} {"DirtyRects, мкс":>16} '
+          f'{"2 клетки, мкс":>14}')
+    for length in LENGTHS:
+        positions = snake_positions(length)
+        old = timeit(lambda: draw_rect_frame(positions), number=FRAMES)
+        new = timeit(
+            lambda: dirty_rects_frame(snake, positions), number=FRAMES
+        )
+        changed = timeit(
+            lambda: dirty_rects_frame(snake, positions[:2]), number=FRAMES
+        )
+        print(f'{length:>6} {old / FRAMES * 1e6:>15.1f} '
+              f'{new / FRAMES * 1e6:>16.1f} {changed / FRAMES * 1e6:>14.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""Замер неравномерности логических ходов при медленном выводе кадра.
+
+Запуск: `python benchmarks/bench_render_thread.py`.
+
+Запускает `main` с подменённым `pygame.display.update`, который спит
+`PRESENT_MS` мс, как медленный дисплей или композитор, и печатает
+процентили `tick_jitter` - насколько промежуток между логическими ходами
+отличается от `1 / SPEED` секунды. В обычном режиме медленный вывод
+задерживает ходы, и они идут пачками; с потоком отрисовки
+(`enable_render_thread`) неравномерность не должна превышать кадр цикла
+(1000 / FPS мс).
+"""
+import os
+import sys
+from pathlib import Path
+from time import sleep
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+import pygame  # noqa: E402
+
+import the_snake  # noqa: E402
+from snake_profiler import PhaseProfiler  # noqa: E402
+
+PRESENT_MS = (0, 30, 100)
+# Длительность прогона в кадрах цикла:
+FRAMES = 180
+
+
+class StopBenchmark(Exception):
+    """Останавливает `main` после `FRAMES` кадров."""
+
+
+class CountingClock:
+    """Часы `main`, которые останавливают цикл после `FRAMES` кадров."""
+
+    def __init__(self) -> None:
+        """Создаёт часы pygame и счётчик кадров."""
+        self.clock = pygame.time.Clock()
+        self.frames = 0
+
+    def tick(self, *args) -> int:
+        """Ждёт кадр, как `Clock.tick`, и считает кадры."""
+        self.frames += 1
+        if self.frames > FRAMES:
+            raise StopBenchmark
+        return self.clock.tick(*args)
+
+
+def jitter(present_ms: int, threaded: bool) -> dict:
+    """Процентили неравномерности ходов в мс для одного режима."""
+    update = pygame.display.update
+
+    def slow_update(*args):
+        sleep(present_ms / 1000)
+        update(*args)
+
+    the_snake.profiler = PhaseProfiler()
+    the_snake.clock = CountingClock()
+    the_snake.enable_autopilot()
+    pygame.display.update = slow_update
+    try:
+        if threaded:
+            the_snake.enable_render_thread()
+        the_snake.main(0)
+    except StopBenchmark:
+        pass
+    finally:
+        if the_snake.renderer is not None:
+            the_snake.renderer.close()
+            the_snake.renderer = None
+        pygame.display.update = update
+    return the_snake.profiler.percentiles()['tick_jitter']
+
+
+def main() -> None:
+    """Печатает процентили неравномерности для обоих режимов."""
+    print(f'{"вывод, мс":>10} {"режим":>12} {"p50, мс":>8} {"p90, мс":>8} '
+          f'{"p99, мс":>8}')
+    for present_ms in PRESENT_MS:
+        for threaded in (False, True):
+            result = jitter(present_ms, threaded)
+            mode = 'поток' if threaded else 'обычный'
+            print(f'{present_ms:>10} {mode:>12} ' + ' '.join(
+                f'{result[key]:>8.1f}' for key in ('p50', 'p90', 'p99')
+            ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""Замер стоимости хода змейки в зависимости от её длины.
+
+Запуск: `python benchmarks/bench_snake_body.py`.
+
+Сравнивает старое тело-список (`insert(0)`, `del [-1]` и линейный `in`)
+с `SnakeBody` и `PackedSnakeBody` и проверяет, что ход `SnakeEngine` не
+дорожает с ростом длины змейки. Вторая таблица - память сегментов на поле
+`MEMORY_WORLD`: список пиксельных кортежей, кольцо `SnakeBody` (оно
+выделено на всё поле) и упакованные направления `PackedSnakeBody`.
+Счётчик сегментов в клетках есть у обоих тел и в сравнение не входит.
+"""
+import sys
+from itertools import count
+from pathlib import Path
+from timeit import timeit
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from snake_engine import (  # noqa: E402
+    RIGHT, PackedSnakeBody, SnakeBody, SnakeEngine,
+)
+
+LENGTHS = (10, 100, 1_000, 10_000, 100_000)
+TICKS = 20_000
+MEMORY_WORLD = (2000, 2000)
+GRID_SIZE = 20
+
+
+def list_tick(positions: list, cell: int) -> None:
+    """Ход в старом стиле `Snake.sub_move`."""
+    if cell in positions:
+        return
+    positions.insert(0, cell)
+    del positions[-1]
+
+
+def body_tick(positions: SnakeBody, cell: int) -> None:
+    """Ход на `SnakeBody` или `PackedSnakeBody`."""
+    if cell in positions:
+        return
+    positions.push_head(cell)
+    positions.pop_tail()
+
+
+def engine_with_length(length: int) -> SnakeEngine:
+    """Создаёт движок с прямой змейкой длины `length` на широком поле."""
+    engine = SnakeEngine(2 * length + 2, 3)
+    engine.place(
+        (engine.cell(x, 1) for x in reversed(range(length))),
+        engine.cell(0, 0),
+    )
+    engine.state.direction = RIGHT
+    return engine
+
+
+def segment_bytes(length: int) -> tuple:
+    """Байты на сегмент: кортежи, `SnakeBody` и `PackedSnakeBody`."""
+    width, height = MEMORY_WORLD
+    tuples = [(x % width * GRID_SIZE, x // width * GRID_SIZE)
+              for x in range(length)]
+    listed = sys.getsizeof(tuples) + sum(
+        sys.getsizeof(pixel) + sys.getsizeof(pixel[0])
+        + sys.getsizeof(pixel[1]) for pixel in tuples
+    )
+    ring = SnakeBody(width * height, range(length)).snapshot()[0]
+    packed = PackedSnakeBody(width, height, range(length))
+    return (listed / length, ring.itemsize * len(ring) / length,
+            packed.nbytes / length)
+
+
+def main() -> None:
+    """Печатает время хода и память сегментов для каждой длины."""
+    print(f'{"длина":>8} {"list, мкс":>12} {"SnakeBody, мкс":>15} '
+          f'{"Packed, мкс":>12} {"step, мкс":>10}')
+    for length in LENGTHS:
+        old, old_cells = list(range(length)), count(length)
+        new = SnakeBody(length + TICKS + 1, range(length))
+        new_cells = count(length)
+        packed = PackedSnakeBody(length + TICKS + 1, 1, range(length))
+        packed_cells = count(length)
+        old_time = timeit(
+            lambda: list_tick(old, next(old_cells)), number=TICKS // 10
+        )
+        new_time = timeit(
+            lambda: body_tick(new, next(new_cells)), number=TICKS
+        )
+        packed_time = timeit(
+            lambda: body_tick(packed, next(packed_cells)), number=TICKS
+        )
+        engine = engine_with_length(length)
+        step_time = timeit(engine.step, number=TICKS)
+        print(f'{length:>8} {old_time / (TICKS // 10) * 1e6:>12.2f} '
+              f'{new_time / TICKS * 1e6:>15.2f} '
+              f'{packed_time / TICKS * 1e6:>12.2f} '
+              f'{step_time / TICKS * 1e6:>10.2f}')
+    print()
+    print(f'{"длина":>8} {"кортежи, Б":>11} {"SnakeBody, Б":>13} '
+          f'{"Packed, Б":>10}  (на сегмент, поле '
+          f'{MEMORY_WORLD[0]}x{MEMORY_WORLD[1]})')
+    for length in LENGTHS:
+        listed, ring, packed = segment_bytes(length)
+        print(f'{length:>8} {listed:>11.1f} {ring:>13.1f} {packed:>10.2f}')
+
+
+if __name__ == '__main__':
+    main()
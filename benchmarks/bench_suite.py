@@ -0,0 +1,360 @@
+"""Воспроизводимый набор замеров горячего цикла игры и движка.
+
+Запуск: `python benchmarks/bench_suite.py [--save results.json]
+[--baseline [PATH]]`. Окно не открывается: используется
+драйвер SDL `dummy`, как в тестах.
+
+Каждый случай - число операций в секунду при фиксированном зерне:
+
+- `move` - `Snake.move` для змеек разной длины;
+- `spawn` - `Apple.randomize_position` при разной длине и числе камней;
+- `eat` - `eat_and_check_position_and_spawn_rock` на ходу с яблоком;
+- `rock_conflict` - проверка столкновения с камнями;
+- `frame` - полный кадр: `update` и `DirtyRects.flush`;
+- `world_frame` - кадр с камерой, следующей за головой в мире разного
+  размера;
+- `engine_step` - `SnakeEngine.step` на полях разного размера.
+
+Змейка ведётся по гамильтонову циклу поля и не врезается в себя, сколько
+бы ходов ни длился замер. С `--baseline` (по умолчанию
+`benchmarks/baseline.json`) результаты сравниваются с сохранёнными, и при
+падении скорости больше допуска скрипт завершается с кодом 1. Чтобы
+базовую линию можно было переносить между машинами, скорости сравниваются
+в долях от скорости эталонного цикла на чистом Python, замеренного
+рядом с каждым случаем.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+from pathlib import Path
+from time import perf_counter
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+import pygame  # noqa: E402
+
+import the_snake  # noqa: E402
+from snake_engine import DOWN, LEFT, RIGHT, UP, SnakeEngine  # noqa: E402
+
+SEED = 0
+
+# Развёртка случаев:
+LENGTHS = (1, 100, 500)
+ROCK_COUNTS = (0, 50, 200)
+ENGINE_GRIDS = ((16, 12), (32, 24), (256, 192), (1024, 768))
+ENGINE_LENGTHS = (1, 100, 1_000)
+WORLD_SIZES = (64, 512, 2_000)
+
+# Сколько операций в одном повторе и сколько повторов (берётся лучший):
+OPERATIONS = 2_000
+REPEATS = 9
+
+# Сколько раз прогнать всю развёртку (для каждого случая берётся медиана):
+RUNS = 3
+
+# Допустимое падение скорости относительно базовой линии:
+TOLERANCE = 0.3
+
+BASELINE = Path(__file__).resolve().parent / 'baseline.json'
+
+
+def hamiltonian_cycle(width: int, height: int) -> list:
+    """Возвращает клетки (x, y) гамильтонова цикла поля по порядку.
+
+    Цикл змейкой проходит строки по столбцам 1..width-1 и возвращается
+    вверх по столбцу 0. Высота поля должна быть чётной.
+    """
+    cycle = []
+    for y_cord in range(height):
+        columns = range(1, width)
+        cycle.extend(
+            (x_cord, y_cord)
+            for x_cord in (columns if y_cord % 2 == 0 else reversed(columns))
+        )
+    cycle.extend((0, y_cord) for y_cord in reversed(range(height)))
+    return cycle
+
+
+def cycle_directions(cycle: list) -> dict:
+    """Возвращает для каждой клетки цикла направление к следующей."""
+    steps = {(1, 0): RIGHT, (-1, 0): LEFT, (0, 1): DOWN, (0, -1): UP}
+    return {
+        cell: steps[(after[0] - cell[0], after[1] - cell[1])]
+        for cell, after in zip(cycle, cycle[1:] + cycle[:1])
+    }
+
+
+def ops_per_second(operation, operations: int = OPERATIONS) -> float:
+    """Лучшая из `REPEATS` скоростей вызова `operation` в секунду."""
+    best = 0.0
+    for _ in range(REPEATS):
+        started = perf_counter()
+        for _ in range(operations):
+            operation()
+        best = max(best, operations / (perf_counter() - started))
+    return best
+
+
+def reference_loop() -> None:
+    """Эталонная нагрузка: словарь и арифметика, как в ходе змейки."""
+    cells = {}
+    for cell in range(64):
+        cells[cell] = cell * 3 % 7
+    del cells[0]
+
+
+def game(length: int, rocks: int) -> tuple:
+    """Собирает партию окна со змейкой на гамильтоновом цикле.
+
+    Returns:
+        tuple: (snake, apple, rock, steer), где `steer()` поворачивает
+            змейку к следующей клетке цикла.
+    """
+    snake, apple, rock = the_snake.new_game(SEED)
+    board = the_snake.board
+    board.reset()
+    cycle = hamiltonian_cycle(the_snake.GRID_WIDTH, the_snake.GRID_HEIGHT)
+    directions = {
+        board.cell(*cell): direction
+        for cell, direction in cycle_directions(cycle).items()
+    }
+    snake.positions.clear()
+    for cell in reversed(cycle[:length]):
+        snake.positions.append(board.cell(*cell))
+        board.occupy(board.cell(*cell))
+    snake.direction = directions[snake.get_head_position()]
+    apple.position = None
+    apple.randomize_position()
+    for _ in range(rocks):
+        rock.randomize_position()
+        rock.spawn_rock()
+
+    def steer():
+        snake.next_direction = directions[snake.get_head_position()]
+
+    return snake, apple, rock, steer
+
+
+def bench_move(length: int) -> float:
+    """Ходы `Snake.move` в секунду."""
+    snake, _, rock, steer = game(length, 0)
+
+    def tick():
+        steer()
+        snake.move(rock)
+
+    return ops_per_second(tick)
+
+
+def bench_spawn(length: int, rocks: int) -> float:
+    """Появления яблока в секунду."""
+    _, apple, _, _ = game(length, rocks)
+    return ops_per_second(apple.randomize_position)
+
+
+def bench_eat(length: int, rocks: int) -> float:
+    """Поедания яблока в секунду, включая каждый третий камень.
+
+    После каждого поедания рост и новый камень откатываются, чтобы поле
+    не заполнялось за время замера.
+    """
+    snake, apple, rock, _ = game(length, rocks)
+    board = the_snake.board
+    head = snake.get_head_position()
+    eat = the_snake.eat_and_check_position_and_spawn_rock
+
+    def tick():
+        board.vacate(apple.position)
+        apple.position = head
+        board.occupy(head)
+        eat(snake, apple, rock)
+        board.vacate(snake.positions.pop_tail())
+        if len(rock.rocks) > rocks:
+            board.vacate(rock.rocks.pop())
+
+    return ops_per_second(tick)
+
+
+def bench_rock_conflict(length: int, rocks: int) -> float:
+    """Проверки столкновения с камнями в секунду."""
+    snake, _, rock, _ = game(length, rocks)
+    return ops_per_second(lambda: the_snake.rock_conflict(snake, rock))
+
+
+def bench_frame(length: int, rocks: int) -> float:
+    """Полные кадры с одним логическим ходом в секунду."""
+    snake, apple, rock, steer = game(length, rocks)
+    the_snake.dirty_rects.flush()
+
+    def frame():
+        steer()
+        the_snake.update(snake, apple, rock)
+        the_snake.dirty_rects.flush()
+
+    return ops_per_second(frame, OPERATIONS // 5)
+
+
+def bench_world_frame(size: int) -> float:
+    """Кадры со сдвигом камеры в мире `size`x`size` в секунду."""
+    the_snake.set_world_size(size, size)
+    try:
+        snake, apple, rock = the_snake.new_game(SEED)
+        snake.direction = RIGHT
+        the_snake.dirty_rects.flush()
+
+        def frame():
+            the_snake.update(snake, apple, rock)
+            the_snake.dirty_rects.flush()
+
+        return ops_per_second(frame, OPERATIONS // 5)
+    finally:
+        the_snake.set_world_size(the_snake.GRID_WIDTH, the_snake.GRID_HEIGHT)
+
+
+def bench_engine_step(width: int, height: int, length: int) -> float:
+    """Ходы `SnakeEngine.step` в секунду."""
+    engine = SnakeEngine(width, height, SEED)
+    cells = hamiltonian_cycle(width, height)
+    cycle = [engine.cell(*cell) for cell in cells]
+    directions = {
+        engine.cell(*cell): direction
+        for cell, direction in cycle_directions(cells).items()
+    }
+
+    def lay():
+        engine.reset()
+        engine.place(reversed(cycle[:length]), cycle[-1])
+        engine.state.direction = directions[cycle[length - 1]]
+
+    lay()
+    state = engine.state
+
+    def tick():
+        if engine.step(directions[state.positions[0]])[2]:
+            lay()
+
+    return ops_per_second(tick)
+
+
+def cases():
+    """Перебирает случаи развёртки.
+
+    Yields:
+        tuple: (имя случая, функция замера, её аргументы).
+    """
+    for length in LENGTHS:
+        yield f'move/length={length}', bench_move, (length,)
+        for rocks in ROCK_COUNTS:
+            key = f'length={length}/rocks={rocks}'
+            yield f'spawn/{key}', bench_spawn, (length, rocks)
+            yield f'eat/{key}', bench_eat, (length, rocks)
+            yield f'rock_conflict/{key}', bench_rock_conflict, (length, rocks)
+            yield f'frame/{key}', bench_frame, (length, rocks)
+    for size in WORLD_SIZES:
+        yield f'world_frame/world={size}x{size}', bench_world_frame, (size,)
+    for width, height in ENGINE_GRIDS:
+        for length in ENGINE_LENGTHS:
+            if length < width * height // 2:
+                yield (
+                    f'engine_step/grid={width}x{height}/length={length}',
+                    bench_engine_step, (width, height, length),
+                )
+
+
+def run(runs: int = RUNS) -> tuple:
+    """Прогоняет все случаи `runs` раз и оставляет медианный прогон.
+
+    Перед каждым случаем заново замеряется эталонный цикл, чтобы
+    временное замедление машины сказывалось на обоих замерах.
+
+    Returns:
+        tuple: ({случай: операций в секунду},
+            {случай: скорость эталонного цикла рядом с ним}).
+    """
+    the_snake.open_window()
+    samples = {}
+    for _ in range(runs):
+        for name, bench, args in cases():
+            reference = ops_per_second(reference_loop)
+            samples.setdefault(name, []).append((bench(*args), reference))
+    results, references = {}, {}
+    for name, pairs in samples.items():
+        pairs.sort(key=lambda pair: pair[0] / pair[1])
+        results[name], references[name] = pairs[len(pairs) // 2]
+    return results, references
+
+
+def relative(results: dict, references: dict) -> dict:
+    """Переводит скорости в доли от скорости эталонного цикла."""
+    return {
+        case: speed / references[case] for case, speed in results.items()
+    }
+
+
+def compare(results: dict, baseline: dict,
+            tolerance: float = TOLERANCE) -> list:
+    """Сравнивает результаты с базовой линией.
+
+    Args:
+        results (dict): Текущие скорости по случаям.
+        baseline (dict): Сохранённые скорости по случаям в тех же
+            единицах.
+        tolerance (float): Допустимая доля падения скорости.
+
+    Returns:
+        list: Случаи, скорость которых упала больше допуска, в виде
+            (случай, базовая скорость, текущая скорость).
+    """
+    return [
+        (case, expected, results[case])
+        for case, expected in baseline.items()
+        if case in results and results[case] < expected * (1 - tolerance)
+    ]
+
+
+def main() -> None:
+    """Запускает замеры, печатает и сохраняет их, сверяет с базовой линией."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--save', metavar='PATH', default=None)
+    parser.add_argument(
+        '--baseline', metavar='PATH', nargs='?', const=BASELINE,
+        default=None,
+    )
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE)
+    parser.add_argument('--runs', type=int, default=RUNS)
+    args = parser.parse_args()
+
+    results, references = run(args.runs)
+    scores = relative(results, references)
+    baseline = {}
+    if args.baseline is not None:
+        with open(args.baseline, encoding='utf-8') as file:
+            saved = json.load(file)
+        baseline = relative(saved['results'], saved['references'])
+    for case, speed in results.items():
+        line = f'{case:<42} {speed:>14,.0f} оп/с'
+        if case in baseline:
+            line += f' {scores[case] / baseline[case] - 1:>+8.1%}'
+        print(line)
+    if args.save is not None:
+        with open(args.save, 'w', encoding='utf-8') as file:
+            json.dump({
+                'python': platform.python_version(),
+                'pygame': pygame.version.ver,
+                'machine': platform.machine(),
+                'seed': SEED,
+                'results': results,
+                'references': references,
+            }, file, indent=2, ensure_ascii=False)
+    regressions = compare(scores, baseline, args.tolerance)
+    for case, expected, score in regressions:
+        print(f'Замедление: {case}: {score / expected - 1:+.1%}')
+    if regressions:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""Сравнение пропускной способности `SnakeEngine` и `VectorSnakeEnv`.
+
+Запуск: `python benchmarks/bench_vector.py`.
+"""
+import sys
+from pathlib import Path
+from time import perf_counter
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from snake_engine import DIRECTIONS, SnakeEngine  # noqa: E402
+from snake_vector import VectorSnakeEnv  # noqa: E402
+
+BATCH_SIZES = (1, 64, 1024, 4096)
+TICKS = 200
+
+
+def scalar_ticks_per_second(games: int) -> float:
+    """Ходы в секунду, если двигать `games` партий по одной."""
+    engines = [SnakeEngine() for _ in range(games)]
+    rng = np.random.default_rng(0)
+    actions = rng.integers(0, 4, (TICKS, games)).tolist()
+    started = perf_counter()
+    for tick_actions in actions:
+        for engine, action in zip(engines, tick_actions):
+            _, _, done = engine.step(DIRECTIONS[action])
+            if done:
+                engine.reset()
+    return games * TICKS / (perf_counter() - started)
+
+
+def vector_ticks_per_second(games: int) -> float:
+    """Ходы в секунду для `VectorSnakeEnv` на `games` партий."""
+    env = VectorSnakeEnv(games, seed=0)
+    actions = env.rng.integers(0, 4, (TICKS, games))
+    started = perf_counter()
+    for tick_actions in actions:
+        env.step(tick_actions)
+    return games * TICKS / (perf_counter() - started)
+
+
+def main() -> None:
+    """Печатает ходы в секунду для разных размеров пакета."""
+    print(f'{"партий":>7} {"SnakeEngine":>12} {"VectorSnakeEnv":>15}')
+    for games in BATCH_SIZES:
+        print(f'{games:>7} {scalar_ticks_per_second(games):>12,.0f} '
+              f'{vector_ticks_per_second(games):>15,.0f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,422 @@
+"""Арена: много змеек, яблок и камней на одном поле.
+
+Змейками управляют боты (`bot_actions`) или игрок. Все столкновения
+разбираются за ход по общей сетке владельцев клеток `Arena.grid`: в
+клетке лежит номер змейки плюс один, `ROCK_CELL`, `APPLE_CELL` или
+`EMPTY`. Проверка клетки стоит O(1), а столкновения голов находятся
+словарём занятых за ход клеток, поэтому ход арены - O(числа змеек) и не
+зависит ни от их длины, ни от числа камней.
+
+Правила хода:
+
+1. Хвосты всех не растущих змеек освобождают клетки, поэтому в клетку
+   уходящего хвоста (в том числе своего) заходить можно.
+2. Голова, попавшая в тело змейки или в камень, погибает.
+3. Две головы в одной клетке погибают обе.
+4. Голова на яблоке растёт на клетку; на место яблока встаёт новое, а
+   каждые `ROCK_EVERY` яблок на арене появляется камень.
+
+Погибшая змейка освобождает клетки и, если включено возрождение,
+появляется заново в случайной свободной клетке.
+
+Запуск с игроком: `python snake_arena.py --snakes 100`; замер
+масштабирования - `benchmarks/bench_arena.py`.
+"""
+import argparse
+from array import array
+from collections import deque
+from random import Random
+
+from snake_engine import (
+    DIRECTIONS, OPPOSITE, ROCK_EVERY, FreeCells, neighbour_table,
+)
+
+# Содержимое клетки сетки, кроме змеек (у змейки `k` - `k + 1`):
+EMPTY = 0
+ROCK_CELL = -1
+APPLE_CELL = -2
+
+
+def torus_offset(offset: int, size: int) -> int:
+    """Приводит сдвиг по кольцу длины `size` к кратчайшему."""
+    return (offset + size // 2) % size - size // 2
+
+
+class ArenaSnake:
+    """Одна змейка арены.
+
+    Attributes:
+        index (int): Номер змейки; в сетке её клетки хранят `index + 1`.
+        body (deque): Клетки тела, голова первая.
+        direction (tuple): Текущее направление.
+        growth (int): Сколько ходов хвост ещё не будет сдвигаться.
+        score (int): Яблоки, съеденные с последнего появления.
+        alive (bool): Жива ли змейка.
+        target (int): Клетка яблока, к которой идёт бот.
+    """
+
+    __slots__ = (
+        'index', 'body', 'direction', 'growth', 'score', 'alive', 'target',
+    )
+
+    def __init__(self, index: int) -> None:
+        """Создаёт змейку без тела; на поле её ставит `Arena`."""
+        self.index = index
+        self.body = deque()
+        self.direction = DIRECTIONS[0]
+        self.growth = 0
+        self.score = 0
+        self.alive = False
+        self.target = None
+
+    def __len__(self) -> int:
+        """Возвращает длину змейки."""
+        return len(self.body)
+
+
+class Arena:
+    """Поле с многими змейками, яблоками и камнями.
+
+    Attributes:
+        width (int): Ширина поля в клетках.
+        height (int): Высота поля в клетках.
+        grid (array): Владелец каждой клетки.
+        snakes (list): Змейки `ArenaSnake`.
+        apples (list): Клетки яблок.
+        rocks (array): Клетки камней.
+        eaten (int): Яблоки, съеденные на арене.
+        ticks (int): Число ходов.
+        changed (list): Клетки, изменившиеся за последний ход.
+    """
+
+    def __init__(self, width: int, height: int, snakes: int,
+                 apples: int = None, seed: int = None,
+                 max_rocks: int = None, respawn: bool = True) -> None:
+        """Создаёт арену и расставляет змеек и яблоки.
+
+        Args:
+            width (int): Ширина поля в клетках.
+            height (int): Высота поля в клетках.
+            snakes (int): Число змеек.
+            apples (int, optional): Число яблок; по умолчанию по одному
+                на змейку.
+            seed (int, optional): Зерно генератора случайных чисел.
+            max_rocks (int, optional): Предел числа камней; по умолчанию
+                процент клеток поля.
+            respawn (bool): Возрождать ли погибшие змейки.
+
+        Raises:
+            ValueError: Если змейкам и яблокам не хватает клеток.
+        """
+        cells = width * height
+        apples = snakes if apples is None else apples
+        if snakes + apples > cells:
+            raise ValueError('Змейкам и яблокам не хватает клеток поля.')
+        self.width = width
+        self.height = height
+        self.rng = Random(seed)
+        self.neighbours = neighbour_table(width, height)
+        self.grid = array('i', [EMPTY]) * cells
+        self.free = FreeCells(cells)
+        self.max_rocks = cells // 100 if max_rocks is None else max_rocks
+        self.respawn = respawn
+        self.rocks = array('i')
+        self.apples = []
+        self._apple_slots = {}
+        self.eaten = 0
+        self.ticks = 0
+        self.changed = []
+        self.snakes = [ArenaSnake(index) for index in range(snakes)]
+        for snake in self.snakes:
+            self.spawn_snake(snake)
+        for _ in range(apples):
+            self.spawn_apple()
+
+    def _take(self, cell: int, value: int) -> None:
+        """Занимает свободную клетку."""
+        self.free.take(cell)
+        self.grid[cell] = value
+        self.changed.append(cell)
+
+    def _release(self, cell: int) -> None:
+        """Освобождает клетку."""
+        self.grid[cell] = EMPTY
+        self.free.release(cell)
+        self.changed.append(cell)
+
+    def spawn_snake(self, snake: ArenaSnake) -> bool:
+        """Ставит змейку длины 1 в случайную свободную клетку.
+
+        Returns:
+            bool: Нашлась ли свободная клетка.
+        """
+        cell = self.free.sample(self.rng)
+        if cell is None:
+            return False
+        self.place_snake(snake, [cell], self.rng.choice(DIRECTIONS))
+        return True
+
+    def place_snake(self, snake: ArenaSnake, cells, direction: tuple) -> None:
+        """Ставит змейку на свободные клетки `cells`, голова первая.
+
+        Прежнее тело змейки убирается с поля.
+        """
+        self._kill(snake)
+        for cell in cells:
+            self._take(cell, snake.index + 1)
+            snake.body.append(cell)
+        snake.direction = direction
+        snake.growth = snake.score = 0
+        snake.alive = True
+        snake.target = None
+
+    def spawn_apple(self) -> None:
+        """Ставит яблоко в случайную свободную клетку, если она есть."""
+        cell = self.free.sample(self.rng)
+        if cell is not None:
+            self._take(cell, APPLE_CELL)
+            self._apple_slots[cell] = len(self.apples)
+            self.apples.append(cell)
+
+    def _remove_apple(self, cell: int) -> None:
+        """Убирает яблоко из списка: на его место встаёт последнее."""
+        slot = self._apple_slots.pop(cell)
+        last = self.apples.pop()
+        if last != cell:
+            self.apples[slot] = last
+            self._apple_slots[last] = slot
+
+    def _spawn_rock(self) -> None:
+        """Ставит камень в случайную свободную клетку, если есть место."""
+        if len(self.rocks) >= self.max_rocks:
+            return
+        cell = self.free.sample(self.rng)
+        if cell is not None:
+            self._take(cell, ROCK_CELL)
+            self.rocks.append(cell)
+
+    def step(self, actions=None) -> list:
+        """Делает один ход всех живых змеек.
+
+        Args:
+            actions (sequence, optional): Направление или None для
+                каждой змейки по номеру; разворот на 180 градусов
+                игнорируется.
+
+        Returns:
+            list: Змейки, погибшие в этом ходу.
+        """
+        self.changed = []
+        self.ticks += 1
+        moves = self._advance_tails(actions)
+        dead = self._claim_heads(moves)
+        for snake in dead:
+            self._kill(snake)
+        eaten = 0
+        for snake, head in moves:
+            if snake.alive:
+                eaten += self._move_head(snake, head)
+        # Новые яблоки и камни ставятся, когда все головы уже на местах:
+        # иначе они могли бы занять клетку, куда идёт ещё не сдвинутая
+        # змейка.
+        for _ in range(eaten):
+            self.eaten += 1
+            self.spawn_apple()
+            if self.eaten % ROCK_EVERY == 0:
+                self._spawn_rock()
+        if self.respawn:
+            for snake in dead:
+                self.spawn_snake(snake)
+        return dead
+
+    def _advance_tails(self, actions) -> list:
+        """Поворачивает змеек и сдвигает хвосты.
+
+        Returns:
+            list: Пары (змейка, клетка новой головы).
+        """
+        neighbours = self.neighbours
+        moves = []
+        for snake in self.snakes:
+            if not snake.alive:
+                continue
+            action = actions[snake.index] if actions is not None else None
+            if action is not None and action != OPPOSITE[snake.direction]:
+                snake.direction = action
+            moves.append(
+                (snake, neighbours[snake.direction][snake.body[0]])
+            )
+            if snake.growth:
+                snake.growth -= 1
+            else:
+                self._release(snake.body.pop())
+        return moves
+
+    def _claim_heads(self, moves: list) -> list:
+        """Находит головы, врезавшиеся в тела, камни и друг в друга.
+
+        Returns:
+            list: Погибшие змейки.
+        """
+        grid = self.grid
+        claims = {}
+        dead = []
+        for snake, head in moves:
+            if grid[head] > EMPTY or grid[head] == ROCK_CELL:
+                dead.append(snake)
+                continue
+            rival = claims.get(head)
+            if rival is None:
+                claims[head] = snake
+                continue
+            dead.append(snake)
+            if rival.alive:
+                dead.append(rival)
+                # Третья голова в той же клетке погибнет по `claims`.
+                rival.alive = False
+        for snake in dead:
+            snake.alive = False
+        return dead
+
+    def _move_head(self, snake: ArenaSnake, head: int) -> bool:
+        """Ставит голову выжившей змейки.
+
+        Returns:
+            bool: Съела ли змейка яблоко.
+        """
+        snake.body.appendleft(head)
+        if self.grid[head] != APPLE_CELL:
+            self._take(head, snake.index + 1)
+            return False
+        self._remove_apple(head)
+        self.grid[head] = snake.index + 1
+        self.changed.append(head)
+        snake.growth += 1
+        snake.score += 1
+        return True
+
+    def _kill(self, snake: ArenaSnake) -> None:
+        """Освобождает клетки погибшей змейки."""
+        release = self._release
+        for cell in snake.body:
+            release(cell)
+        snake.body.clear()
+
+    def lengths(self) -> list:
+        """Возвращает длины всех змеек."""
+        return [len(snake.body) for snake in self.snakes]
+
+
+def bot_action(arena: Arena, snake: ArenaSnake) -> tuple:
+    """Направление бота: к своему яблоку, в обход занятых клеток.
+
+    Бот выбирает случайное яблоко и идёт к нему по кратчайшему сдвигу
+    на торе, пока яблоко на месте. Из безопасных соседних клеток
+    выбирается та, что ближе к цели; если безопасных нет, бот идёт
+    прямо.
+
+    Returns:
+        tuple: Направление или None.
+    """
+    grid, width, height = arena.grid, arena.width, arena.height
+    target = snake.target
+    if (target is None or grid[target] != APPLE_CELL) and arena.apples:
+        target = snake.target = arena.rng.choice(arena.apples)
+    head = snake.body[0]
+    if target is None:
+        dx = dy = 0
+    else:
+        dx = torus_offset(target % width - head % width, width)
+        dy = torus_offset(target // width - head // width, height)
+    best, best_distance = None, None
+    for direct in DIRECTIONS:
+        if direct == OPPOSITE[snake.direction]:
+            continue
+        cell = arena.neighbours[direct][head]
+        if grid[cell] > EMPTY or grid[cell] == ROCK_CELL:
+            continue
+        distance = abs(dx - direct[0]) + abs(dy - direct[1])
+        if best_distance is None or distance < best_distance:
+            best, best_distance = direct, distance
+    return best
+
+
+def bot_actions(arena: Arena) -> list:
+    """Возвращает действия ботов для всех змеек арены."""
+    return [
+        bot_action(arena, snake) if snake.alive else None
+        for snake in arena.snakes
+    ]
+
+
+def play(arena: Arena, cell_size: int) -> None:
+    """Показывает арену в окне; змейкой 0 управляет игрок стрелками.
+
+    Args:
+        arena (Arena): Арена.
+        cell_size (int): Размер клетки в пикселях.
+    """
+    import pygame
+
+    import the_snake
+
+    pygame.init()
+    screen = pygame.display.set_mode(
+        (arena.width * cell_size, arena.height * cell_size)
+    )
+    pygame.display.set_caption('Змейка: арена')
+    clock = pygame.time.Clock()
+    colors = {
+        EMPTY: the_snake.BOARD_BACKGROUND_COLOR,
+        ROCK_CELL: the_snake.ROCKET_COLOR,
+        APPLE_CELL: the_snake.APPLE_COLOR,
+        1: the_snake.SNAKE_COLOR,
+    }
+    bots_color = (0, 128, 0)
+
+    def draw(cells) -> list:
+        rects = []
+        for cell in cells:
+            rect = pygame.Rect(
+                cell % arena.width * cell_size,
+                cell // arena.width * cell_size, cell_size, cell_size,
+            )
+            screen.fill(colors.get(arena.grid[cell], bots_color), rect)
+            rects.append(rect)
+        return rects
+
+    draw(range(len(arena.grid)))
+    pygame.display.flip()
+    player = arena.snakes[0]
+    turn = None
+    while True:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                pygame.quit()
+                return
+            if event.type == pygame.KEYDOWN:
+                turn = the_snake.KEY_DIRECTIONS.get(event.key, turn)
+        actions = bot_actions(arena)
+        actions[player.index] = turn
+        turn = None
+        arena.step(actions)
+        pygame.display.update(draw(set(arena.changed)))
+        clock.tick(the_snake.SPEED)
+
+
+def main() -> None:
+    """Открывает арену с игроком и ботами."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--snakes', type=int, default=100)
+    parser.add_argument('--width', type=int, default=128)
+    parser.add_argument('--height', type=int, default=96)
+    parser.add_argument('--cell', type=int, default=6,
+                        help='размер клетки в пикселях')
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+    play(Arena(args.width, args.height, args.snakes, seed=args.seed),
+         args.cell)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,538 @@
+"""Автопилот змейки: кратчайший путь к яблоку с бюджетом на ход.
+
+Путь ищется обходом в ширину от яблока к змейке, а не наоборот: дерево
+обхода не зависит от того, где сейчас голова, поэтому поиск можно
+растянуть на много ходов, расширяя за ход не больше `budget` клеток.
+
+Найденный путь хранится и проверяется за O(1) в каждом ходу. Когда
+переносится яблоко (`retarget`), поиск начинается заново. Когда на
+пути появляется камень (`block`), путь чинится на месте: обход идёт от
+клеток пути за камнем, пока не встретит ещё не пройденную клетку пути
+до камня, и найденный обход вклеивается между ними.
+
+Путь к яблоку принимается, только если после яблока змейка сможет дойти
+до своего хвоста. Проверка - такой же обход в тех же массивах: от клетки,
+где окажется хвост, до яблока по полю, на котором тело уже сдвинулось
+вдоль пути. Найденный выход вместе с телом образует петлю, по которой
+змейка может ходить за хвостом, пока ищет следующее яблоко. Если путь не
+прошёл проверку или яблоко недостижимо, обход ищет путь от хвоста к
+голове и тоже замыкает его в петлю. Жадный ход остаётся только на ходы,
+пока ни пути, ни петли ещё нет.
+
+Бюджет считается в клетках, а не в секундах, чтобы партии с автопилотом
+оставались воспроизводимыми по зерну. Модуль не зависит от pygame и
+работает с номерами клеток `y * width + x`.
+"""
+from array import array
+from collections import deque
+
+from snake_engine import DIRECTIONS, OPPOSITE
+
+# Сколько клеток поиск расширяет за один ход:
+BUDGET = 512
+
+# Через сколько клеток петли за хвостом путь к яблоку сходит с неё: пока
+# змейка проходит эти клетки, успевает закончиться проверка пути.
+LEAD = 3
+
+# Что ищет текущий обход: путь к яблоку, выход к хвосту после яблока
+# (проверка пути) или путь от хвоста к голове.
+APPLE = 'apple'
+SAFETY = 'safety'
+TAIL = 'tail'
+
+
+class Autopilot:
+    """Выбирает направление змейки на каждом ходу.
+
+    Дерево поиска хранится в массивах на всё поле, выделенных один раз:
+    клетка входит в дерево, если её метка равна номеру текущего поиска.
+    Поэтому новый поиск начинается за O(1), а время хода не скачет из-за
+    роста и освобождения словарей.
+
+    Attributes:
+        width (int): Ширина поля в клетках.
+        height (int): Высота поля в клетках.
+        is_free (callable): `is_free(cell)` - свободна ли клетка от
+            змейки, яблока и камней.
+        budget (int): Сколько клеток поиск расширяет за ход.
+        target (int): Клетка яблока или None.
+        path (list): Сохранённый путь к яблоку, клетки по порядку.
+        step (int): Индекс в `path` следующей клетки пути.
+        safe (bool): Прошёл ли путь проверку выхода к хвосту.
+        escape (list): Петля клеток, по которой змейка ходит за хвостом,
+            или None.
+    """
+
+    def __init__(self, width: int, height: int, is_free,
+                 budget: int = BUDGET) -> None:
+        """Создаёт автопилот без цели."""
+        self.is_free = is_free
+        self.budget = budget
+        self.width = self.height = None
+        self.reset(width, height)
+
+    def reset(self, width: int, height: int) -> None:
+        """Забывает цель, путь и поиск, например перед новой партией."""
+        if (width, height) != (self.width, self.height):
+            self.width = width
+            self.height = height
+            # Следующая клетка к корню дерева; у корня -1:
+            self._parents = array('i', [-1]) * (width * height)
+            # Номер поиска, в дерево которого входит клетка:
+            self._marks = array('I', [0]) * (width * height)
+            self._generation = 0
+        self.target = None
+        self.path = []
+        self.step = 0
+        self.safe = False
+        self.escape = None
+        self._at = {}
+        # Петля после яблока проверенного пути; начинает работать, когда
+        # голова съест яблоко:
+        self._pending = None
+        self.stop()
+
+    def neighbour(self, cell: int, direct: tuple) -> int:
+        """Возвращает соседнюю клетку с переходом через край поля."""
+        width = self.width
+        return (
+            (cell // width + direct[1]) % self.height * width
+            + (cell % width + direct[0]) % width
+        )
+
+    def in_tree(self, cell: int) -> bool:
+        """Проверяет, что клетка уже попала в дерево текущего поиска."""
+        return self._searching and self._marks[cell] == self._generation
+
+    def plant(self, roots: list, mode: str = APPLE) -> None:
+        """Начинает новое дерево поиска.
+
+        Args:
+            roots (list): Клетки пути к цели по порядку; каждая ведёт к
+                следующей, последняя - цель.
+            mode (str): Что ищет обход: `APPLE`, `SAFETY` или `TAIL`.
+        """
+        self._generation += 1
+        self._searching = True
+        self._mode = mode
+        parent = -1
+        for cell in reversed(roots):
+            self._parents[cell] = parent
+            self._marks[cell] = self._generation
+            parent = cell
+        self._frontier = deque(roots)
+
+    def stop(self) -> None:
+        """Заканчивает поиск."""
+        self._searching = False
+        self._mode = None
+        self._frontier = deque()
+        # Ещё не пройденные клетки пути до камня -> их индексы в `path`:
+        self._prefix = {}
+        # Пока путь чинится, идти по нему можно только до камня:
+        self._limit = None
+
+    def chain(self, cell: int) -> list:
+        """Возвращает путь по дереву от клетки `cell` до корня."""
+        parents = self._parents
+        path = []
+        while cell != -1:
+            path.append(cell)
+            cell = parents[cell]
+        return path
+
+    def retarget(self, target: int) -> None:
+        """Начинает поиск пути к новому положению яблока.
+
+        Петля за хвостом сохраняется: по ней змейка ходит, пока ищется
+        путь.
+
+        Args:
+            target (int): Клетка яблока или None, если яблока нет.
+        """
+        self.target = target
+        self.path = []
+        self.step = 0
+        self.safe = False
+        # Сколько ходов змейка прошла по петле после конца поиска:
+        self._idle = 0
+        self.stop()
+        if target is not None:
+            self.plant([target])
+
+    def block(self, cell: int) -> None:
+        """Учитывает новое препятствие в клетке `cell`.
+
+        Если клетка лежит на оставшемся пути, путь до неё сохраняется, а
+        от клеток за ней начинается поиск обхода. Петля, через которую
+        прошёл камень, забывается.
+        """
+        if cell in self._at:
+            self.leave()
+        if self._pending is not None and cell in self._pending[1]:
+            self._pending = None
+            self.safe = False
+        if self.in_tree(cell) or (self._prefix and cell in self.path):
+            # Дерево могло пройти через новое препятствие.
+            self.retarget(self.target)
+            return
+        try:
+            index = self.path.index(cell, self.step)
+        except ValueError:
+            return
+        path = self.path
+        self.plant(path[index + 1:])
+        self._prefix = {
+            path[position]: position for position in range(self.step, index)
+        }
+        self._limit = index
+        self.safe = False
+
+    def search(self, budget: int = None) -> int:
+        """Расширяет дерево поиска не больше чем на `budget` клеток.
+
+        Returns:
+            int: Сколько клеток бюджета осталось.
+        """
+        parents = self._parents
+        marks = self._marks
+        generation = self._generation
+        frontier = self._frontier
+        prefix = self._prefix
+        is_free = self.is_free
+        width, height = self.width, self.height
+        left = self.budget if budget is None else budget
+        while left and frontier:
+            left -= 1
+            cell = frontier.popleft()
+            y_cord, x_cord = divmod(cell, width)
+            row = y_cord * width
+            for after in (
+                (y_cord - 1) % height * width + x_cord,
+                (y_cord + 1) % height * width + x_cord,
+                row + (x_cord - 1) % width,
+                row + (x_cord + 1) % width,
+            ):
+                if marks[after] == generation:
+                    continue
+                index = prefix.get(after)
+                if index is not None and index >= self.step:
+                    self.path = self.path[:index + 1] + self.chain(cell)
+                    self.stop()
+                    return left
+                if is_free(after):
+                    parents[after] = cell
+                    marks[after] = generation
+                    frontier.append(after)
+        return left
+
+    def verify(self, body) -> None:
+        """Начинает проверку пути: выход от яблока к хвосту.
+
+        Тело сдвигается вдоль оставшегося пути и вырастает на клетку;
+        обход идёт от клетки нового хвоста по свободным клеткам и клеткам,
+        которые тело к тому времени освободит, пока не встретит яблоко.
+        Сам обход расширяется в `check` в счёт бюджета хода.
+
+        Args:
+            body: Клетки змейки, голова первая.
+        """
+        virtual = self.path[self.step:][::-1]
+        occupied = set(virtual)
+        length = len(body) + 1
+        for cell in body:
+            if len(virtual) >= length:
+                break
+            if cell not in occupied:
+                virtual.append(cell)
+                occupied.add(cell)
+        self._freed = {cell for cell in body if cell not in occupied}
+        occupied.difference_update((virtual[0], virtual[-1]))
+        self._occupied = occupied
+        self._virtual = virtual
+        self.plant([virtual[-1]], SAFETY)
+
+    def check(self, budget: int) -> int:
+        """Продолжает проверку пути не больше чем на `budget` клеток.
+
+        Returns:
+            int: Сколько клеток бюджета осталось.
+        """
+        marks = self._marks
+        generation = self._generation
+        frontier = self._frontier
+        occupied, freed = self._occupied, self._freed
+        root = self._virtual[-1]
+        is_free = self.is_free
+        left = budget
+        while left and frontier:
+            left -= 1
+            cell = frontier.popleft()
+            for direct in DIRECTIONS:
+                after = self.neighbour(cell, direct)
+                if marks[after] == generation or after in occupied:
+                    continue
+                if after == self.target:
+                    # Выход прямо в клетку хвоста не годится: змейка
+                    # займёт всю петлю и упрётся в собственный хвост.
+                    if cell != root:
+                        self.secure(cell)
+                        return left
+                elif after in freed or is_free(after):
+                    self._parents[after] = cell
+                    marks[after] = generation
+                    frontier.append(after)
+        return left
+
+    def secure(self, cell: int) -> None:
+        """Принимает путь: выход от соседа яблока `cell` найден."""
+        self._pending = self.loop(
+            self.chain(cell) + self._virtual[-2::-1]
+        )
+        self.safe = True
+        self.stop()
+
+    def reject(self, body) -> None:
+        """Отказывается от пути к яблоку и ищет путь к хвосту."""
+        self._pending = None
+        self.restart(body)
+
+    def restart(self, body) -> None:
+        """Ищет путь к хвосту, если петли нет, иначе снова путь к яблоку."""
+        self.retarget(self.target)
+        if self.escape is not None:
+            return
+        tail = body[-1]
+        if len(body) > 1 and tail == body[0]:
+            # После яблока в хвосте игры лежит дубль клетки головы.
+            tail = body[-2]
+        # Петля пройдёт от хвоста по телу к голове и дальше по ходам,
+        # которые змейка сделает, пока ищется путь:
+        self._trail = list(body)[-2::-1]
+        self.stop()
+        self.plant([tail], TAIL)
+
+    def settle(self, head: int, direction: tuple) -> None:
+        """Замыкает петлю, если путь от хвоста дошёл до соседа головы."""
+        for direct in DIRECTIONS:
+            cell = self.neighbour(head, direct)
+            if direct != OPPOSITE[direction] and self.in_tree(cell):
+                self.escape, self._at = self.loop(
+                    self.chain(cell) + self._trail
+                )
+                self.retarget(self.target)
+                return
+
+    @staticmethod
+    def loop(cells: list) -> tuple:
+        """Возвращает петлю без повторов клеток и индексы её клеток."""
+        cells = list(dict.fromkeys(cells))
+        return cells, {cell: index for index, cell in enumerate(cells)}
+
+    def leave(self) -> None:
+        """Забывает петлю за хвостом."""
+        self.escape = None
+        self._at = {}
+
+    def choose(self, head: int, direction: tuple, body=None) -> tuple:
+        """Выбирает направление следующего хода.
+
+        Args:
+            head (int): Клетка головы змейки.
+            direction (tuple): Текущее направление движения.
+            body (optional): Клетки змейки, голова первая; по умолчанию
+                змейка из одной головы.
+
+        Returns:
+            tuple: Новое направление; разворот назад не выбирается.
+        """
+        if self.target is None:
+            return direction
+        if body is None:
+            body = (head,)
+        if self._mode == TAIL and head != (self._trail or [None])[-1]:
+            self._trail.append(head)
+        if self._pending is not None and head == self._pending[0][-1]:
+            # Петля кончается клеткой яблока: голова дошла по пути.
+            self.escape, self._at = self._pending
+            self._pending = None
+        self.advance(head, direction, body)
+        ahead = self.ahead(head, body)
+        direct = self.follow(head, direction, body, ahead)
+        if direct is None and ahead is not None:
+            direct = self.towards(head, direction, ahead)
+        if direct is None:
+            direct = self.fallback(head, direction, body)
+        if ahead is not None and self.neighbour(head, direct) != ahead:
+            self.leave()
+        return direct
+
+    def advance(self, head: int, direction: tuple, body) -> None:
+        """Тратит бюджет хода на текущий поиск и проверку пути."""
+        left = self.budget
+        if self._mode == SAFETY:
+            left = self.check(left)
+        elif self._searching:
+            left = self.search(left)
+        if self._prefix and self.step >= self._limit:
+            # Змейка дошла до камня раньше, чем нашёлся обход: дальше
+            # дерево обхода ждёт, пока его не встретит сама голова.
+            self._prefix = {}
+        if self._mode == APPLE and not self._prefix:
+            self.adopt(head, direction)
+        elif self._mode == TAIL:
+            self.settle(head, direction)
+        if self.path and not self.safe and not self._searching:
+            self.verify(body)
+            self.check(left)
+        if self._mode == SAFETY and not self._frontier:
+            self.reject(body)
+
+    def ahead(self, head: int, body) -> int:
+        """Возвращает следующую клетку петли за хвостом или None."""
+        index = self._at.get(head)
+        if index is not None:
+            cell = self.escape[(index + 1) % len(self.escape)]
+            if self.is_free(cell) or (
+                cell == self.target and len(self.escape) > len(body) + 1
+            ):
+                return cell
+        self.leave()
+        if (self._mode == APPLE and not self.path
+                and len(body) > LEAD + 1):
+            # Петлю перекрыли камень или яблоко: пока нет пути к
+            # яблоку, первым делом ищем новую.
+            self.restart(body)
+        return None
+
+    def towards(self, head: int, direction: tuple, cell: int) -> tuple:
+        """Возвращает направление в соседнюю клетку `cell` или None."""
+        for direct in DIRECTIONS:
+            if (self.neighbour(head, direct) == cell
+                    and direct != OPPOSITE[direction]):
+                return direct
+        return None
+
+    def follow(self, head: int, direction: tuple, body,
+               ahead: int) -> tuple:
+        """Возвращает направление следующего шага пути к яблоку или None.
+
+        Непроверенный путь не уводит змейку ни с петли за хвостом, ни в
+        клетку яблока.
+        """
+        limit = len(self.path) if self._limit is None else self._limit
+        if self.step < limit:
+            cell = self.path[self.step]
+            if not self.safe and cell != ahead and (
+                cell == self.target or self.escape is not None
+            ):
+                # Проверка ещё не прошла: на петле змейка ждёт её, идя
+                # дальше, а без петли яблоко без выхода к хвосту не берёт.
+                if ahead is None:
+                    self.reject(body)
+                return None
+            direct = self.towards(head, direction, cell)
+            if direct is not None and (
+                cell == self.target or self.is_free(cell)
+            ):
+                self.step += 1
+                return direct
+            # Путь разорван: голова ушла с него или на нём препятствие.
+            self._pending = None
+            self.retarget(self.target)
+        elif self._mode == APPLE and not self._frontier:
+            # Дерево закончено, но не дошло до змейки. На петле змейка
+            # обходит её круг, пока дерево не встретит клетку петли;
+            # иначе яблоко недостижимо: ищем путь к хвосту и заново.
+            if self.escape is None or self._idle > len(self.escape):
+                self.restart(body)
+            else:
+                self._idle += 1
+        elif self._mode != SAFETY and not self._frontier:
+            # Путь пройден или хвост недостижим: начинаем заново.
+            self.retarget(self.target)
+        return None
+
+    def adopt(self, head: int, direction: tuple) -> None:
+        """Берёт путь из дерева поиска, если оно дошло до соседа головы.
+
+        Из нескольких соседей в дереве выбирается самый короткий путь.
+        На петле за хвостом путь начинается с `LEAD` клеток петли и
+        сходит с неё у последней из них.
+        """
+        lead = self.lead(head)
+        corner = lead[-1] if lead else head
+        best = None
+        for direct in DIRECTIONS:
+            cell = self.neighbour(corner, direct)
+            if (direct == OPPOSITE[direction] and not lead
+                    or cell in lead or not self.in_tree(cell)):
+                continue
+            path = self.chain(cell)
+            if best is None or len(path) < len(best):
+                best = path
+        if best is None:
+            return
+        if not set(best).isdisjoint(lead):
+            # Путь из дерева возвращается на начало пути по петле.
+            return
+        if not all(map(self.is_free, best[:-1])):
+            # Змейка прошла по клеткам дерева, пока оно росло.
+            self.retarget(self.target)
+            return
+        self.path = lead + best
+        self.step = 0
+        self.safe = False
+        self.stop()
+
+    def lead(self, head: int) -> list:
+        """Возвращает клетки петли, с которых начинается путь к яблоку.
+
+        Returns:
+            list: `LEAD` следующих клеток петли по порядку; пустой, если
+            петли нет. Слишком короткая петля забывается: змейка на ней
+            так коротка, что не запрёт себя.
+        """
+        index = self._at.get(head)
+        if index is None:
+            return []
+        size = len(self.escape)
+        if size <= LEAD + 1:
+            self.leave()
+            return []
+        return [
+            self.escape[(index + step) % size] for step in range(1, LEAD + 1)
+        ]
+
+    def fallback(self, head: int, direction: tuple, body) -> tuple:
+        """Ход, пока нет ни проверенного пути, ни петли за хвостом.
+
+        Из свободных соседних клеток выбирается та, из которой есть
+        выход дальше, затем ближайшая к цели, затем самая просторная;
+        при равенстве змейка продолжает идти прямо. Цель - хвост, пока
+        ищется путь к нему, иначе яблоко.
+        """
+        best, best_score = direction, None
+        goal = body[-1] if self._mode == TAIL else self.target
+        goal_x, goal_y = goal % self.width, goal // self.width
+        for direct in dict.fromkeys([direction] + DIRECTIONS):
+            if direct == OPPOSITE[direction]:
+                continue
+            cell = self.neighbour(head, direct)
+            if cell != self.target and not self.is_free(cell):
+                continue
+            exits = sum(
+                self.is_free(self.neighbour(cell, after))
+                for after in DIRECTIONS
+            )
+            x_gap = abs(cell % self.width - goal_x)
+            y_gap = abs(cell // self.width - goal_y)
+            distance = (
+                min(x_gap, self.width - x_gap)
+                + min(y_gap, self.height - y_gap)
+            )
+            score = (cell == self.target or exits > 0, -distance, exits)
+            if best_score is None or score > best_score:
+                best, best_score = direct, score
+        return best
@@ -0,0 +1,240 @@
+"""Запись кадров партий без окна: в массивы NumPy, видеопоток и картинки.
+
+Игра рисуется теми же спрайтами клеток, что и в окне, но на
+поверхность в памяти (`the_snake.open_offscreen`), поэтому дисплей не
+нужен. Кадр снимается через `pygame.surfarray` в массив (высота, ширина,
+3) и передаётся `FrameWriter`, который пишет кадры на диск в фоновом
+потоке, пока игра рисует следующие.
+
+Форматы записи:
+
+- `raw` - один файл из кадров RGB подряд, без заголовка; его читает
+  `np.fromfile(...).reshape(-1, высота, ширина, 3)` и
+  `ffmpeg -f rawvideo -pix_fmt rgb24 -s ШИРИНАxВЫСОТА -i файл`;
+- `png` - каталог с картинками `000000.png`, `000001.png`, ...
+
+Запуск: `python snake_capture.py КАТАЛОГ *.snkr --format raw`.
+"""
+import argparse
+import os
+import threading
+from pathlib import Path
+from queue import Queue
+from time import perf_counter
+
+import numpy as np
+import pygame
+
+import the_snake
+from snake_replay import RULES_GAME, Replay
+
+FORMATS = ('raw', 'png')
+
+# Сколько кадров может ждать записи, прежде чем игра остановится:
+QUEUE_SIZE = 64
+
+
+def grab(surface: pygame.Surface) -> np.ndarray:
+    """Копирует кадр поверхности в массив (высота, ширина, 3) uint8.
+
+    У поверхности с `the_snake.OFFSCREEN_MASKS` строки пикселей уже
+    лежат как RGB, и копирование сводится к копированию памяти.
+    """
+    return pygame.surfarray.pixels3d(surface).transpose(1, 0, 2).copy()
+
+
+class FrameWriter:
+    """Пишет кадры на диск в фоновом потоке.
+
+    Кадры ставятся в ограниченную очередь; если диск не успевает,
+    `write` ждёт, а не копит кадры в памяти. Ошибка потока записи
+    поднимается из `close`.
+
+    Attributes:
+        path (Path): Файл потока (`raw`) или каталог картинок (`png`).
+        format (str): Формат записи из `FORMATS`.
+        frames (int): Число принятых кадров.
+        shape (tuple): Размер последнего кадра (высота, ширина, 3).
+    """
+
+    def __init__(self, path, format: str = 'raw',
+                 queue_size: int = QUEUE_SIZE) -> None:
+        """Открывает поток или каталог и запускает поток записи.
+
+        Raises:
+            ValueError: Если формат неизвестен.
+        """
+        if format not in FORMATS:
+            raise ValueError(f'Неизвестный формат кадров: {format}')
+        self.path = Path(path)
+        self.format = format
+        self.frames = 0
+        self.shape = None
+        self.error = None
+        if format == 'raw':
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, 'wb')
+        else:
+            self.path.mkdir(parents=True, exist_ok=True)
+            self._file = None
+        self._queue = Queue(queue_size)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def write(self, frame: np.ndarray) -> None:
+        """Ставит кадр (высота, ширина, 3) в очередь записи.
+
+        Кадр не должен меняться после вызова: `grab` возвращает копию.
+        """
+        self._queue.put(frame)
+        self.frames += 1
+        self.shape = frame.shape
+
+    def _run(self) -> None:
+        """Тело потока записи: пишет кадры, пока не придёт None."""
+        index = 0
+        while True:
+            frame = self._queue.get()
+            if frame is None:
+                return
+            if self.error is not None:
+                continue
+            try:
+                self._save(frame, index)
+            except OSError as error:
+                self.error = error
+            index += 1
+
+    def _save(self, frame: np.ndarray, index: int) -> None:
+        """Записывает один кадр."""
+        if self._file is not None:
+            self._file.write(frame.tobytes())
+        else:
+            pygame.image.save(
+                pygame.surfarray.make_surface(frame.transpose(1, 0, 2)),
+                str(self.path / f'{index:06d}.png'),
+            )
+
+    def close(self) -> None:
+        """Дожидается записи всех кадров и закрывает поток.
+
+        Raises:
+            OSError: Если кадр не удалось записать.
+        """
+        self._queue.put(None)
+        self._thread.join()
+        if self._file is not None:
+            self._file.close()
+        if self.error is not None:
+            raise self.error
+
+    def __enter__(self) -> 'FrameWriter':
+        """Возвращает сам писатель для блока `with`."""
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """Дописывает кадры и закрывает поток."""
+        self.close()
+
+
+class EngineCanvas:
+    """Поверхность, на которой рисуется состояние `SnakeEngine`.
+
+    Клетки рисуются спрайтами `the_snake.cell_sprites`, как в окне, а
+    поле занимает всю поверхность.
+
+    Attributes:
+        surface (pygame.Surface): Поверхность кадра.
+    """
+
+    def __init__(self, width: int, height: int) -> None:
+        """Создаёт поверхность для поля `width` x `height` клеток."""
+        size = the_snake.GRID_SIZE
+        self.width = width
+        self.surface = pygame.Surface(
+            (width * size, height * size), 0, 24, the_snake.OFFSCREEN_MASKS
+        )
+        sprites = the_snake.cell_sprites
+        self.snake = sprites.get(the_snake.SNAKE_COLOR)
+        self.apple = sprites.get(the_snake.APPLE_COLOR)
+        self.rock = sprites.get(the_snake.ROCKET_COLOR)
+
+    def position(self, cell: int) -> tuple:
+        """Возвращает координаты клетки на поверхности."""
+        size = the_snake.GRID_SIZE
+        return cell % self.width * size, cell // self.width * size
+
+    def draw(self, state) -> pygame.Surface:
+        """Рисует поле состояния `state` целиком и возвращает поверхность."""
+        position = self.position
+        self.surface.fill(the_snake.BOARD_BACKGROUND_COLOR)
+        blits = [(self.snake, position(cell)) for cell in state.positions]
+        blits += [(self.rock, position(cell)) for cell in state.rocks]
+        if state.apple is not None:
+            blits.append((self.apple, position(state.apple)))
+        self.surface.blits(blits, doreturn=False)
+        return self.surface
+
+
+def capture_replay(replay: Replay, writer: FrameWriter,
+                   every: int = 1) -> None:
+    """Проигрывает реплей без окна и пишет каждый `every`-й кадр.
+
+    Партии окна рисуются самой игрой на поверхность в памяти, партии
+    движка - `EngineCanvas`.
+
+    Args:
+        replay (Replay): Реплей партии окна или движка.
+        writer (FrameWriter): Куда писать кадры.
+        every (int): Записывать кадр раз в столько ходов.
+    """
+    ticks = 0
+
+    def on_frame(surface: pygame.Surface) -> None:
+        nonlocal ticks
+        if ticks % every == 0:
+            writer.write(grab(surface))
+        ticks += 1
+
+    def on_step(engine, reward: int, done: bool) -> None:
+        nonlocal ticks
+        # Пропущенные кадры движка не рисуются вовсе.
+        if ticks % every == 0:
+            writer.write(grab(canvas.draw(engine.state)))
+        ticks += 1
+
+    if replay.rules == RULES_GAME:
+        the_snake.open_offscreen()
+        the_snake.play_replay(replay, on_frame)
+    else:
+        canvas = EngineCanvas(replay.width, replay.height)
+        replay.play(on_step)
+
+
+def main() -> None:
+    """Записывает кадры реплеев из командной строки."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('output', help='каталог для кадров')
+    parser.add_argument('replays', nargs='+')
+    parser.add_argument('--format', choices=FORMATS, default='raw')
+    parser.add_argument(
+        '--every', type=int, default=1, help='записывать кадр раз в N ходов'
+    )
+    args = parser.parse_args()
+    output = Path(args.output)
+    for path in args.replays:
+        replay = Replay.load(path)
+        name = Path(path).stem
+        target = output / (f'{name}.rgb' if args.format == 'raw' else name)
+        started = perf_counter()
+        with FrameWriter(target, args.format) as writer:
+            capture_replay(replay, writer, args.every)
+        seconds = perf_counter() - started
+        height, width, _ = writer.shape or (0, 0, 0)
+        print(f'{path}: кадров {writer.frames} ({width}x{height}), '
+              f'{writer.frames / max(seconds, 1e-9):,.0f} кадров/с -> '
+              f'{os.fspath(target)}')
+
+
+if __name__ == '__main__':
+    main()
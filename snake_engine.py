@@ -0,0 +1,745 @@
+"""Безголовое ядро симуляции игры «Змейка».
+
+Модуль повторяет правила из `the_snake` (движение с переходом через край
+поля, рост после яблока, камень каждые 3 яблока, столкновения с телом и
+камнями), но не импортирует pygame и ничего не рисует. Клетки поля
+хранятся как целые числа `y * width + x`.
+"""
+from array import array
+from functools import lru_cache
+from itertools import islice
+from random import Random, getrandbits
+
+# Размеры поля в клетках по умолчанию (как у окна 640x480 с клеткой 20):
+GRID_WIDTH = 32
+GRID_HEIGHT = 24
+
+# Направления движения:
+UP = (0, -1)
+DOWN = (0, 1)
+LEFT = (-1, 0)
+RIGHT = (1, 0)
+DIRECTIONS = [UP, DOWN, LEFT, RIGHT]
+OPPOSITE = {UP: DOWN, DOWN: UP, LEFT: RIGHT, RIGHT: LEFT}
+
+# С какого числа клеток поля тело змейки хранится упакованным
+# (`PackedSnakeBody`): ход на нём примерно на 0,5 мкс дороже, зато кольцо
+# `SnakeBody` на таком поле занимало бы больше 4 МБ:
+PACKED_BODY_CELLS = 1 << 20
+
+# Каждое какое яблоко порождает камень:
+ROCK_EVERY = 3
+
+# Награды за шаг:
+REWARD_APPLE = 1
+REWARD_DEATH = -1
+
+
+@lru_cache(maxsize=8)
+def neighbour_table(width: int, height: int) -> dict:
+    """Возвращает соседей всех клеток поля с переходом через край.
+
+    Таблица строится один раз на размер поля срезами массивов, без цикла
+    по клеткам, и заменяет в горячем цикле арифметику с делением по
+    модулю: сосед клетки - `table[direction][cell]`. Таблицу нельзя
+    изменять: она общая для всех партий такого размера.
+
+    Returns:
+        dict: {направление: array('i') соседей по номеру клетки}.
+    """
+    count = width * height
+    left, right = array('i'), array('i')
+    for row in range(0, count, width):
+        left.append(row + width - 1)
+        left.extend(range(row, row + width - 1))
+        right.extend(range(row + 1, row + width))
+        right.append(row)
+    return {
+        UP: array('i', range(count - width, count))
+        + array('i', range(count - width)),
+        DOWN: array('i', range(width, count)) + array('i', range(width)),
+        LEFT: left,
+        RIGHT: right,
+    }
+
+
+class SnakeBody:
+    """Тело змейки на клетках `0..size-1` с операциями за O(1).
+
+    Сегменты хранятся в кольцевом буфере `array('i')` (голова первая), а
+    число сегментов в каждой клетке - в `bytearray`, поэтому проверка
+    `cell in body` не зависит от длины змейки, а снимок тела - это копия
+    двух буферов. Счётчик нужен, потому что при поедании яблока
+    `the_snake` временно дублирует клетку в хвосте.
+    """
+
+    __slots__ = ('_ring', '_counts', '_capacity', '_head', '_length')
+
+    def __init__(self, size: int, segments=()) -> None:
+        """Создаёт тело из перечня сегментов, голова первая.
+
+        Args:
+            size (int): Число клеток поля.
+            segments (iterable): Начальные сегменты змейки.
+        """
+        # Запасная ячейка - для дубля хвоста на заполненном поле:
+        self._capacity = size + 1
+        self._ring = array('i', [0]) * self._capacity
+        self._counts = bytearray(size)
+        self._head = 0
+        self._length = 0
+        for segment in segments:
+            self.append(segment)
+
+    def __len__(self) -> int:
+        """Возвращает число сегментов."""
+        return self._length
+
+    def __iter__(self):
+        """Перебирает сегменты от головы к хвосту."""
+        ring, head, capacity = self._ring, self._head, self._capacity
+        for index in range(head, head + self._length):
+            yield ring[index % capacity]
+
+    def __contains__(self, segment: int) -> bool:
+        """Проверяет за O(1), занята ли клетка змейкой."""
+        return segment is not None and self._counts[segment] > 0
+
+    def count(self, segment: int) -> int:
+        """Возвращает за O(1), сколько сегментов лежит в клетке."""
+        return self._counts[segment]
+
+    def __getitem__(self, index: int) -> int:
+        """Возвращает сегмент по индексу; отрицательные - от хвоста."""
+        if index == 0 and self._length:
+            return self._ring[self._head]
+        if not -self._length <= index < self._length:
+            raise IndexError('Индекс вне тела змейки.')
+        return self._ring[(self._head + index % self._length) % self._capacity]
+
+    def __repr__(self) -> str:
+        """Возвращает представление в виде списка сегментов."""
+        return f'{type(self).__name__}({list(self)!r})'
+
+    def push_head(self, segment: int) -> None:
+        """Добавляет новую голову."""
+        self._head = head = (self._head - 1) % self._capacity
+        self._ring[head] = segment
+        self._counts[segment] += 1
+        self._length += 1
+
+    def pop_head(self) -> int:
+        """Удаляет и возвращает голову, например при отмене хода."""
+        segment = self._ring[self._head]
+        self._head = (self._head + 1) % self._capacity
+        self._counts[segment] -= 1
+        self._length -= 1
+        return segment
+
+    def append(self, segment: int) -> None:
+        """Добавляет сегмент в хвост."""
+        self._ring[(self._head + self._length) % self._capacity] = segment
+        self._counts[segment] += 1
+        self._length += 1
+
+    def pop_tail(self) -> int:
+        """Удаляет и возвращает хвостовой сегмент."""
+        self._length = length = self._length - 1
+        segment = self._ring[(self._head + length) % self._capacity]
+        self._counts[segment] -= 1
+        return segment
+
+    def clear(self) -> None:
+        """Удаляет все сегменты."""
+        for segment in self:
+            self._counts[segment] = 0
+        self._head = self._length = 0
+
+    def snapshot(self) -> tuple:
+        """Возвращает копию тела: два буфера и два индекса."""
+        return self._ring[:], self._counts[:], self._head, self._length
+
+    def restore(self, snapshot: tuple) -> None:
+        """Возвращает тело к снимку `snapshot` без новых выделений памяти."""
+        ring, counts, self._head, self._length = snapshot
+        self._ring[:] = ring
+        self._counts[:] = counts
+
+
+class PackedSnakeBody:
+    """Тело змейки для больших полей: голова и 2 бита на сегмент.
+
+    Клетка каждого сегмента, кроме головы, задаётся направлением от
+    соседнего сегмента. Направления упакованы по четыре в байт кольцевого
+    `bytearray`, который растёт вдвое вместе со змейкой, поэтому сегмент
+    стоит 2 бита, а не 4 байта кольца `SnakeBody` на каждую клетку поля,
+    и снимок тела - это копия четверти байта на сегмент. Клетки
+    сегментов вычисляются только при переборе; голова и хвост известны
+    всегда, поэтому ход змейки - O(1).
+
+    Сегменты, соседние в теле, но не на поле (дубль головы в хвосте
+    после яблока в `the_snake`), хранятся явно в небольшом словаре.
+    Интерфейс тот же, что у `SnakeBody`, включая проверку `cell in body`
+    за O(1) по числу сегментов в каждой клетке.
+    """
+
+    __slots__ = (
+        '_neighbours', '_codes', '_links', '_cells', '_counts', '_first',
+        '_head', '_tail', '_length',
+    )
+
+    def __init__(self, width: int, height: int, segments=()) -> None:
+        """Создаёт тело из перечня сегментов, голова первая.
+
+        Args:
+            width (int): Ширина поля в клетках.
+            height (int): Высота поля в клетках.
+            segments (iterable): Начальные сегменты змейки.
+        """
+        table = neighbour_table(width, height)
+        # Соседи по коду направления - индексу в `DIRECTIONS`:
+        self._neighbours = [table[direction] for direction in DIRECTIONS]
+        # Разность номеров соседних клеток -> код направления; у края
+        # поля разность другая, поэтому код проверяется по таблице.
+        self._codes = {}
+        for code, neighbours in enumerate(self._neighbours):
+            for cell in (0, width * height - 1):
+                self._codes.setdefault(neighbours[cell] - cell, code)
+        self._counts = bytearray(width * height)
+        self._links = bytearray(4)
+        # Номер сегмента -> клетка, если её нельзя вывести из соседа:
+        self._cells = {}
+        # Номер головы; номера сегментов растут к хвосту, связь `k`
+        # ведёт от сегмента `k` к сегменту `k + 1`.
+        self._first = 0
+        self._head = self._tail = None
+        self._length = 0
+        for segment in segments:
+            self.append(segment)
+
+    def __len__(self) -> int:
+        """Возвращает число сегментов."""
+        return self._length
+
+    def __iter__(self):
+        """Перебирает сегменты от головы к хвосту, вычисляя их клетки."""
+        if not self._length:
+            return
+        links, cells, neighbours = self._links, self._cells, self._neighbours
+        capacity = len(links) * 4
+        cell = self._head
+        yield cell
+        for index in range(self._first, self._first + self._length - 1):
+            if cells and index + 1 in cells:
+                cell = cells[index + 1]
+            else:
+                slot = index % capacity
+                code = links[slot >> 2] >> (slot & 3) * 2 & 3
+                cell = neighbours[code][cell]
+            yield cell
+
+    def __contains__(self, segment: int) -> bool:
+        """Проверяет за O(1), занята ли клетка змейкой."""
+        return segment is not None and self._counts[segment] > 0
+
+    def count(self, segment: int) -> int:
+        """Возвращает за O(1), сколько сегментов лежит в клетке."""
+        return self._counts[segment]
+
+    def __getitem__(self, index: int) -> int:
+        """Возвращает сегмент по индексу; голова и хвост - за O(1)."""
+        if not -self._length <= index < self._length:
+            raise IndexError('Индекс вне тела змейки.')
+        index %= self._length
+        if index == 0:
+            return self._head
+        if index == self._length - 1:
+            return self._tail
+        return next(islice(self, index, None))
+
+    def __repr__(self) -> str:
+        """Возвращает представление в виде списка сегментов."""
+        return f'{type(self).__name__}({list(self)!r})'
+
+    @property
+    def nbytes(self) -> int:
+        """Память сегментов в байтах, без счётчика клеток поля."""
+        return len(self._links) + 16 * len(self._cells)
+
+    def _link(self, index: int) -> int:
+        """Возвращает код направления связи `index`."""
+        slot = index % (len(self._links) * 4)
+        return self._links[slot >> 2] >> (slot & 3) * 2 & 3
+
+    def _connect(self, index: int, cell: int, following: int) -> None:
+        """Записывает связь `index` от клетки `cell` к клетке `following`.
+
+        Если клетки не соседи на поле, обе запоминаются явно.
+        """
+        code = self._codes.get(following - cell)
+        if code is None or self._neighbours[code][cell] != following:
+            for code, table in enumerate(self._neighbours):
+                if table[cell] == following:
+                    break
+            else:
+                code = 0
+                self._cells[index] = cell
+                self._cells[index + 1] = following
+        slot = index % (len(self._links) * 4)
+        shift = (slot & 3) * 2
+        byte = self._links[slot >> 2]
+        self._links[slot >> 2] = byte & ~(3 << shift) | code << shift
+
+    def _grow(self) -> None:
+        """Удваивает кольцо связей, сохраняя номера сегментов."""
+        codes = [
+            self._link(index)
+            for index in range(self._first, self._first + self._length - 1)
+        ]
+        self._links = bytearray(len(self._links) * 2)
+        capacity = len(self._links) * 4
+        for index, code in enumerate(codes, self._first):
+            slot = index % capacity
+            self._links[slot >> 2] |= code << (slot & 3) * 2
+
+    def push_head(self, segment: int) -> None:
+        """Добавляет новую голову."""
+        if self._length > len(self._links) * 4:
+            self._grow()
+        if self._length:
+            self._first = first = self._first - 1
+            head, links = self._head, self._links
+            code = self._codes.get(head - segment)
+            if code is None or self._neighbours[code][segment] != head:
+                self._connect(first, segment, head)
+            else:
+                # То же, что `_connect`, без вызова: это горячий путь хода.
+                slot = first % (len(links) * 4)
+                shift = (slot & 3) * 2
+                links[slot >> 2] = (
+                    links[slot >> 2] & ~(3 << shift) | code << shift
+                )
+        else:
+            self._tail = segment
+        self._head = segment
+        self._counts[segment] += 1
+        self._length += 1
+
+    def pop_head(self) -> int:
+        """Удаляет и возвращает голову, например при отмене хода."""
+        segment = self._head
+        self._cells.pop(self._first, None)
+        self._first += 1
+        self._length -= 1
+        self._counts[segment] -= 1
+        if self._length:
+            cell = self._cells.get(self._first)
+            if cell is None:
+                code = self._link(self._first - 1)
+                cell = self._neighbours[code][segment]
+            self._head = cell
+        return segment
+
+    def append(self, segment: int) -> None:
+        """Добавляет сегмент в хвост."""
+        if self._length > len(self._links) * 4:
+            self._grow()
+        if self._length:
+            self._connect(self._first + self._length - 1, self._tail, segment)
+        else:
+            self._head = segment
+        self._tail = segment
+        self._counts[segment] += 1
+        self._length += 1
+
+    def pop_tail(self) -> int:
+        """Удаляет и возвращает хвостовой сегмент."""
+        segment = self._tail
+        self._length = length = self._length - 1
+        last = self._first + length
+        cells = self._cells
+        if cells:
+            cells.pop(last, None)
+        self._counts[segment] -= 1
+        if length:
+            if cells and last - 1 in cells:
+                self._tail = cells[last - 1]
+            else:
+                links = self._links
+                slot = (last - 1) % (len(links) * 4)
+                # Противоположные направления отличаются младшим битом.
+                code = links[slot >> 2] >> (slot & 3) * 2 & 3 ^ 1
+                self._tail = self._neighbours[code][segment]
+        return segment
+
+    def clear(self) -> None:
+        """Удаляет все сегменты."""
+        for segment in self:
+            self._counts[segment] = 0
+        self._cells.clear()
+        self._first = self._length = 0
+        self._head = self._tail = None
+
+    def snapshot(self) -> tuple:
+        """Возвращает копию тела: упакованные связи и концы змейки."""
+        return (
+            self._links[:], dict(self._cells), self._first, self._head,
+            self._tail, self._length,
+        )
+
+    def restore(self, snapshot: tuple) -> None:
+        """Возвращает тело к снимку `snapshot` за O(длины змейки)."""
+        self.clear()
+        links, cells, self._first, self._head, self._tail, self._length = (
+            snapshot
+        )
+        self._links = links[:]
+        self._cells = dict(cells)
+        for segment in self:
+            self._counts[segment] += 1
+
+
+class FreeCells:
+    """Индекс свободных клеток поля с операциями за O(1).
+
+    Свободные клетки лежат плотным массивом `_cells`, а `_slots[cell]`
+    хранит место клетки в этом массиве (-1 для занятой). При занятии
+    клетки на её место переносится последний элемент массива, поэтому
+    случайный выбор всегда равномерен и не требует повторных попыток.
+    """
+
+    __slots__ = ('_cells', '_slots')
+
+    def __init__(self, count: int) -> None:
+        """Создаёт индекс, в котором свободны все `count` клеток."""
+        self._cells = array('i', range(count))
+        self._slots = array('i', range(count))
+
+    def __len__(self) -> int:
+        """Возвращает число свободных клеток."""
+        return len(self._cells)
+
+    def __contains__(self, cell: int) -> bool:
+        """Проверяет, свободна ли клетка."""
+        return self._slots[cell] >= 0
+
+    def take(self, cell: int) -> None:
+        """Помечает свободную клетку занятой."""
+        slot = self._slots[cell]
+        last = self._cells.pop()
+        if last != cell:
+            self._cells[slot] = last
+            self._slots[last] = slot
+        self._slots[cell] = -1
+
+    def release(self, cell: int) -> None:
+        """Помечает занятую клетку свободной."""
+        self._slots[cell] = len(self._cells)
+        self._cells.append(cell)
+
+    def sample(self, rng: Random) -> int:
+        """Возвращает случайную свободную клетку или None.
+
+        Args:
+            rng (Random): Генератор случайных чисел партии.
+        """
+        if not self._cells:
+            return None
+        return self._cells[rng.randrange(len(self._cells))]
+
+    def snapshot(self) -> tuple:
+        """Возвращает копию индекса: два буфера."""
+        return self._cells[:], self._slots[:]
+
+    def restore(self, snapshot: tuple) -> None:
+        """Возвращает индекс к снимку `snapshot`."""
+        cells, slots = snapshot
+        self._cells[:] = cells
+        self._slots[:] = slots
+
+
+class GameState:
+    """Состояние одной партии в плоских буферах на клетках поля.
+
+    Клетки - целые числа `y * width + x`, соседи берутся из общей
+    таблицы `neighbour_table`. Всё изменяемое состояние лежит в
+    нескольких массивах и скалярах, поэтому `snapshot` и `restore`
+    копируют буферы, а не граф объектов: так поиск с просмотром вперёд
+    может клонировать состояние миллионы раз.
+
+    Attributes:
+        width (int): Ширина поля в клетках.
+        height (int): Высота поля в клетках.
+        neighbours (dict): Таблица соседей, см. `neighbour_table`.
+        positions (SnakeBody): Клетки змейки, голова первая; на полях от
+            `PACKED_BODY_CELLS` клеток - `PackedSnakeBody`.
+        free (FreeCells): Клетки, не занятые змейкой, яблоком и камнями.
+        rocks (array): Клетки камней в порядке появления.
+        direction (tuple): Текущее направление движения.
+        apple (int): Клетка яблока.
+        growth (int): Сколько ходов хвост ещё не будет сдвигаться.
+        eaten (int): Яблоки, съеденные с последнего сброса.
+        ticks (int): Число сделанных шагов.
+        done (bool): Закончилась ли партия.
+        won (bool): Заполнила ли змейка всё поле.
+    """
+
+    __slots__ = (
+        'width', 'height', 'neighbours', 'positions', 'free', 'rocks',
+        'direction', 'apple', 'growth', 'eaten', 'ticks', 'done', 'won',
+    )
+
+    def __init__(self, width: int = GRID_WIDTH,
+                 height: int = GRID_HEIGHT) -> None:
+        """Создаёт пустое поле; партия заполняется в `SnakeEngine.start`."""
+        self.allocate(width, height)
+
+    def allocate(self, width: int, height: int) -> None:
+        """Выделяет буферы под поле заданного размера и очищает его."""
+        self.width = width
+        self.height = height
+        self.neighbours = neighbour_table(width, height)
+        if width * height >= PACKED_BODY_CELLS:
+            self.positions = PackedSnakeBody(width, height)
+        else:
+            self.positions = SnakeBody(width * height)
+        self.free = FreeCells(width * height)
+        self.rocks = array('i')
+        self.direction = RIGHT
+        self.apple = None
+        self.growth = 0
+        self.eaten = 0
+        self.ticks = 0
+        self.done = False
+        self.won = False
+
+    def snapshot(self) -> tuple:
+        """Возвращает копию состояния для `restore`."""
+        return (
+            self.positions.snapshot(), self.free.snapshot(), self.rocks[:],
+            self.direction, self.apple, self.growth, self.eaten,
+            self.ticks, self.done, self.won,
+        )
+
+    def restore(self, snapshot: tuple) -> None:
+        """Возвращает состояние к снимку того же поля."""
+        (
+            positions, free, rocks, self.direction, self.apple,
+            self.growth, self.eaten, self.ticks, self.done, self.won,
+        ) = snapshot
+        self.positions.restore(positions)
+        self.free.restore(free)
+        self.rocks[:] = rocks
+
+
+class SnakeEngine:
+    """Пошаговый движок игры без отрисовки.
+
+    Attributes:
+        width (int): Ширина поля в клетках.
+        height (int): Высота поля в клетках.
+        state (GameState): Текущее состояние партии.
+        seed (int): Зерно генератора; одинаковое зерно и одинаковые
+            действия дают одинаковую партию.
+        rng (Random): Собственный генератор случайных чисел движка.
+    """
+
+    def __init__(self, width: int = GRID_WIDTH,
+                 height: int = GRID_HEIGHT, seed: int = None) -> None:
+        """Создаёт движок и начинает первую партию.
+
+        Args:
+            width (int): Ширина поля в клетках.
+            height (int): Высота поля в клетках.
+            seed (int, optional): Зерно генератора; по умолчанию
+                выбирается случайно и сохраняется в `seed`.
+        """
+        self.width = width
+        self.height = height
+        self.seed = getrandbits(64) if seed is None else seed
+        self.rng = Random(self.seed)
+        self.state = GameState(width, height)
+        self.start(RIGHT)
+
+    @property
+    def free(self) -> FreeCells:
+        """Клетки, не занятые змейкой, яблоком и камнями."""
+        return self.state.free
+
+    def cell(self, x: int, y: int) -> int:
+        """Возвращает номер клетки по её координатам."""
+        return y * self.width + x
+
+    def coords(self, cell: int) -> tuple:
+        """Возвращает координаты (x, y) клетки по её номеру."""
+        return cell % self.width, cell // self.width
+
+    def neighbour(self, cell: int, direct: tuple) -> int:
+        """Возвращает соседнюю клетку с переходом через край поля.
+
+        Args:
+            cell (int): Исходная клетка.
+            direct (tuple): Направление движения.
+
+        Returns:
+            int: Номер соседней клетки.
+        """
+        return self.state.neighbours[direct][cell]
+
+    def get_head_position(self) -> int:
+        """Возвращает клетку головы змейки."""
+        return self.state.positions[0]
+
+    def snapshot(self) -> tuple:
+        """Возвращает копию состояния партии и генератора случайных чисел.
+
+        Снимок не зависит от дальнейших ходов; его можно восстановить
+        сколько угодно раз, например при поиске с просмотром вперёд.
+        """
+        return self.state.snapshot(), self.rng.getstate()
+
+    def restore(self, snapshot: tuple) -> GameState:
+        """Возвращает партию к снимку `snapshot`.
+
+        Returns:
+            GameState: Восстановленное состояние (тот же объект `state`).
+        """
+        state, rng = snapshot
+        self.state.restore(state)
+        self.rng.setstate(rng)
+        return self.state
+
+    def reset(self) -> GameState:
+        """Сбрасывает партию, как `Snake.reset`: случайное направление.
+
+        Returns:
+            GameState: Новое состояние.
+        """
+        return self.start(self.rng.choice(DIRECTIONS))
+
+    def start(self, direction: tuple) -> GameState:
+        """Начинает новую партию: змейка длины 1 в центре поля.
+
+        Args:
+            direction (tuple): Начальное направление движения.
+
+        Returns:
+            GameState: Новое состояние.
+        """
+        state = self.state
+        self.clear_board()
+        head = self.cell(self.width // 2, self.height // 2)
+        self.free.take(head)
+        state.positions.push_head(head)
+        state.direction = direction
+        state.growth = 0
+        state.eaten = 0
+        state.ticks = 0
+        state.done = False
+        state.won = False
+        state.apple = self.spawn()
+        return state
+
+    def clear_board(self) -> None:
+        """Убирает с поля змейку, яблоко и камни, освобождая их клетки."""
+        state = self.state
+        free = self.free
+        for cell in state.positions:
+            free.release(cell)
+        for cell in state.rocks:
+            free.release(cell)
+        if state.apple is not None:
+            free.release(state.apple)
+        state.positions.clear()
+        del state.rocks[:]
+        state.apple = None
+
+    def place(self, positions, apple: int, rocks=()) -> None:
+        """Расставляет на поле заданные змейку, яблоко и камни.
+
+        Нужна для тестов, замеров и восстановления сохранённых партий.
+
+        Args:
+            positions (iterable): Клетки змейки, голова первая.
+            apple (int): Клетка яблока.
+            rocks (iterable): Клетки камней.
+        """
+        state = self.state
+        positions, rocks = list(positions), list(rocks)
+        self.clear_board()
+        for cell in positions:
+            self.free.take(cell)
+            state.positions.append(cell)
+        for cell in rocks:
+            self.free.take(cell)
+            state.rocks.append(cell)
+        self.free.take(apple)
+        state.apple = apple
+
+    def is_free(self, cell: int) -> bool:
+        """Проверяет, что клетка не занята змейкой, яблоком или камнем."""
+        return cell in self.state.free
+
+    def spawn(self) -> int:
+        """Занимает случайную свободную клетку и возвращает её.
+
+        Returns:
+            int: Номер клетки или None, если свободных клеток нет.
+        """
+        cell = self.free.sample(self.rng)
+        if cell is not None:
+            self.free.take(cell)
+        return cell
+
+    def step(self, action: tuple = None) -> tuple:
+        """Делает один ход игры.
+
+        Разворот на 180 градусов игнорируется, как и в `handle_keys`.
+
+        Args:
+            action (tuple, optional): Новое направление или None,
+                чтобы продолжить движение прямо.
+
+        Returns:
+            tuple: (state, reward, done) после хода. Партия также
+                заканчивается победой, когда яблоку не осталось места.
+
+        Raises:
+            RuntimeError: Если партия уже закончена и не была сброшена.
+        """
+        state = self.state
+        if state.done:
+            raise RuntimeError('Партия закончена, вызовите reset().')
+        if action is not None and action != OPPOSITE[state.direction]:
+            state.direction = action
+        state.ticks += 1
+        positions = state.positions
+        free = state.free
+        head = state.neighbours[state.direction][positions[0]]
+        if head in positions:
+            dead = len(positions) != 1
+        else:
+            # Занятая клетка не змейки и не яблока - камень.
+            dead = head != state.apple and head not in free
+        if dead:
+            state.done = True
+            return state, REWARD_DEATH, True
+        if state.growth:
+            state.growth -= 1
+        else:
+            free.release(positions.pop_tail())
+        positions.push_head(head)
+        if head != state.apple:
+            free.take(head)
+            return state, 0, False
+        state.eaten += 1
+        state.growth += 1
+        state.apple = self.spawn()
+        if state.apple is None:
+            state.done = state.won = True
+            return state, REWARD_APPLE, True
+        if state.eaten % ROCK_EVERY == 0:
+            rock = self.spawn()
+            if rock is not None:
+                state.rocks.append(rock)
+        return state, REWARD_APPLE, False
@@ -0,0 +1,300 @@
+"""Потоковая запись ходов партий в столбцовые двоичные файлы.
+
+Журнал - каталог, в котором у каждого столбца свой файл из записей
+фиксированной ширины, и `meta.json` с размером поля и типами столбцов:
+
+- `episode` (uint32) - номер партии в журнале;
+- `tick` (uint32) - номер хода в партии, с 1;
+- `head` (int32) - клетка головы после хода;
+- `action` (int8) - направление хода, индекс в `DIRECTIONS`;
+- `apple` (int32) - клетка яблока после хода, -1 - яблока нет;
+- `events` (uint8) - флаги событий хода: `EAT`, `ROCK`, `DEATH`, `WIN`.
+
+`EpisodeWriter` копит ходы в массивах `array` и дописывает их в файлы
+блоками, поэтому ход стоит несколько добавлений в массив. `EpisodeLog`
+читает столбцы через `np.memmap`: данные не копируются и не грузятся в
+память целиком, так что журнал на сотни миллионов ходов читается
+как обычные массивы NumPy.
+
+Запись реплеев движка: `python snake_episodes.py record ЖУРНАЛ *.snkr`,
+сводка: `python snake_episodes.py summary ЖУРНАЛ`.
+"""
+import argparse
+import json
+import os
+import sys
+from array import array
+from pathlib import Path
+
+import numpy as np
+
+from snake_engine import DIRECTIONS, REWARD_APPLE, SnakeEngine
+from snake_replay import Replay
+
+VERSION = 1
+
+# Столбцы: имя -> (код типа `array`, тип NumPy без порядка байт):
+COLUMNS = {
+    'episode': ('I', 'u4'),
+    'tick': ('I', 'u4'),
+    'head': ('i', 'i4'),
+    'action': ('b', 'i1'),
+    'apple': ('i', 'i4'),
+    'events': ('B', 'u1'),
+}
+
+# Флаги столбца `events`:
+EAT = 1
+ROCK = 2
+DEATH = 4
+WIN = 8
+
+# Сколько ходов копится в памяти перед записью в файлы:
+CHUNK = 1 << 16
+
+# Индекс направления в `DIRECTIONS`:
+DIRECTION_CODES = {direct: code for code, direct in enumerate(DIRECTIONS)}
+
+
+class EpisodeWriter:
+    """Дописывает ходы партий в журнал.
+
+    Если журнал уже есть, запись продолжается с новой партии. Столбцы
+    разной длины (например, после аварийного завершения) обрезаются по
+    самому короткому.
+
+    Attributes:
+        path (Path): Каталог журнала.
+        width (int): Ширина поля в клетках.
+        height (int): Высота поля в клетках.
+        ticks (int): Число ходов в журнале, включая ещё не записанные.
+        episode (int): Номер текущей партии.
+    """
+
+    def __init__(self, path, width: int, height: int,
+                 chunk: int = CHUNK) -> None:
+        """Открывает журнал на дозапись или создаёт новый.
+
+        Raises:
+            ValueError: Если журнал записан для поля другого размера или
+                в другом формате.
+        """
+        self.path = Path(path)
+        self.width = width
+        self.height = height
+        self.chunk = chunk
+        self.path.mkdir(parents=True, exist_ok=True)
+        meta_path = self.path / 'meta.json'
+        meta = {
+            'version': VERSION, 'width': width, 'height': height,
+            'byteorder': sys.byteorder,
+            'columns': {name: dtype for name, (_, dtype) in COLUMNS.items()},
+        }
+        if meta_path.exists():
+            saved = json.loads(meta_path.read_text(encoding='utf-8'))
+            if saved != meta:
+                raise ValueError(
+                    f'Журнал {self.path} записан в другом формате или для '
+                    'поля другого размера.'
+                )
+        else:
+            meta_path.write_text(json.dumps(meta), encoding='utf-8')
+        self.ticks = self._repair()
+        self.episode = self._last_episode() + 1 if self.ticks else 0
+        self._columns = {
+            name: array(typecode) for name, (typecode, _) in COLUMNS.items()
+        }
+        self._files = {
+            name: open(self.path / f'{name}.bin', 'ab') for name in COLUMNS
+        }
+        self._rocks = 0
+        # Есть ли ходы у текущей партии:
+        self._started = False
+
+    def _repair(self) -> int:
+        """Обрезает столбцы по самому короткому и возвращает число ходов."""
+        ticks = None
+        for name, (typecode, _) in COLUMNS.items():
+            column = self.path / f'{name}.bin'
+            column.touch()
+            rows = column.stat().st_size // array(typecode).itemsize
+            ticks = rows if ticks is None else min(ticks, rows)
+        for name, (typecode, _) in COLUMNS.items():
+            os.truncate(
+                self.path / f'{name}.bin', ticks * array(typecode).itemsize
+            )
+        return ticks
+
+    def _last_episode(self) -> int:
+        """Читает номер последней записанной партии."""
+        episodes = array(COLUMNS['episode'][0])
+        with open(self.path / 'episode.bin', 'rb') as file:
+            file.seek(-episodes.itemsize, os.SEEK_END)
+            episodes.fromfile(file, 1)
+        return episodes[0]
+
+    def append(self, tick: int, head: int, action: int, apple: int,
+               events: int) -> None:
+        """Дописывает ход текущей партии.
+
+        После хода с флагом `DEATH` или `WIN` следующий ход относится к
+        новой партии.
+        """
+        columns = self._columns
+        columns['episode'].append(self.episode)
+        columns['tick'].append(tick)
+        columns['head'].append(head)
+        columns['action'].append(action)
+        columns['apple'].append(apple)
+        columns['events'].append(events)
+        self.ticks += 1
+        self._started = not events & (DEATH | WIN)
+        if not self._started:
+            self.episode += 1
+        if len(columns['tick']) >= self.chunk:
+            self.flush()
+
+    def end_episode(self) -> None:
+        """Начинает новую партию, если текущая прервана без конца игры.
+
+        Нужна, когда партию обрывает предел ходов: у прерванной партии
+        нет хода с флагом `DEATH` или `WIN`.
+        """
+        if self._started:
+            self.episode += 1
+            self._started = False
+        self._rocks = 0
+
+    def record(self, engine: SnakeEngine, reward: int, done: bool) -> None:
+        """Дописывает ход, только что сделанный движком.
+
+        Подходит как `on_step` для `Replay.play`. Новые камни
+        определяются по росту `state.rocks` с прошлого хода.
+        """
+        state = engine.state
+        events = 0
+        if reward == REWARD_APPLE:
+            events |= EAT
+        if len(state.rocks) > self._rocks:
+            events |= ROCK
+        if done:
+            events |= WIN if state.won else DEATH
+            self._rocks = 0
+        else:
+            self._rocks = len(state.rocks)
+        self.append(
+            state.ticks, state.positions[0],
+            DIRECTION_CODES[state.direction],
+            -1 if state.apple is None else state.apple, events,
+        )
+
+    def flush(self) -> None:
+        """Записывает накопленные ходы в файлы столбцов."""
+        for name, column in self._columns.items():
+            file = self._files[name]
+            column.tofile(file)
+            file.flush()
+            del column[:]
+
+    def close(self) -> None:
+        """Записывает остаток и закрывает файлы."""
+        self.flush()
+        for file in self._files.values():
+            file.close()
+
+    def __enter__(self) -> 'EpisodeWriter':
+        """Возвращает сам журнал для блока `with`."""
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """Закрывает журнал."""
+        self.close()
+
+
+class EpisodeLog:
+    """Журнал ходов только для чтения, отображённый в память.
+
+    Attributes:
+        path (Path): Каталог журнала.
+        width (int): Ширина поля в клетках.
+        height (int): Высота поля в клетках.
+        columns (dict): Столбцы в виде `np.memmap` (пустой столбец -
+            пустой массив).
+    """
+
+    def __init__(self, path) -> None:
+        """Открывает журнал.
+
+        Raises:
+            ValueError: Если версия журнала не поддерживается.
+        """
+        self.path = Path(path)
+        meta = json.loads(
+            (self.path / 'meta.json').read_text(encoding='utf-8')
+        )
+        if meta['version'] != VERSION:
+            raise ValueError(f'Неизвестная версия журнала: {meta["version"]}')
+        self.width = meta['width']
+        self.height = meta['height']
+        order = '<' if meta['byteorder'] == 'little' else '>'
+        self.columns = {}
+        for name, dtype in meta['columns'].items():
+            dtype = np.dtype(order + dtype)
+            column = self.path / f'{name}.bin'
+            rows = column.stat().st_size // dtype.itemsize
+            self.columns[name] = (
+                np.memmap(column, dtype, mode='r', shape=(rows,))
+                if rows else np.empty(0, dtype)
+            )
+        # Ходы, записанные во все столбцы:
+        self.ticks = min(len(column) for column in self.columns.values())
+
+    def __len__(self) -> int:
+        """Возвращает число ходов."""
+        return self.ticks
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        """Возвращает столбец `name` без копирования."""
+        return self.columns[name][:self.ticks]
+
+    def episode_ends(self) -> np.ndarray:
+        """Возвращает индексы последних ходов законченных партий."""
+        return np.flatnonzero(self['events'] & (DEATH | WIN))
+
+    def summary(self) -> dict:
+        """Возвращает сводку журнала."""
+        events = self['events']
+        ends = self.episode_ends()
+        return {
+            'ticks': self.ticks,
+            'episodes': len(ends),
+            'apples': int(np.count_nonzero(events & EAT)),
+            'rocks': int(np.count_nonzero(events & ROCK)),
+            'wins': int(np.count_nonzero(events & WIN)),
+            'mean_episode_ticks': float(self['tick'][ends].mean())
+            if len(ends) else None,
+        }
+
+
+def main() -> None:
+    """Записывает реплеи в журнал или печатает сводку журнала."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+    record = commands.add_parser('record', help='записать реплеи движка')
+    record.add_argument('log')
+    record.add_argument('replays', nargs='+')
+    summary = commands.add_parser('summary', help='сводка журнала')
+    summary.add_argument('log')
+    args = parser.parse_args()
+
+    if args.command == 'record':
+        for path in args.replays:
+            replay = Replay.load(path)
+            with EpisodeWriter(args.log, replay.width, replay.height) as log:
+                replay.play(log.record)
+    for name, value in EpisodeLog(args.log).summary().items():
+        print(f'{name}: {value}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+"""Поле «Змейки» в виде плоскостей NumPy для обучения агентов.
+
+`Observation` держит каналы (тело, голова, яблоко, камни и, по желанию,
+направление головы) в одном заранее выделенном массиве формы
+(каналы, высота, ширина) и меняет в нём только клетки, изменившиеся за
+ход: новую голову, освободившийся хвост, новое яблоко или камень.
+Поэтому ход стоит несколько присваиваний, а не O(длины змейки) и
+новый массив, как при сборке поля заново.
+
+Массив можно передать снаружи (`out`), например строку пакета
+`batch[i]`, - тогда наблюдения сразу лежат в тензоре для обучения, без
+копирования.
+"""
+import numpy as np
+
+from snake_engine import DIRECTIONS, GameState
+
+# Каналы плоскостей:
+BODY = 0
+HEAD = 1
+APPLE = 2
+ROCK = 3
+CHANNELS = 4
+
+# Первый канал направления; за ним каналы остальных направлений в
+# порядке `DIRECTIONS`, единица только в клетке головы:
+DIRECTION = CHANNELS
+
+# Индекс направления в `DIRECTIONS`:
+DIRECTION_CODES = {direct: code for code, direct in enumerate(DIRECTIONS)}
+
+
+class Observation:
+    """Плоскости поля, которые обновляются по изменениям хода.
+
+    Методы принимают клетки в виде номеров `y * width + x`, как
+    `GameState`.
+
+    Attributes:
+        width (int): Ширина поля в клетках.
+        height (int): Высота поля в клетках.
+        directions (bool): Есть ли каналы направления.
+        planes (np.ndarray): Каналы формы (каналы, высота, ширина).
+        head (int): Клетка головы или None.
+        direction (int): Индекс направления головы в `DIRECTIONS`.
+        apple (int): Клетка яблока или None.
+    """
+
+    def __init__(self, width: int, height: int, directions: bool = False,
+                 dtype=np.float32, out: np.ndarray = None) -> None:
+        """Выделяет плоскости или берёт готовый массив `out`.
+
+        Args:
+            width (int): Ширина поля в клетках.
+            height (int): Высота поля в клетках.
+            directions (bool): Добавить каналы направления головы.
+            dtype: Тип элементов новых плоскостей.
+            out (np.ndarray, optional): Непрерывный массив нужной формы,
+                в котором будут лежать плоскости.
+
+        Raises:
+            ValueError: Если `out` не той формы или не непрерывный.
+        """
+        self.directions = directions
+        self.out = out
+        self._allocate(width, height, dtype)
+
+    def _allocate(self, width: int, height: int, dtype) -> None:
+        """Заводит пустые плоскости для поля `width` x `height`."""
+        channels = CHANNELS + (len(DIRECTIONS) if self.directions else 0)
+        shape = (channels, height, width)
+        planes = self.out
+        if planes is None:
+            planes = np.zeros(shape, dtype)
+        elif planes.shape != shape or not planes.flags.c_contiguous:
+            raise ValueError(
+                f'Нужен непрерывный массив формы {shape}, '
+                f'получен {planes.shape}.'
+            )
+        else:
+            planes.fill(0)
+        self.width = width
+        self.height = height
+        self.planes = planes
+        # Тот же массив, где клетка - один индекс:
+        self.cells = planes.reshape(channels, width * height)
+        self.size = width * height
+        # Плоский memoryview: присваивание одной клетки через него в
+        # несколько раз дешевле, чем через индекс массива NumPy.
+        self._flat = memoryview(planes).cast('B').cast(planes.dtype.char)
+        self.head = None
+        self.direction = None
+        self.apple = None
+
+    def resize(self, width: int, height: int) -> None:
+        """Очищает плоскости, при новом размере поля - выделяет заново.
+
+        Raises:
+            ValueError: Если размер другой, а плоскости лежат в `out`.
+        """
+        if (width, height) == (self.width, self.height):
+            self.clear()
+        else:
+            self._allocate(width, height, self.planes.dtype)
+
+    def clear(self) -> None:
+        """Очищает все плоскости."""
+        self.planes.fill(0)
+        self.head = self.direction = self.apple = None
+
+    def add_body(self, cell: int) -> None:
+        """Отмечает сегмент змейки в клетке `cell`."""
+        self._flat[BODY * self.size + cell] = 1
+
+    def remove_body(self, cell: int) -> None:
+        """Убирает сегмент змейки из клетки `cell`."""
+        self._flat[BODY * self.size + cell] = 0
+
+    def place_head(self, cell: int, direction: tuple) -> None:
+        """Переносит голову в клетку `cell` с направлением `direction`."""
+        flat, size = self._flat, self.size
+        if self.head is not None:
+            flat[HEAD * size + self.head] = 0
+            if self.directions:
+                flat[(DIRECTION + self.direction) * size + self.head] = 0
+        self.head = cell
+        self.direction = DIRECTION_CODES[direction]
+        flat[HEAD * size + cell] = 1
+        if self.directions:
+            flat[(DIRECTION + self.direction) * size + cell] = 1
+
+    def place_apple(self, cell: int) -> None:
+        """Переносит яблоко в клетку `cell`; None - яблока нет."""
+        if self.apple is not None:
+            self._flat[APPLE * self.size + self.apple] = 0
+        self.apple = cell
+        if cell is not None:
+            self._flat[APPLE * self.size + cell] = 1
+
+    def add_rock(self, cell: int) -> None:
+        """Отмечает камень в клетке `cell`."""
+        self._flat[ROCK * self.size + cell] = 1
+
+    def clear_rocks(self, cells) -> None:
+        """Убирает камни из клеток `cells`."""
+        self.cells[ROCK, np.asarray(cells, dtype=np.intp)] = 0
+
+    def rebuild(self, state: GameState) -> None:
+        """Собирает плоскости заново по состоянию партии `state`."""
+        self.resize(state.width, state.height)
+        positions = state.positions
+        if len(positions):
+            self.cells[BODY, np.fromiter(positions, np.intp)] = 1
+            self.place_head(positions[0], state.direction)
+        self.place_apple(state.apple)
+        self.cells[ROCK, np.asarray(state.rocks, dtype=np.intp)] = 1
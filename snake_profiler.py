@@ -0,0 +1,189 @@
+"""Замер времени фаз игрового цикла и выгрузка метрик.
+
+`PhaseProfiler` хранит последние `window` замеров каждой фазы и считает
+по ним скользящие процентили. `MetricsFile` периодически записывает их в
+локальный файл в формате JSON или текстовом формате Prometheus. Модуль не
+зависит от pygame.
+"""
+import json
+import os
+from collections import deque
+from contextlib import nullcontext
+from time import monotonic, perf_counter_ns, time
+
+# Сколько последних замеров каждой фазы учитывать:
+WINDOW = 600
+
+# Процентили, которые выгружаются в метрики:
+QUANTILES = (50, 90, 99)
+
+
+class PhaseTimer:
+    """Контекстный менеджер, замеряющий одну фазу.
+
+    Один объект на фазу переиспользуется в каждом кадре.
+    """
+
+    __slots__ = ('samples', 'stats', 'started')
+
+    def __init__(self, samples: deque, stats: list) -> None:
+        """Связывает таймер с окном замеров и счётчиками фазы."""
+        self.samples = samples
+        self.stats = stats
+        self.started = 0
+
+    def __enter__(self) -> None:
+        """Запоминает время начала фазы."""
+        self.started = perf_counter_ns()
+
+    def __exit__(self, *exc_info) -> None:
+        """Записывает длительность фазы."""
+        self.add(perf_counter_ns() - self.started)
+
+    def add(self, elapsed: int) -> None:
+        """Записывает готовый замер фазы в нс."""
+        self.samples.append(elapsed)
+        self.stats[0] += 1
+        self.stats[1] += elapsed
+
+
+class PhaseProfiler:
+    """Скользящая статистика длительности фаз.
+
+    Attributes:
+        window (int): Размер окна замеров каждой фазы.
+        samples (dict): Последние длительности каждой фазы в нс.
+        totals (dict): Для каждой фазы [число замеров, сумма в нс] за всё
+            время работы.
+    """
+
+    def __init__(self, window: int = WINDOW) -> None:
+        """Создаёт профилировщик без замеров."""
+        self.window = window
+        self.samples = {}
+        self.totals = {}
+        self._timers = {}
+
+    def phase(self, name: str) -> PhaseTimer:
+        """Возвращает переиспользуемый таймер фазы для блока `with`."""
+        timer = self._timers.get(name)
+        if timer is None:
+            self.samples[name] = deque(maxlen=self.window)
+            self.totals[name] = [0, 0]
+            timer = PhaseTimer(self.samples[name], self.totals[name])
+            self._timers[name] = timer
+        return timer
+
+    def record(self, name: str, elapsed: int) -> None:
+        """Записывает замер, сделанный без `phase`, например опоздание.
+
+        Args:
+            name (str): Имя фазы.
+            elapsed (int): Длительность в нс.
+        """
+        self.phase(name).add(elapsed)
+
+    def percentiles(self, quantiles=QUANTILES) -> dict:
+        """Возвращает процентили каждой фазы в миллисекундах.
+
+        Returns:
+            dict: {фаза: {'p50': мс, ..., 'max': мс}}.
+        """
+        result = {}
+        for name, samples in self.samples.items():
+            if not samples:
+                continue
+            ordered = sorted(samples)
+            last = len(ordered) - 1
+            values = {
+                f'p{quantile}': ordered[round(last * quantile / 100)] / 1e6
+                for quantile in quantiles
+            }
+            values['max'] = ordered[-1] / 1e6
+            result[name] = values
+        return result
+
+    def to_json(self) -> str:
+        """Возвращает метрики в формате JSON."""
+        phases = self.percentiles()
+        for name, values in phases.items():
+            values['count'], total = self.totals[name]
+            values['total_ms'] = total / 1e6
+        return json.dumps({'timestamp': time(), 'phases': phases})
+
+    def to_prometheus(self) -> str:
+        """Возвращает метрики в текстовом формате Prometheus."""
+        lines = [
+            '# HELP snake_phase_seconds Длительность фаз игрового цикла.',
+            '# TYPE snake_phase_seconds summary',
+        ]
+        for name, values in self.percentiles().items():
+            for quantile in QUANTILES:
+                lines.append(
+                    f'snake_phase_seconds{{phase="{name}",'
+                    f'quantile="{quantile / 100:g}"}} '
+                    f'{values[f"p{quantile}"] / 1e3:.9f}'
+                )
+            count, total = self.totals[name]
+            lines.append(
+                f'snake_phase_seconds_sum{{phase="{name}"}} {total / 1e9:.9f}'
+            )
+            lines.append(
+                f'snake_phase_seconds_count{{phase="{name}"}} {count}'
+            )
+        return '\n'.join(lines) + '\n'
+
+
+class NullProfiler:
+    """Профилировщик-заглушка: фазы не замеряются."""
+
+    _timer = nullcontext()
+
+    def phase(self, name: str) -> nullcontext:
+        """Возвращает пустой контекстный менеджер."""
+        return self._timer
+
+    def record(self, name: str, elapsed: int) -> None:
+        """Ничего не записывает."""
+
+
+class MetricsFile:
+    """Периодическая выгрузка метрик профилировщика в файл.
+
+    Attributes:
+        path (str): Путь к файлу метрик.
+        fmt (str): 'json' или 'prometheus'.
+        interval (float): Период выгрузки в секундах.
+    """
+
+    def __init__(self, path, fmt: str = 'json',
+                 interval: float = 5.0) -> None:
+        """Настраивает выгрузку; первая запись - через `interval` секунд.
+
+        Raises:
+            ValueError: Если формат неизвестен.
+        """
+        if fmt not in ('json', 'prometheus'):
+            raise ValueError(f'Неизвестный формат метрик: {fmt}')
+        self.path = os.fspath(path)
+        self.fmt = fmt
+        self.interval = interval
+        self._next = monotonic() + interval
+
+    def write(self, profiler: PhaseProfiler) -> None:
+        """Атомарно перезаписывает файл текущими метриками."""
+        if self.fmt == 'json':
+            text = profiler.to_json()
+        else:
+            text = profiler.to_prometheus()
+        temporary = f'{self.path}.tmp'
+        with open(temporary, 'w', encoding='utf-8') as file:
+            file.write(text)
+        os.replace(temporary, self.path)
+
+    def maybe_write(self, profiler: PhaseProfiler) -> None:
+        """Записывает метрики, если с прошлой записи прошёл период."""
+        now = monotonic()
+        if now >= self._next:
+            self._next = now + self.interval
+            self.write(profiler)
@@ -0,0 +1,196 @@
+"""Отрисовка кадров в отдельном потоке.
+
+В обычном режиме `main` рисует кадр и выводит его на дисплей в том же
+потоке, что и логика, поэтому медленный вывод задерживает следующий
+ход. В раздельном режиме поток логики только публикует неизменяемые
+снимки кадра (`FrameSnapshot`) в двойной буфер `FrameBuffer`, а поток
+отрисовки `RenderThread` забирает всё накопившееся, рисует и выводит на
+дисплей один раз. Публикация не ждёт отрисовки: если вывод не успевает,
+снимки нескольких кадров выводятся вместе, но ни одно изменение клеток не
+теряется.
+"""
+import threading
+
+import pygame
+
+
+class FrameSnapshot:
+    """Изменения экрана за один кадр логики.
+
+    Снимок не меняется после создания: поток логики передаёт его потоку
+    отрисовки и больше не трогает.
+
+    Attributes:
+        tick (int): Номер хода, после которого сделан снимок.
+        blits (tuple): Пары (спрайт, прямоугольник) для `Surface.blits`:
+            новая голова, освободившийся хвост, яблоко и камни.
+        rects (tuple): Прямоугольники, которые нужно вывести на дисплей.
+        full (bool): Нужно ли вывести весь экран целиком.
+    """
+
+    __slots__ = ('tick', 'blits', 'rects', 'full')
+
+    def __init__(self, tick: int, blits: tuple, rects: tuple,
+                 full: bool) -> None:
+        """Создаёт снимок кадра."""
+        self.tick = tick
+        self.blits = blits
+        self.rects = rects
+        self.full = full
+
+
+class FrameBuffer:
+    """Двойной буфер снимков между потоком логики и потоком отрисовки.
+
+    Поток логики дописывает снимки в задний список, поток отрисовки
+    забирает его целиком и подставляет пустой. Оба действия занимают
+    блокировку только на время обмена ссылками.
+    """
+
+    def __init__(self) -> None:
+        """Создаёт пустой буфер."""
+        self._ready = threading.Condition()
+        self._back = []
+        self._closed = False
+
+    def publish(self, snapshot: FrameSnapshot) -> None:
+        """Добавляет снимок кадра; не ждёт поток отрисовки."""
+        with self._ready:
+            self._back.append(snapshot)
+            self._ready.notify()
+
+    def take(self, timeout: float = None) -> list:
+        """Забирает все снимки, опубликованные с прошлого вызова.
+
+        Args:
+            timeout (float, optional): Сколько секунд ждать первого
+                снимка; по умолчанию - пока он не появится.
+
+        Returns:
+            list: Снимки в порядке публикации; пустой список по таймауту
+            или None, если буфер закрыт и пуст.
+        """
+        with self._ready:
+            self._ready.wait_for(
+                lambda: self._back or self._closed, timeout
+            )
+            if not self._back and self._closed:
+                return None
+            snapshots, self._back = self._back, []
+        return snapshots
+
+    def close(self) -> None:
+        """Будит поток отрисовки, чтобы тот дорисовал буфер и вышел."""
+        with self._ready:
+            self._closed = True
+            self._ready.notify()
+
+
+def present(rects: list) -> None:
+    """Выводит на дисплей прямоугольники `rects` или весь экран (None)."""
+    if rects is None:
+        pygame.display.update()
+    elif rects:
+        pygame.display.update(rects)
+
+
+class RenderThread:
+    """Поток, рисующий опубликованные снимки на поверхность.
+
+    Attributes:
+        surface (pygame.Surface): Поверхность, на которую рисуются кадры.
+        published (int): Сколько снимков опубликовано.
+        rendered (int): Сколько снимков нарисовано.
+        presented (int): Сколько раз кадр выведен на дисплей.
+        tick (int): Ход последнего нарисованного снимка.
+        error (pygame.error): Ошибка, остановившая поток, если была.
+    """
+
+    def __init__(self, surface: pygame.Surface, output=present) -> None:
+        """Запускает поток отрисовки.
+
+        Args:
+            surface (pygame.Surface): Поверхность окна или кадра в памяти.
+            output (callable, optional): Вывод на дисплей, получает список
+                прямоугольников или None для всего экрана; None - кадры
+                только рисуются на `surface`.
+        """
+        self.surface = surface
+        self.output = output
+        self.published = 0
+        self.rendered = 0
+        self.presented = 0
+        self.tick = None
+        self.error = None
+        self.buffer = FrameBuffer()
+        self._idle = threading.Condition()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def publish(self, snapshot: FrameSnapshot) -> None:
+        """Передаёт снимок кадра потоку отрисовки и сразу возвращается."""
+        self.published += 1
+        self.buffer.publish(snapshot)
+
+    def _run(self) -> None:
+        """Тело потока: рисует снимки, пока буфер не закроют."""
+        while True:
+            snapshots = self.buffer.take()
+            if snapshots is None:
+                return
+            if self.error is None:
+                try:
+                    self.draw(snapshots)
+                except pygame.error as error:
+                    self.error = error
+            with self._idle:
+                self.rendered += len(snapshots)
+                self._idle.notify_all()
+
+    def draw(self, snapshots: list) -> None:
+        """Рисует снимки по порядку и выводит их на дисплей одним вызовом.
+
+        Args:
+            snapshots (list): Снимки `FrameSnapshot` в порядке публикации.
+        """
+        rects = []
+        full = False
+        for snapshot in snapshots:
+            if snapshot.blits:
+                self.surface.blits(snapshot.blits, doreturn=False)
+            rects.extend(snapshot.rects)
+            full = full or snapshot.full
+        self.tick = snapshots[-1].tick
+        if self.output is not None:
+            self.output(None if full else rects)
+            self.presented += 1
+
+    def flush(self, timeout: float = None) -> bool:
+        """Ждёт, пока будут нарисованы все опубликованные снимки.
+
+        Returns:
+            bool: False, если за `timeout` секунд поток не успел.
+        """
+        with self._idle:
+            return self._idle.wait_for(
+                lambda: self.rendered >= self.published, timeout
+            )
+
+    def close(self) -> None:
+        """Дорисовывает буфер и останавливает поток.
+
+        Raises:
+            pygame.error: Если кадр не удалось нарисовать или вывести.
+        """
+        self.buffer.close()
+        self._thread.join()
+        if self.error is not None:
+            raise self.error
+
+    def __enter__(self) -> 'RenderThread':
+        """Возвращает сам поток для блока `with`."""
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """Останавливает поток."""
+        self.close()
@@ -0,0 +1,294 @@
+"""Компактная запись и безголовое воспроизведение партий `SnakeEngine`.
+
+Движок детерминирован при известном зерне, поэтому реплей хранит только
+заголовок (размер поля, зерно, число ходов) и повороты. Каждый поворот -
+одно беззнаковое число переменной длины (varint): в младших двух битах
+индекс направления в `DIRECTIONS`, выше - число ходов с прошлого
+поворота. Обычно поворот занимает один байт.
+
+После смерти или победы партия сразу начинается заново, как в игре,
+поэтому один реплей может содержать много партий.
+
+Реплей помнит, чьи правила записаны: `SnakeEngine` (`RULES_ENGINE`) или
+окна pygame из `the_snake` (`RULES_GAME`); партии окна проигрываются
+функцией `the_snake.play_replay`.
+
+Проверка реплеев: `python snake_replay.py games/*.snkr`.
+"""
+import argparse
+import struct
+from time import perf_counter
+
+from snake_engine import (
+    DIRECTIONS, GRID_HEIGHT, GRID_WIDTH, OPPOSITE, SnakeEngine,
+)
+
+MAGIC = b'SNKR'
+VERSION = 2
+# Заголовок: сигнатура, версия, правила, ширина, высота, зерно, число ходов.
+HEADER = struct.Struct('<4sBBHHQI')
+
+# Чьи правила записаны в реплее:
+RULES_ENGINE = 0
+RULES_GAME = 1
+
+# Индекс направления в `DIRECTIONS`:
+DIRECTION_CODES = {direct: code for code, direct in enumerate(DIRECTIONS)}
+
+
+def encode_varint(buffer: bytearray, value: int) -> None:
+    """Дописывает неотрицательное число в буфер в виде varint."""
+    while value > 0x7F:
+        buffer.append(value & 0x7F | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def read_varint(data: bytes, offset: int = 0) -> tuple:
+    """Читает число varint из `data`, начиная с байта `offset`.
+
+    Returns:
+        tuple: (число, смещение следующего байта).
+
+    Raises:
+        IndexError: Если число обрывается в конце данных.
+    """
+    value = shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value, offset
+        shift += 7
+
+
+def encode_turn(buffer: bytearray, delay: int, code: int) -> None:
+    """Дописывает поворот в буфер в виде varint.
+
+    Args:
+        buffer (bytearray): Буфер поворотов.
+        delay (int): Ходов с прошлого поворота.
+        code (int): Индекс направления в `DIRECTIONS`.
+    """
+    encode_varint(buffer, delay << 2 | code)
+
+
+def decode_turns(data: bytes):
+    """Перебирает повороты из буфера.
+
+    Yields:
+        tuple: (номер хода, индекс направления).
+    """
+    tick = value = shift = 0
+    for byte in data:
+        value |= (byte & 0x7F) << shift
+        shift += 7
+        if byte & 0x80:
+            continue
+        tick += value >> 2
+        yield tick, value & 3
+        value = shift = 0
+
+
+class TurnLog:
+    """Повороты партии, записанные ход за ходом.
+
+    Attributes:
+        ticks (int): Число записанных ходов.
+        turns (bytearray): Повороты в формате varint.
+    """
+
+    def __init__(self) -> None:
+        """Создаёт пустую запись."""
+        self.ticks = 0
+        self.turns = bytearray()
+        self._last_turn = 0
+
+    def record(self, action: tuple = None) -> None:
+        """Записывает ход.
+
+        Args:
+            action (tuple, optional): Новое направление, если в этом ходу
+                змейка повернула, иначе None.
+        """
+        if action is not None:
+            encode_turn(
+                self.turns, self.ticks - self._last_turn,
+                DIRECTION_CODES[action],
+            )
+            self._last_turn = self.ticks
+        self.ticks += 1
+
+
+class Replay:
+    """Запись партии: зерно и повороты.
+
+    Attributes:
+        width (int): Ширина поля в клетках.
+        height (int): Высота поля в клетках.
+        seed (int): Зерно генератора партии.
+        ticks (int): Число сыгранных ходов.
+        turns (bytes): Повороты в формате varint.
+        rules (int): `RULES_ENGINE` или `RULES_GAME`.
+    """
+
+    def __init__(self, width: int, height: int, seed: int, ticks: int,
+                 turns: bytes, rules: int = RULES_ENGINE) -> None:
+        """Создаёт реплей из готовых полей."""
+        self.width = width
+        self.height = height
+        self.seed = seed
+        self.ticks = ticks
+        self.turns = bytes(turns)
+        self.rules = rules
+
+    def to_bytes(self) -> bytes:
+        """Возвращает реплей в двоичном формате."""
+        return HEADER.pack(
+            MAGIC, VERSION, self.rules, self.width, self.height, self.seed,
+            self.ticks,
+        ) + self.turns
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'Replay':
+        """Читает реплей из двоичного формата.
+
+        Raises:
+            ValueError: Если данные не являются реплеем этой версии.
+        """
+        magic, version, rules, width, height, seed, ticks = (
+            HEADER.unpack_from(data)
+        )
+        if magic != MAGIC or version != VERSION:
+            raise ValueError('Неизвестный формат реплея.')
+        return cls(width, height, seed, ticks, data[HEADER.size:], rules)
+
+    def save(self, path) -> None:
+        """Сохраняет реплей в файл."""
+        with open(path, 'wb') as file:
+            file.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path) -> 'Replay':
+        """Загружает реплей из файла."""
+        with open(path, 'rb') as file:
+            return cls.from_bytes(file.read())
+
+    def actions(self):
+        """Перебирает действия всех ходов.
+
+        Yields:
+            tuple: Новое направление или None для хода без поворота.
+        """
+        turns = decode_turns(self.turns)
+        next_tick, code = next(turns, (None, 0))
+        for tick in range(self.ticks):
+            action = None
+            if tick == next_tick:
+                action = DIRECTIONS[code]
+                next_tick, code = next(turns, (None, 0))
+            yield action
+
+    def play(self, on_step=None) -> SnakeEngine:
+        """Воспроизводит партию без отрисовки с максимальной скоростью.
+
+        Args:
+            on_step (callable, optional): Вызывается после каждого хода
+                как `on_step(engine, reward, done)`.
+
+        Returns:
+            SnakeEngine: Движок в состоянии после последнего хода.
+
+        Raises:
+            ValueError: Если реплей записан по правилам окна pygame.
+        """
+        if self.rules != RULES_ENGINE:
+            raise ValueError(
+                'Партии окна проигрываются функцией the_snake.play_replay.'
+            )
+        engine = SnakeEngine(self.width, self.height, self.seed)
+        step = engine.step
+        for action in self.actions():
+            _, reward, done = step(action)
+            if on_step is not None:
+                on_step(engine, reward, done)
+            if done:
+                engine.reset()
+        return engine
+
+
+class Recorder:
+    """Играет партию на `SnakeEngine` и записывает её повороты.
+
+    Attributes:
+        engine (SnakeEngine): Движок записываемой партии.
+        log (TurnLog): Записанные повороты.
+    """
+
+    def __init__(self, width: int = GRID_WIDTH, height: int = GRID_HEIGHT,
+                 seed: int = None) -> None:
+        """Создаёт новый движок и начинает запись с первого хода."""
+        self.engine = SnakeEngine(width, height, seed)
+        self.log = TurnLog()
+
+    @property
+    def ticks(self) -> int:
+        """Число сделанных ходов."""
+        return self.log.ticks
+
+    def step(self, action: tuple = None) -> tuple:
+        """Делает ход, как `SnakeEngine.step`, и записывает поворот.
+
+        Развороты на 180 градусов и повтор текущего направления ничего
+        не меняют и в запись не попадают. После конца партии движок
+        сразу сбрасывается.
+
+        Returns:
+            tuple: (state, reward, done) хода.
+        """
+        direction = self.engine.state.direction
+        if action in (direction, OPPOSITE[direction]):
+            action = None
+        self.log.record(action)
+        result = self.engine.step(action)
+        if result[2]:
+            self.engine.reset()
+        return result
+
+    def replay(self) -> Replay:
+        """Возвращает запись сыгранных ходов."""
+        engine = self.engine
+        return Replay(
+            engine.width, engine.height, engine.seed, self.log.ticks,
+            self.log.turns,
+        )
+
+
+def main() -> None:
+    """Проверяет реплеи из командной строки и печатает итог каждого."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('paths', nargs='+')
+    args = parser.parse_args()
+    for path in args.paths:
+        replay = Replay.load(path)
+        if replay.rules != RULES_ENGINE:
+            print(f'{path}: партия окна, ходов {replay.ticks}, зерно '
+                  f'{replay.seed}; проигрывается the_snake.play_replay')
+            continue
+        deaths = 0
+
+        def count_deaths(engine, reward, done):
+            nonlocal deaths
+            deaths += done
+
+        started = perf_counter()
+        engine = replay.play(count_deaths)
+        seconds = perf_counter() - started
+        print(f'{path}: ходов {replay.ticks}, партий закончено {deaths}, '
+              f'длина змейки {len(engine.state.positions)}, '
+              f'{replay.ticks / max(seconds, 1e-9):,.0f} ходов/с')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,276 @@
+"""Перемотка партии назад по кольцевому буферу изменений.
+
+`History` хранит после каждого хода не копию поля, а несколько чисел:
+новую голову, освободившийся хвост, клетку яблока, появившийся камень и
+байт флагов (направление, змейка выросла, партия сброшена, камни убраны).
+Ход занимает `DELTA_BYTES` байт в массивах фиксированного размера, поэтому
+минуты истории не зависят от размера поля.
+
+Раз в `KEYFRAME_EVERY` ходов сохраняется ключевой кадр: тело змейки,
+яблоко и камни. Обычный ход отменяется по своим изменениям за O(1), а
+ход со сбросом партии или уборкой камней (прежнее тело и камни в
+изменениях не хранятся) - перемоткой от ближайшего ключевого кадра
+вперёд, не дольше `KEYFRAME_EVERY` ходов.
+
+Поле - `Board` игры окна: `GameState` с подсчётом занятости клеток
+`occupy` и `vacate`. Модуль не зависит от pygame.
+"""
+from array import array
+from collections import deque
+
+from snake_engine import DIRECTIONS
+
+# Сколько последних ходов можно отмотать (около 18 минут при 15 ходах
+# в секунду):
+HISTORY_TICKS = 1 << 14
+KEYFRAME_EVERY = 256
+
+# Флаги хода; младшие два бита - индекс направления в `DIRECTIONS`:
+DIRECTION_MASK = 3
+GREW = 4
+RESET = 8
+CLEARED = 16
+
+# Клетка «нет»: хвост при сбросе, яблоко без места, ход без камня.
+NONE = -1
+
+# Голова, хвост, яблоко, камень и флаги:
+DELTA_BYTES = 4 * 4 + 1
+
+
+class History:
+    """Последние ходы партии для перемотки назад.
+
+    Ходы истории нумеруются с начала партии: состояние `index` - поле
+    после `index` записанных ходов.
+
+    Attributes:
+        board (Board): Поле, которое записывается и перематывается.
+        capacity (int): Сколько последних ходов хранится.
+        keyframe_every (int): Через сколько ходов сохраняется ключевой кадр.
+        end (int): Число записанных ходов.
+        position (int): Состояние, в котором сейчас поле; меньше `end`,
+            пока партия отмотана назад.
+    """
+
+    def __init__(self, board, capacity: int = HISTORY_TICKS,
+                 keyframe_every: int = KEYFRAME_EVERY) -> None:
+        """Выделяет буферы и начинает историю с текущего поля."""
+        self.board = board
+        self.capacity = capacity
+        self.keyframe_every = keyframe_every
+        self._heads = array('i', [0]) * capacity
+        self._tails = array('i', [0]) * capacity
+        self._apples = array('i', [0]) * capacity
+        self._rocks = array('i', [0]) * capacity
+        self._flags = bytearray(capacity)
+        self._keyframes = deque(maxlen=capacity // keyframe_every + 2)
+        self.reset()
+
+    def reset(self) -> None:
+        """Забывает историю и начинает её с текущего поля."""
+        self.end = self.position = self._first = 0
+        self._keyframes.clear()
+        self._save_keyframe()
+
+    @property
+    def oldest(self) -> int:
+        """Самое раннее состояние, к которому можно отмотать."""
+        for keyframe in self._keyframes:
+            if keyframe[0] >= self._first:
+                return keyframe[0]
+        return self.position
+
+    @property
+    def nbytes(self) -> int:
+        """Память буферов и ключевых кадров в байтах."""
+        return self.capacity * DELTA_BYTES + sum(
+            (len(keyframe[1]) + len(keyframe[3])) * 4
+            for keyframe in self._keyframes
+        )
+
+    def _save_keyframe(self) -> None:
+        """Сохраняет текущее поле ключевым кадром состояния `end`."""
+        board = self.board
+        self._keyframes.append((
+            self.end, array('i', board.positions), board.apple,
+            board.rocks[:], board.direction, board.eaten, board.ticks,
+        ))
+        self._remember()
+
+    def _remember(self) -> None:
+        """Запоминает длину змейки и камни, чтобы сравнить их после хода."""
+        rocks = self.board.rocks
+        self._length = len(self.board.positions)
+        self._rock_count = len(rocks)
+        self._last_rock = rocks[-1] if rocks else NONE
+
+    def record(self, tail: int) -> None:
+        """Записывает изменения хода, только что сделанного на поле.
+
+        Если партия была отмотана назад, отмотанные ходы забываются.
+
+        Args:
+            tail (int): Клетка, которую освободил хвост (`Snake.last`).
+        """
+        board = self.board
+        if self.position < self.end:
+            self._truncate()
+        slot = self.end % self.capacity
+        flags = DIRECTIONS.index(board.direction)
+        # Сброс партии обнуляет счётчик ходов, а ход его увеличивает.
+        if not board.ticks:
+            flags |= RESET | (GREW if len(board.positions) == 2 else 0)
+            tail = NONE
+        elif len(board.positions) > self._length:
+            flags |= GREW
+        rocks = board.rocks
+        count = len(rocks)
+        # Камни убирают все сразу: их стало меньше, или вместо прежнего
+        # единственного камня лежит новый.
+        if count < self._rock_count or (
+            count == self._rock_count == 1 and rocks[0] != self._last_rock
+        ):
+            flags |= CLEARED
+        spawned = count and (count > self._rock_count or flags & CLEARED)
+        self._heads[slot] = board.positions[0]
+        self._tails[slot] = tail
+        self._apples[slot] = NONE if board.apple is None else board.apple
+        self._rocks[slot] = rocks[-1] if spawned else NONE
+        self._flags[slot] = flags
+        self.end = self.position = self.end + 1
+        self._first = max(self._first, self.end - self.capacity)
+        if self.end % self.keyframe_every:
+            self._remember()
+        else:
+            self._save_keyframe()
+
+    def _truncate(self) -> None:
+        """Забывает ходы после `position`, чтобы продолжить партию с него."""
+        while self._keyframes[-1][0] > self.position:
+            self._keyframes.pop()
+        self.end = self.position
+
+    def step_back(self, ticks: int = 1) -> int:
+        """Отматывает поле на `ticks` ходов назад, но не дальше `oldest`.
+
+        Returns:
+            int: Сколько ходов удалось отмотать.
+        """
+        oldest = self.oldest
+        steps = min(ticks, self.position - oldest)
+        for _ in range(steps):
+            self._undo()
+        self._remember()
+        return steps
+
+    def seek(self, index: int) -> None:
+        """Возвращает поле к состоянию `index`.
+
+        Поле восстанавливается из ближайшего ключевого кадра не позже
+        `index`, затем вперёд применяются изменения записанных ходов.
+
+        Raises:
+            ValueError: Если состояние вне хранимой истории.
+        """
+        if not self.oldest <= index <= self.end:
+            raise ValueError(
+                f'Можно перейти к ходам от {self.oldest} до {self.end}.'
+            )
+        keyframe = next(
+            keyframe for keyframe in reversed(self._keyframes)
+            if keyframe[0] <= index
+        )
+        self._load(keyframe)
+        for tick in range(keyframe[0], index):
+            self._apply(tick % self.capacity)
+        self.position = index
+        self._remember()
+
+    def _load(self, keyframe: tuple) -> None:
+        """Ставит на поле змейку, яблоко и камни ключевого кадра."""
+        board = self.board
+        _, body, apple, rocks, board.direction, board.eaten, board.ticks = (
+            keyframe
+        )
+        self._clear_body()
+        for cell in body:
+            board.positions.append(cell)
+            board.occupy(cell)
+        self._clear_rocks()
+        for cell in rocks:
+            board.rocks.append(cell)
+            board.occupy(cell)
+        self._move_apple(NONE if apple is None else apple)
+
+    def _clear_body(self) -> None:
+        """Убирает змейку с поля."""
+        for cell in self.board.positions:
+            self.board.vacate(cell)
+        self.board.positions.clear()
+
+    def _clear_rocks(self) -> None:
+        """Убирает камни с поля."""
+        for cell in self.board.rocks:
+            self.board.vacate(cell)
+        del self.board.rocks[:]
+
+    def _move_apple(self, cell: int) -> None:
+        """Переносит яблоко в клетку `cell` (`NONE` - яблока нет)."""
+        board = self.board
+        if board.apple is not None:
+            board.vacate(board.apple)
+        board.apple = None if cell == NONE else cell
+        if board.apple is not None:
+            board.occupy(board.apple)
+
+    def _apply(self, slot: int) -> None:
+        """Повторяет записанный ход из ячейки буфера `slot`."""
+        board = self.board
+        positions = board.positions
+        head, flags = self._heads[slot], self._flags[slot]
+        if flags & RESET:
+            self._clear_body()
+            positions.append(head)
+            board.eaten = board.ticks = 0
+        else:
+            positions.push_head(head)
+            board.vacate(positions.pop_tail())
+            board.ticks += 1
+        board.occupy(head)
+        if flags & GREW:
+            # После яблока в хвосте лежит дубль клетки головы.
+            positions.append(head)
+            board.occupy(head)
+            board.eaten += 1
+        if flags & CLEARED:
+            self._clear_rocks()
+        if self._rocks[slot] != NONE:
+            board.rocks.append(self._rocks[slot])
+            board.occupy(self._rocks[slot])
+        self._move_apple(self._apples[slot])
+        board.direction = DIRECTIONS[flags & DIRECTION_MASK]
+
+    def _undo(self) -> None:
+        """Отменяет последний ход перед `position`."""
+        target = self.position - 1
+        slot = target % self.capacity
+        flags = self._flags[slot]
+        if flags & (RESET | CLEARED) or target % self.keyframe_every == 0:
+            self.seek(target)
+            return
+        board = self.board
+        positions = board.positions
+        if flags & GREW:
+            board.vacate(positions.pop_tail())
+            board.eaten -= 1
+        board.vacate(positions.pop_head())
+        positions.append(self._tails[slot])
+        board.occupy(self._tails[slot])
+        if self._rocks[slot] != NONE:
+            board.vacate(board.rocks.pop())
+        previous = (target - 1) % self.capacity
+        self._move_apple(self._apples[previous])
+        board.direction = DIRECTIONS[self._flags[previous] & DIRECTION_MASK]
+        board.ticks -= 1
+        self.position = target
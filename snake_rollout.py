@@ -0,0 +1,451 @@
+"""Параллельные прогоны партий `SnakeEngine` на пуле процессов.
+
+Каждый процесс играет свою долю партий со своим зерном и пишет
+результаты в кольцевые буферы в разделяемой памяти, а не возвращает
+их через pickle. Родительский процесс только читает буферы и собирает
+сводную статистику и, по запросу, последние ходы каждого процесса.
+
+Запуск: `python snake_rollout.py --episodes 1000 --workers 4`.
+"""
+import argparse
+import os
+import random
+from multiprocessing import get_context
+from multiprocessing.shared_memory import SharedMemory
+from random import Random
+from time import perf_counter_ns
+
+import numpy as np
+
+from snake_autopilot import BUDGET, Autopilot
+from snake_engine import DIRECTIONS, GRID_HEIGHT, GRID_WIDTH, SnakeEngine
+from snake_episodes import EpisodeWriter
+from snake_stats import StatsWriter
+
+# Ячейки заголовка буфера процесса:
+HEADER_EPISODES = 0
+HEADER_TICKS = 1
+HEADER_ELAPSED_NS = 2
+HEADER_SIZE = 4
+
+# Столбцы записи о партии и о ходе:
+EPISODE_FIELDS = (
+    'score', 'snake_length', 'ticks', 'seed', 'elapsed_ns', 'rocks_hit',
+)
+TICK_FIELDS = ('head', 'action', 'reward')
+
+# Ёмкость кольцевых буферов по умолчанию:
+EPISODE_CAPACITY = 1 << 16
+TICK_CAPACITY = 1 << 20
+
+# Код действия в записи о ходе; -1 - движение прямо:
+ACTION_CODES = {direct: code for code, direct in enumerate(DIRECTIONS)}
+ACTION_CODES[None] = -1
+
+# Предел длины одной партии в ходах:
+MAX_TICKS = 10_000
+
+# Число бит зерна партии: зерно помещается в столбец int64.
+EPISODE_SEED_BITS = 63
+
+
+def random_policy(engine: SnakeEngine) -> tuple:
+    """Случайная политика: поворачивает в каждом четвёртом ходу."""
+    if random.random() < 0.25:
+        return random.choice(DIRECTIONS)
+    return None
+
+
+def greedy_policy(engine: SnakeEngine) -> tuple:
+    """Жадная политика: идёт к яблоку, не глядя на препятствия."""
+    head_x, head_y = engine.coords(engine.get_head_position())
+    apple_x, apple_y = engine.coords(engine.state.apple)
+    if apple_x != head_x:
+        return (1, 0) if apple_x > head_x else (-1, 0)
+    return (0, 1) if apple_y > head_y else (0, -1)
+
+
+class AutopilotPolicy:
+    """Политика автопилота: кратчайший путь к яблоку в обход препятствий.
+
+    Автопилот создаётся при первом ходе движка, забывает путь и петлю за
+    хвостом в начале каждой партии и узнаёт о новом яблоке и новых
+    камнях, сравнивая состояние движка с предыдущим ходом.
+
+    Attributes:
+        budget (int): Сколько клеток поиск пути расширяет за ход.
+    """
+
+    def __init__(self, budget: int = BUDGET) -> None:
+        """Создаёт политику; автопилот появится при первом ходе."""
+        self.budget = budget
+        self.engine = None
+        self.autopilot = None
+        self.rocks = 0
+
+    def __call__(self, engine: SnakeEngine) -> tuple:
+        """Возвращает направление хода или None, чтобы идти прямо."""
+        state = engine.state
+        if engine is not self.engine:
+            self.engine = engine
+            self.autopilot = Autopilot(
+                engine.width, engine.height, engine.is_free, self.budget
+            )
+        autopilot = self.autopilot
+        if not state.ticks:
+            autopilot.reset(engine.width, engine.height)
+            self.rocks = 0
+        if state.apple != autopilot.target:
+            autopilot.retarget(state.apple)
+        if len(state.rocks) != self.rocks:
+            # Камни только добавляются в конец, пока партия не сброшена.
+            for rock in state.rocks[min(self.rocks, len(state.rocks)):]:
+                autopilot.block(rock)
+            self.rocks = len(state.rocks)
+        direction = autopilot.choose(
+            state.positions[0], state.direction, state.positions
+        )
+        return direction if direction != state.direction else None
+
+
+class EpisodeBuffer:
+    """Кольцевые буферы одного процесса в разделяемой памяти.
+
+    Attributes:
+        shm (SharedMemory): Блок разделяемой памяти.
+        header (np.ndarray): Счётчики партий, ходов и время работы.
+        episodes (np.ndarray): Записи о партиях (score, snake_length,
+            ticks, seed, elapsed_ns, rocks_hit).
+        trajectory (np.ndarray): Записи о ходах (head, action, reward).
+    """
+
+    def __init__(self, episode_capacity: int = EPISODE_CAPACITY,
+                 tick_capacity: int = TICK_CAPACITY,
+                 name: str = None) -> None:
+        """Создаёт новый блок или подключается к существующему по имени.
+
+        Args:
+            episode_capacity (int): Сколько последних партий хранить.
+            tick_capacity (int): Сколько последних ходов хранить; 0 -
+                ходы не записываются.
+            name (str, optional): Имя существующего блока.
+        """
+        sizes = (
+            HEADER_SIZE * 8,
+            episode_capacity * len(EPISODE_FIELDS) * 8,
+            tick_capacity * len(TICK_FIELDS) * 4,
+        )
+        if name is None:
+            self.shm = SharedMemory(create=True, size=sum(sizes))
+        else:
+            self.shm = SharedMemory(name=name)
+        self.episode_capacity = episode_capacity
+        self.tick_capacity = tick_capacity
+        buf = self.shm.buf
+        self.header = np.ndarray(HEADER_SIZE, np.int64, buf)
+        self.episodes = np.ndarray(
+            (episode_capacity, len(EPISODE_FIELDS)), np.int64, buf,
+            offset=sizes[0],
+        )
+        self.trajectory = np.ndarray(
+            (tick_capacity, len(TICK_FIELDS)), np.int32, buf,
+            offset=sizes[0] + sizes[1],
+        )
+
+    @property
+    def name(self) -> str:
+        """Имя блока для подключения из другого процесса."""
+        return self.shm.name
+
+    def recent_episodes(self) -> np.ndarray:
+        """Возвращает сохранившиеся записи о партиях."""
+        count = min(self.header[HEADER_EPISODES], self.episode_capacity)
+        return self.episodes[:count]
+
+    def recent_ticks(self) -> np.ndarray:
+        """Возвращает копию сохранившихся записей о ходах по порядку."""
+        ticks = int(self.header[HEADER_TICKS])
+        if ticks <= self.tick_capacity:
+            return self.trajectory[:ticks].copy()
+        start = ticks % self.tick_capacity
+        return np.concatenate(
+            (self.trajectory[start:], self.trajectory[:start])
+        )
+
+    def close(self) -> None:
+        """Отключается от блока."""
+        del self.header, self.episodes, self.trajectory
+        self.shm.close()
+
+
+def hit_rock(state) -> bool:
+    """Проверяет, что партия закончилась ударом головы о камень."""
+    if not state.done or state.won:
+        return False
+    head = state.neighbours[state.direction][state.positions[0]]
+    return head in state.rocks
+
+
+def play(buffer: EpisodeBuffer, episodes: int, seed: int, width: int,
+         height: int, policy, max_ticks: int = MAX_TICKS,
+         log: EpisodeWriter = None) -> None:
+    """Играет `episodes` партий и пишет их в `buffer`.
+
+    Каждая партия получает своё зерно из генератора `seed`; партию с
+    зерном `s` повторяют `SnakeEngine(seed=s)` и `random.seed(s)` с
+    теми же действиями.
+
+    Args:
+        buffer (EpisodeBuffer): Буферы процесса.
+        episodes (int): Число партий.
+        seed (int): Зерно генератора зёрен партий.
+        width (int): Ширина поля в клетках.
+        height (int): Высота поля в клетках.
+        policy (callable): Функция `policy(engine) -> direction`.
+        max_ticks (int): Предел длины одной партии.
+        log (EpisodeWriter, optional): Журнал, в который пишется каждый
+            ход.
+    """
+    seeds = Random(seed)
+    header, records, trajectory = (
+        buffer.header, buffer.episodes, buffer.trajectory
+    )
+    tick_capacity = buffer.tick_capacity
+    codes = ACTION_CODES
+    ticks = 0
+    started = perf_counter_ns()
+    for episode in range(episodes):
+        # Новый движок, а не `reset`: порядок свободных клеток после
+        # прошлой партии другой, и по одному зерну партия бы не повторилась.
+        episode_seed = seeds.getrandbits(EPISODE_SEED_BITS)
+        random.seed(episode_seed)
+        engine = SnakeEngine(width, height, episode_seed)
+        state = engine.state
+        episode_started = perf_counter_ns()
+        for _ in range(max_ticks):
+            action = policy(engine)
+            state, reward, done = engine.step(action)
+            if tick_capacity:
+                trajectory[ticks % tick_capacity] = (
+                    state.positions[0], codes[action], reward
+                )
+            if log is not None:
+                log.record(engine, reward, done)
+            ticks += 1
+            if done:
+                break
+        if log is not None:
+            log.end_episode()
+        records[episode % buffer.episode_capacity] = (
+            state.eaten, len(state.positions), state.ticks, episode_seed,
+            perf_counter_ns() - episode_started, hit_rock(state),
+        )
+        header[HEADER_EPISODES] = episode + 1
+        header[HEADER_TICKS] = ticks
+    header[HEADER_ELAPSED_NS] = perf_counter_ns() - started
+
+
+def _worker(name: str, episode_capacity: int, tick_capacity: int,
+            episodes: int, seed: int, width: int, height: int,
+            policy, max_ticks: int, log_path: str = None) -> None:
+    """Точка входа процесса пула: подключается к буферу и играет."""
+    buffer = EpisodeBuffer(episode_capacity, tick_capacity, name)
+    log = None
+    try:
+        if log_path is not None:
+            log = EpisodeWriter(log_path, width, height)
+        play(buffer, episodes, seed, width, height, policy, max_ticks, log)
+    finally:
+        if log is not None:
+            log.close()
+        buffer.close()
+
+
+class RolloutReport:
+    """Сводная статистика параллельного прогона.
+
+    Attributes:
+        scores (np.ndarray): Съеденные яблоки по партиям.
+        lengths (np.ndarray): Длины партий в ходах.
+        snake_lengths (np.ndarray): Длины змеек в конце партий.
+        seeds (np.ndarray): Зёрна партий.
+        durations (np.ndarray): Время каждой партии в секундах.
+        rocks_hit (np.ndarray): 1, если партия закончилась ударом о
+            камень.
+        worker_ticks_per_second (list): Скорость каждого процесса.
+        seconds (float): Общее время прогона.
+        trajectories (list): Для каждого процесса массив последних ходов
+            (head, action, reward) или None, если ходы не сохранялись.
+    """
+
+    def __init__(self, episodes: np.ndarray, worker_ticks_per_second: list,
+                 seconds: float, trajectories: list = None) -> None:
+        """Собирает отчёт из записей о партиях всех процессов."""
+        self.scores = episodes[:, EPISODE_FIELDS.index('score')]
+        self.lengths = episodes[:, EPISODE_FIELDS.index('ticks')]
+        self.snake_lengths = episodes[:, EPISODE_FIELDS.index('snake_length')]
+        self.seeds = episodes[:, EPISODE_FIELDS.index('seed')]
+        self.durations = episodes[:, EPISODE_FIELDS.index('elapsed_ns')] / 1e9
+        self.rocks_hit = episodes[:, EPISODE_FIELDS.index('rocks_hit')]
+        self.worker_ticks_per_second = worker_ticks_per_second
+        self.seconds = seconds
+        self.trajectories = trajectories
+
+    @property
+    def ticks_per_second(self) -> float:
+        """Суммарная скорость всех процессов."""
+        return sum(self.worker_ticks_per_second)
+
+    def score_distribution(self) -> dict:
+        """Возвращает число партий для каждого счёта."""
+        values, counts = np.unique(self.scores, return_counts=True)
+        return dict(zip(values.tolist(), counts.tolist()))
+
+    def summary(self) -> str:
+        """Возвращает отчёт в виде текста."""
+        percentiles = (50, 90, 99)
+        score_p = np.percentile(self.scores, percentiles)
+        length_p = np.percentile(self.lengths, percentiles)
+        lines = [
+            f'Партий: {self.scores.size}, время: {self.seconds:.2f} с',
+            f'Счёт: среднее {self.scores.mean():.2f}, '
+            + ', '.join(f'p{p} {v:g}' for p, v in zip(percentiles, score_p)),
+            f'Длина партии: среднее {self.lengths.mean():.1f}, '
+            + ', '.join(f'p{p} {v:g}' for p, v in zip(percentiles, length_p)),
+            f'Распределение счёта: {self.score_distribution()}',
+        ]
+        lines.extend(
+            f'Процесс {index}: {speed:,.0f} ходов/с'
+            for index, speed in enumerate(self.worker_ticks_per_second)
+        )
+        lines.append(f'Всего: {self.ticks_per_second:,.0f} ходов/с')
+        return '\n'.join(lines)
+
+
+def run_rollouts(episodes: int, workers: int = None, seed: int = 0,
+                 width: int = GRID_WIDTH, height: int = GRID_HEIGHT,
+                 policy=random_policy, max_ticks: int = MAX_TICKS,
+                 keep_trajectories: bool = False,
+                 tick_capacity: int = TICK_CAPACITY,
+                 log_dir: str = None) -> RolloutReport:
+    """Распределяет партии по пулу процессов и собирает статистику.
+
+    Args:
+        episodes (int): Общее число партий.
+        workers (int, optional): Число процессов; по умолчанию по числу
+            ядер.
+        seed (int): Базовое зерно; процесс `i` получает `seed + i`.
+        width (int): Ширина поля в клетках.
+        height (int): Высота поля в клетках.
+        policy (callable): Функция уровня модуля `policy(engine)` или
+            объект класса уровня модуля, например `AutopilotPolicy`;
+            каждый процесс получает свою копию.
+        max_ticks (int): Предел длины одной партии.
+        keep_trajectories (bool): Записывать ли ходы и вернуть ли их в
+            `RolloutReport.trajectories`; без этого процессы пишут
+            только итоги партий.
+        tick_capacity (int): Сколько последних ходов каждого процесса
+            хранить при `keep_trajectories`.
+        log_dir (str, optional): Каталог для журналов всех ходов
+            (`snake_episodes`); процесс `i` пишет в `log_dir/worker-i`.
+
+    Returns:
+        RolloutReport: Сводная статистика.
+    """
+    workers = workers or os.cpu_count()
+    if not keep_trajectories:
+        tick_capacity = 0
+    shares = [
+        episodes // workers + (index < episodes % workers)
+        for index in range(workers)
+    ]
+    # Буфер партий вмещает всю долю процесса, поэтому в отчёт и в базу
+    # попадает каждая партия, а не последние `EPISODE_CAPACITY`.
+    buffers = [
+        EpisodeBuffer(max(share, 1), tick_capacity) for share in shares
+    ]
+    started = perf_counter_ns()
+    try:
+        # Процессы запускаются заново, а не через fork: fork копирует
+        # блокировки, занятые потоками родителя (например, таймером SDL),
+        # и процесс может зависнуть.
+        with get_context('spawn').Pool(workers) as pool:
+            pool.starmap(_worker, [
+                (buffer.name, buffer.episode_capacity, tick_capacity,
+                 share, seed + index, width, height, policy, max_ticks,
+                 None if log_dir is None
+                 else os.path.join(log_dir, f'worker-{index}'))
+                for index, (buffer, share) in enumerate(zip(buffers, shares))
+            ])
+        seconds = (perf_counter_ns() - started) / 1e9
+        records = np.concatenate(
+            [buffer.recent_episodes().copy() for buffer in buffers]
+        )
+        speeds = [
+            buffer.header[HEADER_TICKS]
+            / max(buffer.header[HEADER_ELAPSED_NS], 1) * 1e9
+            for buffer in buffers
+        ]
+        trajectories = None
+        if keep_trajectories:
+            trajectories = [buffer.recent_ticks() for buffer in buffers]
+    finally:
+        for buffer in buffers:
+            buffer.close()
+            buffer.shm.unlink()
+    return RolloutReport(records, speeds, seconds, trajectories)
+
+
+# Политики командной строки:
+POLICIES = {
+    'random': random_policy,
+    'greedy': greedy_policy,
+    'autopilot': AutopilotPolicy(),
+}
+
+
+def main() -> None:
+    """Запускает прогон из командной строки и печатает отчёт."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--episodes', type=int, default=1000)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--width', type=int, default=GRID_WIDTH)
+    parser.add_argument('--height', type=int, default=GRID_HEIGHT)
+    parser.add_argument(
+        '--policy', choices=tuple(POLICIES), default='random'
+    )
+    parser.add_argument(
+        '--trajectories', metavar='PATH', default=None,
+        help='сохранить последние ходы каждого процесса в файл .npz',
+    )
+    parser.add_argument(
+        '--log', metavar='DIR', default=None,
+        help='записать все ходы в журналы snake_episodes',
+    )
+    parser.add_argument(
+        '--stats', metavar='PATH', default=None,
+        help='записать итоги партий в базу SQLite (snake_stats)',
+    )
+    args = parser.parse_args()
+    policy = POLICIES[args.policy]
+    report = run_rollouts(
+        args.episodes, args.workers, args.seed, args.width, args.height,
+        policy, keep_trajectories=args.trajectories is not None,
+        log_dir=args.log,
+    )
+    print(report.summary())
+    if args.trajectories is not None:
+        np.savez(args.trajectories, *report.trajectories)
+    if args.stats is not None:
+        with StatsWriter(args.stats) as stats:
+            for row in zip(
+                report.scores.tolist(), report.snake_lengths.tolist(),
+                report.lengths.tolist(), report.durations.tolist(),
+                report.seeds.tolist(), report.rocks_hit.tolist(),
+            ):
+                stats.record(*row)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,464 @@
+"""Сервер многопользовательской игры: много партий на одном цикле asyncio.
+
+Каждое подключение по TCP - отдельная партия `SnakeEngine` с теми же
+правилами движения, поедания и камней, что в `the_snake`. Все партии
+двигает одна задача `GameServer.run`: ходы назначаются по абсолютному
+расписанию, поэтому задержки не копятся, а опоздание каждого хода
+(дрожание) замеряется профилировщиком вместе с длительностью хода.
+
+Протокол двоичный. Клиент шлёт по байту на поворот - индекс направления
+в `DIRECTIONS`. Сервер шлёт сообщения `varint(длина) + данные`, первый
+байт данных - тип сообщения:
+
+- `FULL` - всё состояние партии: при подключении и после каждого сброса;
+- `DELTA` - изменения за ход: события `varint(клетка << 3 | вид)`, где
+  вид - `TAIL` (убран хвост), `HEAD` (новая голова), `APPLE` (яблоко
+  перенесено) или `ROCK` (новый камень). Обычный ход - два события,
+  несколько байт вместо всего поля.
+
+`SessionView` собирает партию из сообщений на стороне клиента. Модуль не
+зависит от pygame.
+
+Запуск сервера: `python snake_server.py serve --port 8765`; нагрузочный
+тест против запущенного сервера:
+`python snake_server.py load --clients 1000 --seconds 10`.
+"""
+import argparse
+import asyncio
+from collections import deque
+from random import Random
+from time import perf_counter
+
+from snake_engine import DIRECTIONS, GRID_HEIGHT, GRID_WIDTH, SnakeEngine
+from snake_profiler import MetricsFile, PhaseProfiler
+from snake_replay import encode_varint, read_varint
+
+HOST = '127.0.0.1'
+PORT = 8765
+
+# Ходов в секунду в каждой партии:
+TICK_RATE = 15
+
+# Если ход опоздал больше чем на столько периодов, отставание
+# отбрасывается, как в `the_snake.FixedTimestep`:
+MAX_LAG = 5
+
+# Сколько байт может ждать отправки клиенту, прежде чем его отключат,
+# чтобы медленный клиент не копил память сервера:
+WRITE_LIMIT = 64 * 1024
+
+# Очередь входящих подключений:
+BACKLOG = 4096
+
+# Типы сообщений сервера:
+FULL = 0
+DELTA = 1
+
+# Виды событий в сообщении `DELTA`:
+TAIL = 0
+HEAD = 1
+APPLE = 2
+ROCK = 3
+
+
+def frame(payload: bytearray) -> bytes:
+    """Возвращает сообщение: длину `payload` в виде varint и сами данные."""
+    message = bytearray()
+    encode_varint(message, len(payload))
+    message += payload
+    return bytes(message)
+
+
+def full_message(engine: SnakeEngine) -> bytes:
+    """Возвращает сообщение `FULL` с состоянием партии.
+
+    Данные - числа varint: ширина, высота, зерно, длина змейки, её клетки
+    от головы, клетка яблока плюс один (0 - яблока нет), число камней и
+    их клетки.
+    """
+    state = engine.state
+    payload = bytearray([FULL])
+    for value in (engine.width, engine.height, engine.seed,
+                  len(state.positions)):
+        encode_varint(payload, value)
+    for cell in state.positions:
+        encode_varint(payload, cell)
+    encode_varint(payload, 0 if state.apple is None else state.apple + 1)
+    encode_varint(payload, len(state.rocks))
+    for cell in state.rocks:
+        encode_varint(payload, cell)
+    return frame(payload)
+
+
+class Session:
+    """Партия одного клиента.
+
+    Attributes:
+        engine (SnakeEngine): Движок партии.
+        writer (asyncio.StreamWriter): Поток к клиенту.
+        action (tuple): Поворот, полученный с прошлого хода, или None.
+    """
+
+    __slots__ = ('engine', 'writer', 'action')
+
+    def __init__(self, engine: SnakeEngine, writer) -> None:
+        """Связывает партию с клиентом."""
+        self.engine = engine
+        self.writer = writer
+        self.action = None
+
+    def turn(self, data: bytes) -> None:
+        """Принимает повороты клиента; в ходе действует последний."""
+        for code in data:
+            if code < len(DIRECTIONS):
+                self.action = DIRECTIONS[code]
+
+    def step(self) -> bytes:
+        """Делает ход и возвращает сообщение с его изменениями.
+
+        После конца партии она сразу начинается заново, а клиент
+        получает `FULL`.
+        """
+        engine = self.engine
+        state = engine.state
+        positions = state.positions
+        length, tail = len(positions), positions[-1]
+        apple, rocks = state.apple, len(state.rocks)
+        action, self.action = self.action, None
+        if engine.step(action)[2]:
+            engine.reset()
+            return full_message(engine)
+        payload = bytearray([DELTA])
+        if len(positions) == length:
+            encode_varint(payload, tail << 3 | TAIL)
+        encode_varint(payload, positions[0] << 3 | HEAD)
+        if state.apple != apple:
+            encode_varint(payload, state.apple << 3 | APPLE)
+        for cell in state.rocks[rocks:]:
+            encode_varint(payload, cell << 3 | ROCK)
+        return frame(payload)
+
+
+class GameServer:
+    """Партии всех подключённых клиентов на одном цикле событий.
+
+    Attributes:
+        width (int): Ширина поля в клетках.
+        height (int): Высота поля в клетках.
+        rate (float): Ходов в секунду.
+        sessions (set): Партии подключённых клиентов.
+        profiler (PhaseProfiler): Длительность хода всех партий (`tick`)
+            и его опоздание относительно расписания (`jitter`).
+        metrics_file (MetricsFile): Куда выгружать замеры, или None.
+        ticks (int): Число сделанных ходов.
+    """
+
+    def __init__(self, width: int = GRID_WIDTH, height: int = GRID_HEIGHT,
+                 rate: float = TICK_RATE, seed: int = None,
+                 metrics_file: MetricsFile = None) -> None:
+        """Создаёт сервер без клиентов.
+
+        Args:
+            seed (int, optional): Зерно, из которого выбираются зёрна
+                партий; по умолчанию случайное.
+        """
+        self.width = width
+        self.height = height
+        self.rate = rate
+        self.rng = Random(seed)
+        self.sessions = set()
+        self.profiler = PhaseProfiler()
+        self.metrics_file = metrics_file
+        self.ticks = 0
+
+    def connect(self, writer) -> Session:
+        """Начинает партию нового клиента и отправляет ему `FULL`."""
+        engine = SnakeEngine(
+            self.width, self.height, self.rng.getrandbits(64)
+        )
+        session = Session(engine, writer)
+        self.sessions.add(session)
+        writer.write(full_message(engine))
+        return session
+
+    def disconnect(self, session: Session) -> None:
+        """Заканчивает партию клиента и закрывает соединение."""
+        self.sessions.discard(session)
+        session.writer.close()
+
+    async def handle(self, reader, writer) -> None:
+        """Обслуживает одного клиента: читает его повороты до отключения."""
+        session = self.connect(writer)
+        try:
+            while True:
+                data = await reader.read(256)
+                if not data:
+                    break
+                session.turn(data)
+        except ConnectionError:
+            pass
+        finally:
+            self.disconnect(session)
+
+    def tick(self) -> None:
+        """Делает один ход во всех партиях и рассылает изменения.
+
+        Запись в поток не ждёт клиента; клиент, который отключился или
+        не успевает читать, убирается.
+        """
+        with self.profiler.phase('tick'):
+            slow = []
+            for session in self.sessions:
+                writer = session.writer
+                if (writer.is_closing() or writer.transport
+                        .get_write_buffer_size() > WRITE_LIMIT):
+                    slow.append(session)
+                else:
+                    writer.write(session.step())
+            for session in slow:
+                self.disconnect(session)
+        self.ticks += 1
+
+    async def run(self) -> None:
+        """Делает ходы с частотой `rate`, пока задачу не отменят."""
+        loop = asyncio.get_running_loop()
+        period = 1 / self.rate
+        deadline = loop.time()
+        while True:
+            deadline += period
+            await asyncio.sleep(deadline - loop.time())
+            late = loop.time() - deadline
+            self.profiler.record('jitter', int(late * 1e9))
+            if late > MAX_LAG * period:
+                deadline = loop.time()
+            self.tick()
+            if self.metrics_file is not None:
+                self.metrics_file.maybe_write(self.profiler)
+
+    async def start(self, host: str = HOST,
+                    port: int = PORT) -> asyncio.Server:
+        """Начинает принимать подключения; ходы делает `run`.
+
+        Returns:
+            asyncio.Server: Слушающий сервер; порт 0 выбирается системой.
+        """
+        return await asyncio.start_server(
+            self.handle, host, port, backlog=BACKLOG
+        )
+
+    async def serve(self, host: str = HOST, port: int = PORT) -> None:
+        """Принимает подключения и делает ходы, пока задачу не отменят."""
+        server = await self.start(host, port)
+        async with server:
+            await self.run()
+
+
+class MessageBuffer:
+    """Разбирает поток байт сервера на сообщения."""
+
+    def __init__(self) -> None:
+        """Создаёт пустой буфер."""
+        self._buffer = bytearray()
+
+    def feed(self, data: bytes) -> list:
+        """Добавляет принятые байты.
+
+        Returns:
+            list: Данные сообщений, пришедших целиком; остаток ждёт
+                следующих байт.
+        """
+        buffer = self._buffer
+        buffer += data
+        messages = []
+        offset = 0
+        while offset < len(buffer):
+            try:
+                length, start = read_varint(buffer, offset)
+            except IndexError:
+                break
+            if start + length > len(buffer):
+                break
+            messages.append(bytes(buffer[start:start + length]))
+            offset = start + length
+        del buffer[:offset]
+        return messages
+
+
+class SessionView:
+    """Партия на стороне клиента, собранная из сообщений сервера.
+
+    Attributes:
+        width (int): Ширина поля в клетках.
+        height (int): Высота поля в клетках.
+        seed (int): Зерно партии на сервере.
+        positions (deque): Клетки змейки, голова первая.
+        apple (int): Клетка яблока или None.
+        rocks (list): Клетки камней в порядке появления.
+        updates (int): Число принятых `DELTA`.
+        resets (int): Число принятых `FULL`.
+    """
+
+    def __init__(self) -> None:
+        """Создаёт пустую партию; её заполнит первое сообщение `FULL`."""
+        self.width = self.height = self.seed = None
+        self.positions = deque()
+        self.apple = None
+        self.rocks = []
+        self.updates = 0
+        self.resets = 0
+
+    def apply(self, payload: bytes) -> None:
+        """Применяет сообщение сервера.
+
+        Raises:
+            ValueError: Если тип сообщения неизвестен.
+        """
+        if payload[0] == DELTA:
+            self.apply_delta(payload)
+        elif payload[0] == FULL:
+            self.apply_full(payload)
+        else:
+            raise ValueError(f'Неизвестное сообщение: {payload[0]}')
+
+    def apply_full(self, payload: bytes) -> None:
+        """Заменяет партию состоянием из сообщения `FULL`."""
+        values = []
+        offset = 1
+        while offset < len(payload):
+            value, offset = read_varint(payload, offset)
+            values.append(value)
+        self.width, self.height, self.seed, length = values[:4]
+        self.positions = deque(values[4:4 + length])
+        apple = values[4 + length]
+        self.apple = apple - 1 if apple else None
+        self.rocks = values[6 + length:]
+        self.resets += 1
+
+    def apply_delta(self, payload: bytes) -> None:
+        """Применяет изменения за ход из сообщения `DELTA`."""
+        offset = 1
+        while offset < len(payload):
+            value, offset = read_varint(payload, offset)
+            cell, kind = value >> 3, value & 7
+            if kind == TAIL:
+                self.positions.pop()
+            elif kind == HEAD:
+                self.positions.appendleft(cell)
+            elif kind == APPLE:
+                self.apple = cell
+            elif kind == ROCK:
+                self.rocks.append(cell)
+        self.updates += 1
+
+
+async def simulate(host: str = HOST, port: int = PORT, clients: int = 100,
+                   seconds: float = 10.0, turn_chance: float = 0.1,
+                   seed: int = 0) -> dict:
+    """Нагружает сервер `clients` одновременными клиентами.
+
+    Каждый клиент собирает свою партию из сообщений и после каждого
+    приёма с вероятностью `turn_chance` поворачивает в случайную сторону.
+
+    Returns:
+        dict: Итоги: число клиентов, принятых `DELTA` и `FULL`, байт на
+            ход и процентили промежутков между приёмами в мс.
+    """
+    rng = Random(seed)
+    views = []
+    gaps = []
+    received = 0
+
+    async def client() -> None:
+        nonlocal received
+        reader, writer = await asyncio.open_connection(host, port)
+        view, buffer = SessionView(), MessageBuffer()
+        views.append(view)
+        last = None
+        try:
+            while True:
+                data = await reader.read(65536)
+                if not data:
+                    break
+                now = perf_counter()
+                if last is not None:
+                    gaps.append(now - last)
+                last = now
+                received += len(data)
+                for payload in buffer.feed(data):
+                    view.apply(payload)
+                if rng.random() < turn_chance:
+                    writer.write(bytes([rng.randrange(len(DIRECTIONS))]))
+        finally:
+            writer.close()
+
+    tasks = [asyncio.create_task(client()) for _ in range(clients)]
+    await asyncio.sleep(seconds)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    updates = sum(view.updates for view in views)
+    gaps.sort()
+    report = {
+        'clients': len(views),
+        'updates': updates,
+        'resets': sum(view.resets for view in views),
+        'bytes_per_update': received / max(updates, 1),
+    }
+    for quantile in (50, 99):
+        report[f'gap_p{quantile}_ms'] = (
+            gaps[round((len(gaps) - 1) * quantile / 100)] * 1e3
+            if gaps else None
+        )
+    return report
+
+
+def main() -> None:
+    """Запускает сервер или нагрузочный тест из командной строки."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default=HOST)
+    parser.add_argument('--port', type=int, default=PORT)
+    commands = parser.add_subparsers(dest='command', required=True)
+    serve = commands.add_parser('serve', help='запустить сервер')
+    serve.add_argument('--rate', type=float, default=TICK_RATE)
+    serve.add_argument('--width', type=int, default=GRID_WIDTH)
+    serve.add_argument('--height', type=int, default=GRID_HEIGHT)
+    serve.add_argument('--seed', type=int, default=None)
+    serve.add_argument(
+        '--metrics', metavar='PATH', default=None,
+        help='периодически записывать замеры хода и дрожания в файл',
+    )
+    serve.add_argument(
+        '--metrics-format', choices=('json', 'prometheus'), default='json'
+    )
+    load = commands.add_parser('load', help='нагрузить запущенный сервер')
+    load.add_argument('--clients', type=int, default=100)
+    load.add_argument('--seconds', type=float, default=10.0)
+    load.add_argument('--turn-chance', type=float, default=0.1)
+    args = parser.parse_args()
+
+    if args.command == 'load':
+        report = asyncio.run(simulate(
+            args.host, args.port, args.clients, args.seconds,
+            args.turn_chance,
+        ))
+        for name, value in report.items():
+            print(f'{name}: {value}')
+        return
+    metrics_file = None
+    if args.metrics is not None:
+        metrics_file = MetricsFile(args.metrics, args.metrics_format)
+    server = GameServer(
+        args.width, args.height, args.rate, args.seed, metrics_file
+    )
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for name, values in server.profiler.percentiles().items():
+            print(f'{name}: p50 {values["p50"]:.3f} мс, '
+                  f'p99 {values["p99"]:.3f} мс, max {values["max"]:.3f} мс')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,189 @@
+"""Итоги партий и таблица рекордов в SQLite.
+
+`StatsWriter` принимает итоги партий без ожидания: `record` только
+кладёт строку в очередь, а фоновый поток пишет накопившиеся строки
+одной транзакцией. База работает в режиме WAL, поэтому таблицу рекордов
+можно читать (`top_scores`), пока идёт запись.
+
+Таблица рекордов берётся из индекса по счёту и не сортирует все партии.
+
+Запуск: `python snake_stats.py stats.db --top 10`.
+"""
+import argparse
+import os
+import sqlite3
+import threading
+from queue import Queue
+from time import time
+
+# Столбцы итога партии в порядке аргументов `StatsWriter.record`:
+FIELDS = ('score', 'length', 'ticks', 'seconds', 'seed', 'rocks_hit')
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    finished REAL NOT NULL,
+    score INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    ticks INTEGER,
+    seconds REAL,
+    seed INTEGER,
+    rocks_hit INTEGER
+);
+CREATE INDEX IF NOT EXISTS sessions_score ON sessions (score DESC, id);
+'''
+
+INSERT = (
+    f'INSERT INTO sessions (finished, {", ".join(FIELDS)}) '
+    f'VALUES (?, {", ".join("?" * len(FIELDS))})'
+)
+
+# Наибольшее число партий в одной транзакции:
+BATCH = 1024
+
+# Зерна партий - беззнаковые 64-битные, а SQLite хранит знаковые:
+SEED_SHIFT = 1 << 63
+
+
+def connect(path) -> sqlite3.Connection:
+    """Открывает базу в режиме WAL и создаёт таблицу, если её нет."""
+    connection = sqlite3.connect(os.fspath(path))
+    connection.execute('PRAGMA journal_mode=WAL')
+    # В режиме WAL это не теряет целостность, только последние
+    # транзакции при отключении питания.
+    connection.execute('PRAGMA synchronous=NORMAL')
+    connection.executescript(SCHEMA)
+    return connection
+
+
+class StatsWriter:
+    """Фоновая запись итогов партий в базу.
+
+    Attributes:
+        path (str): Путь к базе.
+        batch (int): Наибольшее число партий в одной транзакции.
+        written (int): Сколько партий уже записано.
+    """
+
+    def __init__(self, path, batch: int = BATCH) -> None:
+        """Открывает базу и запускает поток записи."""
+        self.path = os.fspath(path)
+        self.batch = batch
+        self.written = 0
+        self.error = None
+        # Таблица создаётся сразу, чтобы её можно было читать.
+        connect(self.path).close()
+        self._queue = Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def record(self, score: int, length: int, ticks: int = None,
+               seconds: float = None, seed: int = None,
+               rocks_hit: int = None) -> None:
+        """Ставит итог партии в очередь записи; не ждёт диска.
+
+        Args:
+            score (int): Съеденные яблоки.
+            length (int): Длина змейки в конце партии.
+            ticks (int, optional): Длина партии в ходах.
+            seconds (float, optional): Длина партии в секундах.
+            seed (int, optional): Зерно партии.
+            rocks_hit (int, optional): Сколько раз змейка врезалась в
+                камень.
+        """
+        if seed is not None:
+            seed -= SEED_SHIFT
+        self._queue.put(
+            (time(), score, length, ticks, seconds, seed, rocks_hit)
+        )
+
+    def _run(self) -> None:
+        """Тело потока записи: пишет очередь пачками до None."""
+        connection = connect(self.path)
+        try:
+            while True:
+                rows = [self._queue.get()]
+                while len(rows) < self.batch and not self._queue.empty():
+                    rows.append(self._queue.get())
+                stop = rows[-1] is None
+                if stop:
+                    rows.pop()
+                self._write(connection, rows)
+                for _ in range(len(rows) + stop):
+                    self._queue.task_done()
+                if stop:
+                    return
+        finally:
+            connection.close()
+
+    def _write(self, connection: sqlite3.Connection, rows: list) -> None:
+        """Записывает пачку строк одной транзакцией."""
+        if not rows or self.error is not None:
+            return
+        try:
+            with connection:
+                connection.executemany(INSERT, rows)
+        except sqlite3.Error as error:
+            self.error = error
+        else:
+            self.written += len(rows)
+
+    def flush(self) -> None:
+        """Ждёт, пока все поставленные партии будут записаны."""
+        self._queue.join()
+
+    def close(self) -> None:
+        """Дописывает очередь и останавливает поток.
+
+        Raises:
+            sqlite3.Error: Если пачку партий не удалось записать.
+        """
+        self._queue.put(None)
+        self._thread.join()
+        if self.error is not None:
+            raise self.error
+
+    def __enter__(self) -> 'StatsWriter':
+        """Возвращает сам писатель для блока `with`."""
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """Дописывает очередь и закрывает базу."""
+        self.close()
+
+
+def top_scores(path, limit: int = 10) -> list:
+    """Возвращает лучшие партии по счёту, при равенстве - более ранние.
+
+    Returns:
+        list: Словари с полями `id`, `finished` и `FIELDS`.
+    """
+    connection = connect(path)
+    connection.row_factory = sqlite3.Row
+    try:
+        rows = connection.execute(
+            'SELECT * FROM sessions ORDER BY score DESC, id LIMIT ?',
+            (limit,),
+        ).fetchall()
+    finally:
+        connection.close()
+    results = [dict(row) for row in rows]
+    for result in results:
+        if result['seed'] is not None:
+            result['seed'] += SEED_SHIFT
+    return results
+
+
+def main() -> None:
+    """Печатает таблицу рекордов."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('path')
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args()
+    for place, result in enumerate(top_scores(args.path, args.top), 1):
+        print(f'{place:>3}. счёт {result["score"]}, длина {result["length"]}'
+              f', ходов {result["ticks"]}, зерно {result["seed"]}')
+
+
+if __name__ == '__main__':
+    main()
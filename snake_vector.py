@@ -0,0 +1,201 @@
+"""Пакетный движок «Змейки» на NumPy: N независимых партий за один вызов.
+
+Правила те же, что у `snake_engine.SnakeEngine` и классов `the_snake`:
+переход через край поля, рост после яблока, камень каждые 3 яблока,
+смерть при столкновении с телом или камнем. Состояние всех партий лежит
+в массивах NumPy, и `step` сдвигает все партии векторными операциями.
+Закончившиеся партии сразу начинаются заново.
+"""
+import numpy as np
+
+from snake_engine import (
+    DIRECTIONS, GRID_HEIGHT, GRID_WIDTH, OPPOSITE,
+    REWARD_APPLE, REWARD_DEATH, RIGHT, ROCK_EVERY,
+)
+
+# Коды клеток в `VectorSnakeEnv.board`:
+EMPTY = 0
+BODY = 1
+APPLE = 2
+ROCK = 3
+
+# Действие «продолжать движение прямо»:
+NO_ACTION = -1
+
+# Сколько раз пробовать случайную клетку, прежде чем искать перебором:
+SPAWN_TRIES = 4
+
+DX = np.array([direct[0] for direct in DIRECTIONS])
+DY = np.array([direct[1] for direct in DIRECTIONS])
+OPPOSITE_ACTION = np.array(
+    [DIRECTIONS.index(OPPOSITE[direct]) for direct in DIRECTIONS]
+)
+
+
+class VectorSnakeEnv:
+    """N партий «Змейки», которые ходят одновременно.
+
+    Действия - индексы в `snake_engine.DIRECTIONS` или `NO_ACTION`.
+    Тело каждой змейки хранится в кольцевом буфере `bodies[i]`: хвост по
+    индексу `tails[i]`, голова через `lengths[i] - 1` ячеек от него.
+
+    Attributes:
+        num_envs (int): Число партий.
+        width (int): Ширина поля в клетках.
+        height (int): Высота поля в клетках.
+        board (np.ndarray): Коды клеток, форма (num_envs, width * height).
+        bodies (np.ndarray): Кольцевые буферы клеток тела.
+        tails (np.ndarray): Индексы хвостов в `bodies`.
+        lengths (np.ndarray): Длины змеек.
+        heads (np.ndarray): Клетки голов.
+        directions (np.ndarray): Индексы текущих направлений.
+        apples (np.ndarray): Клетки яблок.
+        growth (np.ndarray): Сколько ходов хвост ещё не будет сдвигаться.
+        eaten (np.ndarray): Яблоки, съеденные с начала партии.
+    """
+
+    def __init__(self, num_envs: int, width: int = GRID_WIDTH,
+                 height: int = GRID_HEIGHT, seed: int = None) -> None:
+        """Создаёт `num_envs` партий и начинает их.
+
+        Args:
+            num_envs (int): Число партий.
+            width (int): Ширина поля в клетках.
+            height (int): Высота поля в клетках.
+            seed (int, optional): Зерно генератора случайных чисел.
+        """
+        self.num_envs = num_envs
+        self.width = width
+        self.height = height
+        self.cells = width * height
+        self.rng = np.random.default_rng(seed)
+        self.board = np.zeros((num_envs, self.cells), dtype=np.int8)
+        self.bodies = np.zeros((num_envs, self.cells), dtype=np.int32)
+        self.tails = np.zeros(num_envs, dtype=np.int64)
+        self.lengths = np.zeros(num_envs, dtype=np.int64)
+        self.heads = np.zeros(num_envs, dtype=np.int64)
+        self.directions = np.zeros(num_envs, dtype=np.int64)
+        self.apples = np.zeros(num_envs, dtype=np.int64)
+        self.growth = np.zeros(num_envs, dtype=np.int64)
+        self.eaten = np.zeros(num_envs, dtype=np.int64)
+        self._rows = np.arange(num_envs)
+        self._start(self._rows, DIRECTIONS.index(RIGHT))
+
+    def observation(self) -> np.ndarray:
+        """Возвращает доску формы (num_envs, height, width) без копирования."""
+        return self.board.reshape(self.num_envs, self.height, self.width)
+
+    def body(self, env: int) -> list:
+        """Возвращает клетки змейки партии `env`, голова первая."""
+        tail, length = self.tails[env], self.lengths[env]
+        index = (tail + np.arange(length)[::-1]) % self.cells
+        return self.bodies[env, index].tolist()
+
+    def reset(self) -> np.ndarray:
+        """Начинает все партии заново со случайным направлением."""
+        self._start(self._rows, self.rng.integers(0, 4, self.num_envs))
+        return self.observation()
+
+    def _start(self, rows: np.ndarray, directions) -> None:
+        """Начинает партии `rows`: змейка длины 1 в центре поля."""
+        center = (self.height // 2) * self.width + self.width // 2
+        self.board[rows] = EMPTY
+        self.board[rows, center] = BODY
+        self.bodies[rows, 0] = center
+        self.tails[rows] = 0
+        self.lengths[rows] = 1
+        self.heads[rows] = center
+        self.directions[rows] = directions
+        self.growth[rows] = 0
+        self.eaten[rows] = 0
+        self.apples[rows] = self._spawn(rows, APPLE)
+
+    def _spawn(self, rows: np.ndarray, code: int) -> np.ndarray:
+        """Ставит объект `code` в случайную пустую клетку партий `rows`.
+
+        Сначала клетки выбираются наугад, а партиям, где за
+        `SPAWN_TRIES` попыток пустая клетка не нашлась, клетка
+        выбирается равномерно перебором всего поля.
+
+        Returns:
+            np.ndarray: Выбранные клетки; -1, если поле заполнено.
+        """
+        cells = self.rng.integers(0, self.cells, rows.size)
+        missed = self.board[rows, cells] != EMPTY
+        for _ in range(SPAWN_TRIES):
+            if not missed.any():
+                break
+            cells[missed] = self.rng.integers(0, self.cells, missed.sum())
+            missed = self.board[rows, cells] != EMPTY
+        if missed.any():
+            crowded = rows[missed]
+            keys = self.rng.random((crowded.size, self.cells))
+            keys[self.board[crowded] != EMPTY] = -1.0
+            picked = keys.argmax(axis=1)
+            picked[keys[np.arange(crowded.size), picked] < 0] = -1
+            cells[missed] = picked
+        placed = cells >= 0
+        self.board[rows[placed], cells[placed]] = code
+        return cells
+
+    def step(self, actions) -> tuple:
+        """Делает один ход во всех партиях.
+
+        Args:
+            actions (array-like): Индексы направлений или `NO_ACTION`
+                для каждой партии; разворот на 180 градусов игнорируется.
+
+        Returns:
+            tuple: (observation, rewards, dones). Партии с `dones[i]`
+                уже начаты заново, и `observation` показывает новое поле.
+        """
+        rows = self._rows
+        actions = np.asarray(actions)
+        turn = (actions >= 0) & (actions != OPPOSITE_ACTION[self.directions])
+        directions = np.where(turn, actions, self.directions)
+        self.directions = directions
+        new = (
+            (self.heads // self.width + DY[directions]) % self.height
+            * self.width
+            + (self.heads % self.width + DX[directions]) % self.width
+        )
+        target = self.board[rows, new]
+        dead = ((self.lengths != 1) & (target == BODY)) | (target == ROCK)
+        alive = ~dead
+        ate = alive & (new == self.apples)
+
+        keep_tail = alive & (self.growth > 0)
+        self.growth[keep_tail] -= 1
+        moved = rows[alive & ~keep_tail]
+        tails = self.tails[moved]
+        self.board[moved, self.bodies[moved, tails]] = EMPTY
+        self.tails[moved] = (tails + 1) % self.cells
+        self.lengths[moved] -= 1
+
+        grown = rows[alive]
+        heads = new[alive]
+        slots = (self.tails[grown] + self.lengths[grown]) % self.cells
+        self.bodies[grown, slots] = heads
+        self.lengths[grown] += 1
+        self.board[grown, heads] = BODY
+        self.heads[grown] = heads
+
+        dones = dead.copy()
+        fed = rows[ate]
+        if fed.size:
+            self.eaten[fed] += 1
+            self.growth[fed] += 1
+            self.apples[fed] = self._spawn(fed, APPLE)
+            dones[fed[self.apples[fed] < 0]] = True
+            rocky = fed[
+                (self.apples[fed] >= 0) & (self.eaten[fed] % ROCK_EVERY == 0)
+            ]
+            if rocky.size:
+                self._spawn(rocky, ROCK)
+
+        rewards = np.where(ate, REWARD_APPLE, 0)
+        rewards[dead] = REWARD_DEATH
+        finished = rows[dones]
+        if finished.size:
+            self._start(finished, self.rng.integers(0, 4, finished.size))
+        return self.observation(), rewards, dones
@@ -86,6 +86,11 @@ def _create_game_object(class_name, module):
         )
 
 
+@pytest.fixture
+def window(_the_snake):
+    return _the_snake.open_window()
+
+
 @pytest.fixture
 def game_object(_the_snake):
     return _create_game_object('GameObject', _the_snake)
@@ -119,7 +124,7 @@ def loop_breaker_decorator(func):
 
 
 @pytest.fixture
-def modified_clock(_the_snake):
+def modified_clock(_the_snake, window):
     class _Clock:
         def __init__(self, clock_obj: Clock) -> None:
             self.clock = clock_obj
@@ -0,0 +1,23 @@
+from benchmarks.bench_suite import (
+    bench_engine_step, compare, cycle_directions, hamiltonian_cycle,
+)
+
+
+def test_hamiltonian_cycle_visits_every_cell_once():
+    cycle = hamiltonian_cycle(6, 4)
+    assert sorted(cycle) == sorted(
+        (x_cord, y_cord) for x_cord in range(6) for y_cord in range(4)
+    ), 'Цикл должен проходить каждую клетку поля ровно один раз.'
+    assert len(cycle_directions(cycle)) == len(cycle)
+
+
+def test_compare_reports_only_slowdowns_beyond_tolerance():
+    baseline = {'move': 1.0, 'frame': 1.0, 'removed': 1.0}
+    results = {'move': 0.9, 'frame': 0.5, 'added': 0.1}
+    assert compare(results, baseline, tolerance=0.25) == [
+        ('frame', 1.0, 0.5)
+    ], 'Замедлением считается только падение скорости больше допуска.'
+
+
+def test_engine_case_survives_long_runs():
+    assert bench_engine_step(4, 2, 3) > 0
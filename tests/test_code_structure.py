@@ -1,6 +1,15 @@
+import os
+import subprocess
+import sys
+
 import pygame
 import pytest
 
+from conftest import BASE_DIR
+
+# Сколько может занимать импорт `the_snake` без учёта импорта pygame:
+IMPORT_BUDGET = 0.2
+
 
 EXPECTED_GAME_OBJECT_ATTRS = (
     ('атрибут', 'position'),
@@ -115,7 +124,7 @@ def test_elements_exist(element_type, element_name, _the_snake):
         (pygame.time.Clock, 'clock'),
     ),
 )
-def test_vars_type(expected_type, var_name, _the_snake):
+def test_vars_type(expected_type, var_name, _the_snake, window):
     assert isinstance(getattr(_the_snake, var_name, None), expected_type), (
         'Убедитесь, что в модуле `the_snake` есть переменная '
         f'`{var_name}` типа `{expected_type.__name__}`.'
@@ -130,3 +139,37 @@ def test_vars_are_functions(func_name, _the_snake):
     assert callable(getattr(_the_snake, func_name, None)), (
         f'Убедитесь, что переменная `{func_name}` - это функция.'
     )
+
+
+def test_import_opens_no_window():
+    result = subprocess.run(
+        [sys.executable, '-c',
+         'import time, pygame; '
+         'started = time.perf_counter(); '
+         'import the_snake; '
+         'print(time.perf_counter() - started); '
+         'assert the_snake.screen is None and the_snake.clock is None; '
+         'assert not pygame.display.get_init()'],
+        cwd=BASE_DIR, capture_output=True, text=True,
+        env={**os.environ, 'PYGAME_HIDE_SUPPORT_PROMPT': '1'},
+    )
+    assert result.returncode == 0, (
+        'Импорт `the_snake` не должен открывать окно и создавать часы.\n'
+        + result.stderr
+    )
+    seconds = float(result.stdout)
+    assert seconds < IMPORT_BUDGET, (
+        f'Импорт `the_snake` занял {seconds:.3f} с, '
+        f'допустимо {IMPORT_BUDGET} с.'
+    )
+
+
+def test_game_objects_work_without_window(_the_snake, monkeypatch):
+    monkeypatch.setattr(_the_snake, 'screen', None)
+    snake, apple, rock = _the_snake.new_game(1)
+    for _ in range(50):
+        _the_snake.update(snake, apple, rock)
+        _the_snake.dirty_rects.flush()
+    assert _the_snake.session_replay().ticks == 50, (
+        'Без окна игра должна идти так же, только без вывода на экран.'
+    )
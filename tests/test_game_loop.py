@@ -0,0 +1,160 @@
+import pygame
+import pytest
+
+from conftest import StopInfiniteLoop
+
+
+def test_fixed_timestep_decouples_logic_from_fps(_the_snake):
+    timestep = _the_snake.FixedTimestep()
+    steps = sum(timestep.steps(1000 / 60, 15) for _ in range(60))
+    assert steps == 15, (
+        'За секунду при 60 кадрах должно пройти `board.speed` ходов.'
+    )
+
+
+def test_fixed_timestep_drops_large_backlog(_the_snake):
+    timestep = _the_snake.FixedTimestep()
+    assert timestep.steps(5000, 15) == _the_snake.MAX_STEPS_PER_FRAME
+    assert timestep.steps(0, 15) == 0
+
+
+def test_t_key_toggles_turbo(_the_snake, window, monkeypatch):
+    monkeypatch.setattr(_the_snake, 'Turbo', False)
+    pygame.event.clear()
+    pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_t))
+    _the_snake.handle_keys(_the_snake.Snake())
+    assert _the_snake.Turbo, 'Клавиша T должна включать турбо-режим.'
+
+
+def press(*keys):
+    pygame.event.clear()
+    for key in keys:
+        pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=key))
+
+
+def test_quick_turns_are_queued_not_lost(_the_snake, window, monkeypatch):
+    monkeypatch.setattr(_the_snake, 'profiler', _the_snake.PhaseProfiler())
+    snake, apple, rock = _the_snake.new_game(0)
+    snake.direction = _the_snake.RIGHT
+    press(pygame.K_UP, pygame.K_LEFT)
+    _the_snake.handle_keys(snake)
+    _the_snake.update(snake, apple, rock)
+    assert snake.direction == _the_snake.UP
+    _the_snake.update(snake, apple, rock)
+    assert snake.direction == _the_snake.LEFT, (
+        'Второй поворот, нажатый за тот же ход, должен выполняться '
+        'в следующем ходу.'
+    )
+    assert len(_the_snake.profiler.samples['input_latency']) == 2, (
+        'Для каждого поворота должна замеряться задержка до хода.'
+    )
+
+
+def test_turns_are_validated_against_queue(_the_snake, window):
+    snake = _the_snake.Snake()
+    snake.direction = _the_snake.RIGHT
+    press(pygame.K_UP, pygame.K_DOWN, pygame.K_UP, pygame.K_LEFT,
+          pygame.K_DOWN, pygame.K_RIGHT, pygame.K_UP)
+    _the_snake.handle_keys(snake)
+    assert [turn[0] for turn in snake.turns.turns] == [
+        _the_snake.UP, _the_snake.LEFT, _the_snake.DOWN,
+    ], 'Очередь должна отбрасывать развороты, повторы и лишние нажатия.'
+
+
+def test_only_game_events_are_polled(_the_snake, window):
+    assert pygame.event.get_blocked(pygame.MOUSEMOTION)
+    assert not pygame.event.get_blocked(pygame.KEYDOWN)
+    assert not pygame.event.get_blocked(pygame.QUIT)
+
+
+def fill_board_except(the_snake, *cells):
+    the_snake.board.reset()
+    for cell in range(the_snake.GRID_WIDTH * the_snake.GRID_HEIGHT):
+        if cell not in cells:
+            the_snake.board.occupy(cell)
+
+
+def test_apple_spawns_on_the_only_free_cell(_the_snake):
+    fill_board_except(_the_snake, 0)
+    assert _the_snake.Apple().position == 0, (
+        'Яблоко должно появляться только в свободной клетке.'
+    )
+    assert _the_snake.Apple().position is None
+    _the_snake.board.reset()
+
+
+def test_win_when_no_cell_left_for_apple(_the_snake):
+    center = _the_snake.board.cell(
+        _the_snake.GRID_WIDTH // 2, _the_snake.GRID_HEIGHT // 2
+    )
+    target = center + 1
+    fill_board_except(_the_snake, center, target)
+    snake = _the_snake.Snake()
+    apple, rock = _the_snake.Apple(), _the_snake.Rock()
+    snake.direction = _the_snake.RIGHT
+    _the_snake.update(snake, apple, rock)
+    assert snake.length == 2 and apple.position == center, (
+        'Пока есть свободная клетка, игра должна продолжаться.'
+    )
+    snake.direction = _the_snake.LEFT
+    _the_snake.update(snake, apple, rock)
+    assert snake.length == 1, (
+        'Победа наступает, когда яблоку не осталось свободной клетки.'
+    )
+    assert pygame.display.get_caption()[0] == _the_snake.WIN_CAPTION
+    assert apple.position == target
+
+    snake.direction = _the_snake.RIGHT
+    _the_snake.update(snake, apple, rock)
+    assert pygame.display.get_caption()[0] == _the_snake.CAPTION, (
+        'После первого яблока новой партии заголовок должен вернуться.'
+    )
+    _the_snake.board.reset()
+
+
+class SlowClock:
+    """Часы, у которых каждый кадр длится секунду; второй кадр - конец."""
+
+    def __init__(self):
+        self.frames = 0
+
+    def tick(self, *args):
+        self.frames += 1
+        if self.frames > 1:
+            raise StopInfiniteLoop
+        return 1000
+
+
+@pytest.mark.timeout(1, method='thread')
+def test_main_loop_runs_logic_steps(_the_snake, monkeypatch):
+    steps = []
+    update = _the_snake.update
+
+    def counted_update(*args):
+        update(*args)
+        steps.append(args)
+
+    monkeypatch.setattr(_the_snake, 'Turbo', False)
+    monkeypatch.setattr(_the_snake, 'clock', SlowClock())
+    monkeypatch.setattr(_the_snake, 'update', counted_update)
+    with pytest.raises(StopInfiniteLoop):
+        _the_snake.main()
+    assert len(steps) == _the_snake.MAX_STEPS_PER_FRAME, (
+        'Долгий кадр должен догонять логику ходами `update`.'
+    )
+
+
+def test_board_snapshot_restores_game(_the_snake):
+    snake, apple, rock = _the_snake.new_game(2)
+    board = _the_snake.board
+    snapshot = board.snapshot()
+    expected = (list(snake.positions), apple.position, list(rock.rocks),
+                bytes(board.counts), len(board.free))
+    for direction in (_the_snake.UP, _the_snake.LEFT) * 20:
+        snake.next_direction = direction
+        _the_snake.update(snake, apple, rock)
+    board.restore(snapshot)
+    assert (list(snake.positions), apple.position, list(rock.rocks),
+            bytes(board.counts), len(board.free)) == expected, (
+        'Снимок поля должен возвращать змейку, яблоко и камни.'
+    )
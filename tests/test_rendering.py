@@ -0,0 +1,164 @@
+import pygame
+import pytest
+
+
+@pytest.fixture
+def updates(monkeypatch, _the_snake, window):
+    calls = []
+    monkeypatch.setattr(
+        pygame.display, 'update', lambda *args: calls.append(args)
+    )
+    monkeypatch.setattr(_the_snake, 'dirty_rects', _the_snake.DirtyRects())
+    return calls
+
+
+def test_only_changed_cells_are_updated(_the_snake, updates):
+    snake, apple = _the_snake.Snake(), _the_snake.Apple()
+    snake.draw_snake()
+    apple.draw_apple()
+    _the_snake.dirty_rects.flush()
+    assert updates.pop() == (), 'Первый кадр должен обновлять весь экран.'
+
+    for _ in range(3):
+        snake.move()
+        snake.draw_snake()
+        apple.draw_apple()
+        _the_snake.dirty_rects.flush()
+        (rects,) = updates.pop()
+        assert len(rects) == 2, (
+            'Змейка длины 1 меняет только клетку головы и клетку хвоста.'
+        )
+
+    apple.randomize_position()
+    apple.draw_apple()
+    _the_snake.dirty_rects.flush()
+    (rects,) = updates.pop()
+    position = _the_snake.camera.to_screen(apple.position)
+    assert rects == [pygame.Rect(position, (_the_snake.GRID_SIZE,) * 2)]
+
+
+def test_reset_repaints_whole_screen(_the_snake, updates):
+    snake = _the_snake.Snake()
+    snake.move()
+    snake.reset()
+    _the_snake.dirty_rects.flush()
+    _the_snake.dirty_rects.flush()
+    assert updates == [()], (
+        'Сброс змейки должен вызывать одно полное обновление экрана.'
+    )
+
+
+def test_cells_are_blitted_from_cached_sprites(_the_snake, updates):
+    sprites = _the_snake.cell_sprites
+    assert sprites.get(_the_snake.SNAKE_COLOR) is sprites.get(
+        _the_snake.SNAKE_COLOR
+    ), 'Спрайт клетки должен создаваться один раз на цвет.'
+    snake = _the_snake.Snake()
+    snake.draw_snake()
+    _the_snake.dirty_rects.flush()
+    x_cord, y_cord = _the_snake.camera.to_screen(snake.get_head_position())
+    half = _the_snake.GRID_SIZE // 2
+    screen = _the_snake.screen
+    assert screen.get_at((x_cord + half, y_cord + half))[:3] == (
+        _the_snake.SNAKE_COLOR
+    )
+    assert screen.get_at((x_cord, y_cord))[:3] == _the_snake.BORDER_COLOR
+
+
+def test_apple_survives_rock_collision(_the_snake, updates):
+    _the_snake.board.reset()
+    snake, rock = _the_snake.Snake(), _the_snake.Rock()
+    rock.position = snake.get_head_position() + 1
+    rock.spawn_rock()
+    apple = _the_snake.Apple()
+    assert apple.position not in rock.rocks, (
+        'Яблоко не должно появляться на камне.'
+    )
+    snake.direction = _the_snake.RIGHT
+    _the_snake.update(snake, apple, rock)
+    _the_snake.dirty_rects.flush()
+    half = _the_snake.GRID_SIZE // 2
+    x_cord, y_cord = _the_snake.camera.to_screen(apple.position)
+    center = (x_cord + half, y_cord + half)
+    assert _the_snake.screen.get_at(center)[:3] == _the_snake.APPLE_COLOR, (
+        'Сброс после столкновения не должен стирать яблоко.'
+    )
+    _the_snake.board.reset()
+
+
+def test_apple_is_redrawn_after_invalidate(_the_snake, updates):
+    apple = _the_snake.Apple()
+    apple.draw_apple()
+    _the_snake.dirty_rects.flush()
+    apple.draw_apple()
+    assert not _the_snake.dirty_rects.blits
+    _the_snake.dirty_rects.invalidate()
+    apple.draw_apple()
+    assert len(_the_snake.dirty_rects.blits) == 1, (
+        'После полного сброса экрана яблоко нужно нарисовать заново.'
+    )
+
+
+@pytest.fixture
+def huge_world(_the_snake):
+    _the_snake.set_world_size(2000, 2000)
+    yield
+    _the_snake.set_world_size(_the_snake.GRID_WIDTH, _the_snake.GRID_HEIGHT)
+    _the_snake.camera.left = _the_snake.camera.top = 0
+
+
+def test_camera_follows_head_in_huge_world(_the_snake, updates, huge_world,
+                                           monkeypatch):
+    snake, apple, rock = _the_snake.new_game(0)
+    _the_snake.dirty_rects.flush()
+    blits = []
+    blit = _the_snake.dirty_rects.blit
+    monkeypatch.setattr(
+        _the_snake.dirty_rects, 'blit',
+        lambda *args: blits.append(args) or blit(*args),
+    )
+    center = _the_snake.camera.to_screen(snake.get_head_position())
+    for direction in (_the_snake.UP, _the_snake.LEFT) * 20:
+        snake.next_direction = direction
+        blits.clear()
+        _the_snake.update(snake, apple, rock)
+        _the_snake.dirty_rects.flush()
+        assert _the_snake.camera.to_screen(
+            snake.get_head_position()
+        ) == center, 'Камера должна держать голову змейки в центре окна.'
+        assert len(blits) <= max(
+            _the_snake.GRID_WIDTH, _the_snake.GRID_HEIGHT
+        ) + 3, 'За ход должна дорисовываться только открывшаяся полоса.'
+
+
+def test_scrolled_screen_matches_full_repaint(_the_snake, updates,
+                                              huge_world):
+    snake, apple, rock = _the_snake.new_game(0)
+    board = _the_snake.board
+    head_x, head_y = snake.get_head_position() % board.width, 1000
+    for step in range(1, 4):
+        rock.position = board.cell(head_x - step, head_y - 3)
+        rock.spawn_rock()
+    board.vacate(apple.position)
+    apple.position = board.cell(head_x - 5, head_y - 2)
+    board.occupy(apple.position)
+    for direction in (_the_snake.LEFT,) * 4 + (_the_snake.UP,) * 6:
+        snake.next_direction = direction
+        _the_snake.update(snake, apple, rock)
+        _the_snake.dirty_rects.flush()
+    scrolled = _the_snake.screen.copy()
+
+    camera = _the_snake.camera
+    camera.repaint(snake, apple, 0, 0, _the_snake.GRID_WIDTH,
+                   _the_snake.GRID_HEIGHT)
+    _the_snake.dirty_rects.flush()
+    assert pygame.image.tobytes(scrolled, 'RGB') == pygame.image.tobytes(
+        _the_snake.screen, 'RGB'
+    ), 'Сдвинутое изображение должно совпадать с полной перерисовкой.'
+
+
+def test_world_size_is_limited(_the_snake):
+    with pytest.raises(ValueError):
+        _the_snake.set_world_size(_the_snake.MAX_WORLD_SIZE + 1, 100)
+    with pytest.raises(ValueError):
+        _the_snake.set_world_size(10, 10)
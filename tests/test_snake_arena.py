@@ -0,0 +1,88 @@
+from collections import Counter
+
+import pytest
+
+from snake_arena import (
+    APPLE_CELL, EMPTY, ROCK_CELL, Arena, bot_actions,
+)
+from snake_engine import DOWN, LEFT, RIGHT, UP
+
+
+def expected_grid(arena):
+    grid = [EMPTY] * len(arena.grid)
+    for snake in arena.snakes:
+        for cell in snake.body:
+            assert grid[cell] == EMPTY, 'Клетку заняли два объекта.'
+            grid[cell] = snake.index + 1
+    for cell in arena.apples:
+        assert grid[cell] == EMPTY
+        grid[cell] = APPLE_CELL
+    for cell in arena.rocks:
+        assert grid[cell] == EMPTY
+        grid[cell] = ROCK_CELL
+    return grid
+
+
+def test_grid_stays_consistent_with_many_bots():
+    arena = Arena(48, 40, snakes=150, seed=1)
+    deaths = Counter()
+    for _ in range(400):
+        for snake in arena.step(bot_actions(arena)):
+            deaths[snake.index] += 1
+        assert list(arena.grid) == expected_grid(arena), (
+            'Сетка владельцев должна совпадать с телами, яблоками и камнями.'
+        )
+        assert len(arena.free) == list(arena.grid).count(EMPTY)
+        assert len(arena.apples) == 150
+    assert sum(deaths.values()) and arena.eaten and len(arena.rocks), (
+        'На арене должны быть и столкновения, и яблоки, и камни.'
+    )
+    assert max(arena.lengths()) > 3
+    assert all(snake.alive for snake in arena.snakes), (
+        'Погибшие змейки должны возрождаться.'
+    )
+
+
+def arena_with(*snakes, width=8, height=5):
+    arena = Arena(width, height, snakes=len(snakes), apples=0, seed=0,
+                  respawn=False)
+    for snake, (cells, direction) in zip(arena.snakes, snakes):
+        arena.place_snake(
+            snake, [arena.width * y + x for x, y in cells], direction
+        )
+    return arena
+
+
+def test_head_on_collision_kills_both():
+    arena = arena_with(
+        ([(1, 2), (0, 2)], RIGHT), ([(3, 2), (4, 2)], LEFT),
+        ([(6, 0), (6, 1)], UP),
+    )
+    dead = arena.step()
+    assert {snake.index for snake in dead} == {0, 1}
+    assert arena.snakes[2].alive
+    assert list(arena.grid).count(EMPTY) == len(arena.grid) - 2
+
+
+def test_head_into_body_kills_only_mover():
+    arena = arena_with(
+        ([(2, 1), (1, 1)], DOWN), ([(3, 2), (2, 2), (1, 2)], RIGHT),
+    )
+    dead = arena.step()
+    assert [snake.index for snake in dead] == [0]
+    assert list(arena.snakes[1].body) == [
+        arena.width * 2 + x for x in (4, 3, 2)
+    ]
+
+
+def test_head_may_follow_leaving_tail():
+    arena = arena_with(
+        ([(1, 1), (1, 2)], RIGHT), ([(3, 1), (2, 1)], RIGHT),
+    )
+    assert arena.step() == [], 'В клетку уходящего хвоста заходить можно.'
+    assert arena.snakes[0].body[0] == arena.width + 2
+
+
+def test_arena_needs_room():
+    with pytest.raises(ValueError):
+        Arena(4, 4, snakes=10, apples=10)
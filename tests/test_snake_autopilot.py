@@ -0,0 +1,165 @@
+import subprocess
+import sys
+
+import pytest
+
+from conftest import BASE_DIR
+
+from snake_autopilot import Autopilot
+from snake_engine import RIGHT, UP, SnakeEngine
+from snake_rollout import AutopilotPolicy, greedy_policy
+
+
+class Grid:
+    """Поле с заданными занятыми клетками."""
+
+    def __init__(self, width, height, blocked=()):
+        self.width = width
+        self.blocked = set(blocked)
+        self.calls = 0
+
+    def cell(self, x_cord, y_cord):
+        return y_cord * self.width + x_cord
+
+    def is_free(self, cell):
+        self.calls += 1
+        return cell not in self.blocked
+
+
+def drive(autopilot, grid, head, direction, target, limit=100):
+    """Ведёт голову автопилотом до цели и возвращает число ходов."""
+    for tick in range(1, limit + 1):
+        direction = autopilot.choose(head, direction)
+        head = autopilot.neighbour(head, direction)
+        assert head == target or grid.is_free(head), (
+            'Автопилот не должен вести змейку в занятую клетку.'
+        )
+        if head == target:
+            return tick
+    raise AssertionError('Автопилот не дошёл до яблока.')
+
+
+def test_import_does_not_load_pygame():
+    result = subprocess.run(
+        [sys.executable, '-c',
+         'import sys, snake_autopilot; '
+         'assert "pygame" not in sys.modules'],
+        cwd=BASE_DIR,
+    )
+    assert result.returncode == 0, (
+        'Модуль `snake_autopilot` не должен импортировать pygame.'
+    )
+
+
+def test_shortest_path_around_wall():
+    grid = Grid(12, 10)
+    # Стены в столбцах 5 и 11 с проходами только в строке 8:
+    grid.blocked = {
+        grid.cell(x_cord, y_cord)
+        for x_cord in (5, 11) for y_cord in range(10) if y_cord != 8
+    }
+    autopilot = Autopilot(12, 10, grid.is_free)
+    autopilot.retarget(grid.cell(8, 2))
+    ticks = drive(autopilot, grid, grid.cell(2, 2), UP, grid.cell(8, 2))
+    assert ticks == 4 + 6 + 4, (
+        'Автопилот должен идти кратчайшим путём: вверх через край к '
+        'проходу, вдоль стены и обратно вниз.'
+    )
+
+
+def test_search_respects_budget():
+    grid = Grid(60, 60)
+    autopilot = Autopilot(60, 60, grid.is_free, budget=10)
+    autopilot.retarget(grid.cell(50, 50))
+    head = grid.cell(10, 10)
+    grid.blocked.add(head)
+    direction = RIGHT
+    for _ in range(5):
+        grid.calls = 0
+        direction = autopilot.choose(head, direction)
+        assert grid.calls <= 10 * 4 + 3 * 5, (
+            'За ход поиск не должен расширять больше `budget` клеток.'
+        )
+
+
+def test_rock_on_path_is_repaired_in_place():
+    grid = Grid(20, 3)
+    autopilot = Autopilot(20, 3, grid.is_free)
+    target = grid.cell(9, 1)
+    autopilot.retarget(target)
+    head = grid.cell(2, 1)
+    direction = autopilot.choose(head, RIGHT)
+    assert direction == RIGHT and len(autopilot.path) == 7
+    prefix = autopilot.path[:3]
+    rock = autopilot.path[4]
+    grid.blocked.add(rock)
+    autopilot.block(rock)
+    assert autopilot.path[:3] == prefix, 'Путь до камня должен сохраниться.'
+    head = autopilot.neighbour(head, direction)
+    ticks = drive(autopilot, grid, head, direction, target)
+    assert ticks == 6 + 2, 'Обход камня должен добавить два хода.'
+
+
+@pytest.mark.parametrize('walls', [True, False])
+def test_path_into_dead_end_is_rejected(walls):
+    grid = Grid(9, 9)
+    if walls:
+        # Тупик шириной в клетку: столбец 4 от строки 1 до строки 4.
+        grid.blocked = {
+            grid.cell(x_cord, y_cord)
+            for x_cord in (3, 5) for y_cord in range(5)
+        } | {grid.cell(4, 0)}
+    body = [grid.cell(4, 5), grid.cell(4, 6), grid.cell(4, 7)] + [
+        grid.cell(x_cord, 7) for x_cord in (3, 2, 1, 0, 8)
+    ]
+    grid.blocked.update(body)
+    autopilot = Autopilot(9, 9, grid.is_free)
+    autopilot.retarget(grid.cell(4, 1))
+    autopilot.path = [grid.cell(4, y_cord) for y_cord in (4, 3, 2, 1)]
+    autopilot.verify(body)
+    autopilot.check(9 * 9)
+    assert autopilot.safe is not walls, (
+        'Путь к яблоку годится, только если от яблока виден хвост.'
+    )
+
+
+@pytest.mark.parametrize('seed', [0, 1])
+def test_autopilot_policy_survives_by_following_tail(seed):
+    engine = SnakeEngine(seed=seed)
+    policy = AutopilotPolicy()
+    for _ in range(5_000):
+        assert not engine.step(policy(engine))[2], (
+            'Автопилот не должен запирать змейку, пока поле не заполнено.'
+        )
+    assert engine.state.eaten >= 100
+
+
+def test_autopilot_policy_outscores_greedy():
+    scores = {}
+    for name, policy in (
+        ('greedy', greedy_policy), ('autopilot', AutopilotPolicy()),
+    ):
+        engine = SnakeEngine(12, 10, seed=7)
+        for _ in range(2_000):
+            if engine.step(policy(engine))[2]:
+                break
+        scores[name] = engine.state.eaten
+    assert scores['autopilot'] > 2 * scores['greedy'], scores
+
+
+def test_game_autopilot_eats_apples(_the_snake):
+    autopilot = _the_snake.enable_autopilot()
+    try:
+        snake, apple, rock = _the_snake.new_game(3)
+        eaten = 0
+        for _ in range(500):
+            _the_snake.steer(snake)
+            before = snake.length
+            _the_snake.update(snake, apple, rock)
+            eaten += snake.length > before
+        assert eaten >= 10, 'Автопилот должен находить яблоки в игре.'
+        assert autopilot.target == apple.position, (
+            'Автопилот должен узнавать о новом положении яблока.'
+        )
+    finally:
+        _the_snake.autopilot = None
@@ -0,0 +1,75 @@
+from random import Random
+from time import perf_counter
+from types import SimpleNamespace
+
+import numpy as np
+import pygame
+
+from snake_capture import FrameWriter, capture_replay, grab
+from snake_engine import DIRECTIONS
+from snake_replay import Recorder, Replay
+
+
+def game_replay(the_snake, ticks):
+    snake, apple, rock = the_snake.new_game(8)
+    actions = Random(8)
+    for _ in range(ticks):
+        if actions.random() < 0.3:
+            snake.next_direction = actions.choice(DIRECTIONS)
+        the_snake.update(snake, apple, rock)
+    return Replay.from_bytes(the_snake.session_replay().to_bytes())
+
+
+def test_game_replay_is_captured_without_display(_the_snake, monkeypatch,
+                                                 tmp_path):
+    monkeypatch.setattr(_the_snake, 'screen', None)
+    replay = game_replay(_the_snake, 600)
+    display = pygame.display.get_surface()
+    started = perf_counter()
+    with FrameWriter(tmp_path / 'game.rgb') as writer:
+        capture_replay(replay, writer)
+    seconds = perf_counter() - started
+    assert pygame.display.get_surface() is display, (
+        'Запись кадров не должна открывать окно.'
+    )
+    assert writer.frames == 600
+    assert 600 / seconds > 10 * _the_snake.SPEED, (
+        'Запись должна идти намного быстрее реального времени.'
+    )
+    height, width = _the_snake.SCREEN_HEIGHT, _the_snake.SCREEN_WIDTH
+    frames = np.fromfile(tmp_path / 'game.rgb', np.uint8).reshape(
+        -1, height, width, 3
+    )
+    assert len(frames) == 600
+    assert (frames[-1] == grab(_the_snake.screen)).all()
+
+    # Последний кадр, собранный по изменившимся клеткам, должен
+    # совпадать с полностью перерисованным полем.
+    board = _the_snake.board
+    _the_snake.camera.repaint(
+        SimpleNamespace(positions=board.positions),
+        SimpleNamespace(position=board.apple),
+        0, 0, _the_snake.GRID_WIDTH, _the_snake.GRID_HEIGHT,
+    )
+    _the_snake.dirty_rects.flush()
+    assert (frames[-1] == grab(_the_snake.screen)).all(), (
+        'Кадр должен совпадать с полностью перерисованным полем.'
+    )
+
+
+def test_engine_replay_is_captured_as_images(tmp_path):
+    recorder = Recorder(10, 8, seed=3)
+    actions = Random(3)
+    for _ in range(100):
+        recorder.step(actions.choice(DIRECTIONS + [None]))
+    replay = recorder.replay()
+    with FrameWriter(tmp_path / 'frames', 'png') as writer:
+        capture_replay(replay, writer, every=10)
+    images = sorted((tmp_path / 'frames').iterdir())
+    assert len(images) == writer.frames == 10
+    first = pygame.surfarray.array3d(pygame.image.load(images[0]))
+    assert first.shape == (200, 160, 3)
+    colors = {tuple(color) for color in first.reshape(-1, 3)}
+    assert (0, 255, 0) in colors and (255, 0, 0) in colors, (
+        'На кадре должны быть змейка и яблоко.'
+    )
@@ -0,0 +1,232 @@
+import subprocess
+import sys
+from random import Random
+
+import pytest
+
+from conftest import BASE_DIR
+
+import snake_engine
+from snake_engine import (
+    DIRECTIONS, DOWN, LEFT, RIGHT, PackedSnakeBody, SnakeBody, SnakeEngine,
+    neighbour_table,
+)
+
+
+@pytest.fixture
+def engine():
+    return SnakeEngine(8, 6)
+
+
+def test_import_does_not_load_pygame():
+    result = subprocess.run(
+        [sys.executable, '-c',
+         'import sys, snake_engine; '
+         'assert "pygame" not in sys.modules'],
+        cwd=BASE_DIR,
+    )
+    assert result.returncode == 0, (
+        'Модуль `snake_engine` не должен импортировать pygame.'
+    )
+
+
+def test_step_moves_and_wraps(engine):
+    head = engine.get_head_position()
+    engine.place([head], engine.cell(0, 0))
+    engine.step()
+    assert engine.get_head_position() == engine.neighbour(head, RIGHT)
+    engine.place([engine.cell(7, 3)], engine.cell(0, 0))
+    engine.step()
+    assert engine.get_head_position() == engine.cell(0, 3), (
+        'Змейка должна выходить с противоположного края поля.'
+    )
+
+
+def test_reverse_is_ignored(engine):
+    engine.place([engine.get_head_position()], engine.cell(0, 0))
+    engine.step(LEFT)
+    assert engine.state.direction == RIGHT
+
+
+def move_apple(engine, cell):
+    state = engine.state
+    engine.place(state.positions, cell, state.rocks)
+
+
+def test_eating_grows_snake_and_spawns_rock(engine):
+    state = engine.state
+    for length in (1, 2, 3):
+        move_apple(engine, engine.neighbour(engine.get_head_position(), DOWN))
+        _, reward, done = engine.step(DOWN)
+        assert reward == snake_engine.REWARD_APPLE and not done
+        assert len(state.positions) == length and state.growth == 1, (
+            'После яблока хвост должен остаться на месте на следующем ходу.'
+        )
+    assert len(state.rocks) == 1, (
+        'Каждое третье яблоко должно порождать камень.'
+    )
+    assert state.apple not in state.positions
+
+
+def test_self_collision_ends_game(engine):
+    state = engine.state
+    engine.place([
+        engine.cell(2, 2), engine.cell(3, 2),
+        engine.cell(3, 3), engine.cell(2, 3), engine.cell(1, 3),
+    ], engine.cell(0, 0))
+    state.direction = LEFT
+    _, reward, done = engine.step(DOWN)
+    assert done and reward == snake_engine.REWARD_DEATH
+    with pytest.raises(RuntimeError):
+        engine.step()
+    state = engine.reset()
+    assert len(state.positions) == 1 and not state.rocks
+
+
+def test_rock_collision_ends_game(engine):
+    head = engine.get_head_position()
+    engine.place([head], engine.cell(0, 0),
+                 [engine.neighbour(head, RIGHT)])
+    _, _, done = engine.step()
+    assert done
+
+
+def test_snake_body_tracks_occupancy():
+    body = SnakeBody(3, [1, 0])
+    body.push_head(2)
+    body.append(0)
+    assert list(body) == [2, 1, 0, 0]
+    assert body[0] == 2 and body[-1] == 0 and len(body) == 4
+    assert body.count(0) == 2 and body.count(1) == 1
+    assert body.pop_tail() == 0
+    assert 0 in body, (
+        'Клетка должна оставаться занятой, пока в ней есть сегмент.'
+    )
+    assert body.pop_tail() == 0
+    assert 0 not in body
+    body.clear()
+    assert not body and 2 not in body
+
+
+@pytest.mark.parametrize('width, height', [(7, 5), (2, 3), (1, 4)])
+def test_packed_body_matches_plain_list(width, height):
+    neighbours = neighbour_table(width, height)
+    actions = Random(width)
+    body, expected = PackedSnakeBody(width, height), []
+    for _ in range(3000):
+        action = actions.random()
+        if not expected or action < 0.35:
+            # Обычно голова идёт в соседнюю клетку, иногда - куда угодно.
+            cell = actions.randrange(width * height)
+            if expected and action < 0.3:
+                cell = neighbours[actions.choice(DIRECTIONS)][expected[0]]
+            body.push_head(cell)
+            expected.insert(0, cell)
+        elif action < 0.45:
+            # Дубль головы в хвосте, как после яблока в `the_snake`.
+            body.append(expected[0])
+            expected.append(expected[0])
+        elif action < 0.75:
+            assert body.pop_tail() == expected.pop()
+        elif action < 0.9:
+            assert body.pop_head() == expected.pop(0)
+        elif action < 0.99:
+            snapshot = body.snapshot()
+            body.push_head(0)
+            body.pop_tail()
+            body.restore(snapshot)
+        else:
+            body.clear()
+            expected.clear()
+        assert list(body) == expected
+        if expected:
+            middle = len(expected) // 2
+            assert (body[0], body[middle], body[-1]) == (
+                expected[0], expected[middle], expected[-1]
+            )
+        assert all(
+            body.count(cell) == expected.count(cell)
+            for cell in range(width * height)
+        )
+
+
+def test_huge_board_packs_snake_body():
+    engine = SnakeEngine(1024, 1024, seed=1)
+    assert isinstance(engine.state.positions, PackedSnakeBody)
+    head = engine.get_head_position()
+    body = [head - x for x in range(10_000)]
+    engine.place(body, head + 2)
+    engine.state.direction = RIGHT
+    engine.step()
+    assert engine.step()[1] == 1
+    engine.step()
+    positions = engine.state.positions
+    assert len(positions) == 10_001
+    assert list(positions) == [head + 3, head + 2, head + 1] + body[:-2]
+    assert positions.nbytes < 10_000, (
+        'Сегмент упакованного тела должен занимать биты, а не байты.'
+    )
+    expected = list(positions)
+    snapshot = engine.snapshot()
+    engine.step(DOWN)
+    engine.restore(snapshot)
+    assert list(positions) == expected
+    assert engine.state.positions[-1] == expected[-1]
+
+
+def test_free_cells_cover_whole_board():
+    engine = SnakeEngine(3, 2)
+    seen = set()
+    for _ in range(500):
+        engine.reset()
+        seen.add(engine.state.apple)
+    assert seen == set(range(6)) - {engine.cell(1, 1)}, (
+        'Яблоко должно появляться в любой свободной клетке поля.'
+    )
+    assert len(engine.free) == 4
+
+
+def test_full_board_is_a_win():
+    engine = SnakeEngine(2, 1)
+    engine.place([engine.cell(0, 0)], engine.cell(1, 0))
+    _, _, done = engine.step(RIGHT)
+    assert not done and engine.state.apple == engine.cell(0, 0)
+    state, reward, done = engine.step(RIGHT)
+    assert done and state.won and reward == snake_engine.REWARD_APPLE, (
+        'Когда яблоку не осталось места, партия заканчивается победой.'
+    )
+    assert len(engine.free) == 0
+
+
+def test_neighbour_table_wraps_around():
+    engine = SnakeEngine(4, 3)
+    for cell in range(12):
+        x_cord, y_cord = engine.coords(cell)
+        for direct in snake_engine.DIRECTIONS:
+            assert engine.neighbour(cell, direct) == engine.cell(
+                (x_cord + direct[0]) % 4, (y_cord + direct[1]) % 3
+            ), 'Таблица соседей должна переходить через край поля.'
+
+
+def test_snapshot_restores_state_and_future():
+    engine = SnakeEngine(8, 6, seed=3)
+    actions = [RIGHT, DOWN, LEFT, None] * 50
+
+    def play():
+        trace = []
+        for action in actions:
+            state, reward, done = engine.step(action)
+            trace.append((list(state.positions), state.apple, reward))
+            if done:
+                engine.reset()
+        return trace, list(engine.state.rocks), len(engine.free)
+
+    for action in actions[:30]:
+        if engine.step(action)[2]:
+            engine.reset()
+    snapshot = engine.snapshot()
+    expected = play()
+    assert engine.restore(snapshot) is engine.state
+    assert play() == expected, (
+        'После restore партия должна повторяться ход в ход.'
+    )
@@ -0,0 +1,111 @@
+import os
+from random import Random
+
+import numpy as np
+import pytest
+
+from snake_engine import DIRECTIONS
+from snake_episodes import (
+    DEATH, EAT, ROCK, WIN, EpisodeLog, EpisodeWriter,
+)
+from snake_replay import Recorder
+from snake_rollout import HEADER_TICKS, EpisodeBuffer, greedy_policy, play
+
+
+def record_game(seed, ticks):
+    recorder = Recorder(8, 6, seed)
+    actions = Random(seed)
+    for _ in range(ticks):
+        action = None
+        if actions.random() < 0.2:
+            action = actions.choice(DIRECTIONS)
+        elif actions.random() < 0.7:
+            action = greedy_policy(recorder.engine)
+        recorder.step(action)
+    trace = []
+
+    def on_step(engine, reward, done):
+        state = engine.state
+        trace.append((
+            state.positions[0], DIRECTIONS.index(state.direction),
+            -1 if state.apple is None else state.apple, reward, done,
+        ))
+
+    replay = recorder.replay()
+    replay.play(on_step)
+    return replay, trace
+
+
+def test_replay_round_trip_through_memory_map(tmp_path):
+    replay, trace = record_game(seed=5, ticks=2000)
+    with EpisodeWriter(tmp_path, 8, 6, chunk=100) as log:
+        replay.play(log.record)
+    episodes = EpisodeLog(tmp_path)
+    assert len(episodes) == len(trace)
+    assert isinstance(episodes['head'], np.memmap), (
+        'Столбцы должны читаться через отображение в память.'
+    )
+    heads, actions, apples, _, dones = map(np.array, zip(*trace))
+    assert (episodes['head'] == heads).all()
+    assert (episodes['action'] == actions).all()
+    assert (episodes['apple'] == apples).all()
+    events = episodes['events']
+    assert ((events & (DEATH | WIN)) != 0).tolist() == dones.tolist()
+    assert np.count_nonzero(events & EAT) == sum(
+        reward > 0 for *_, reward, _ in trace
+    )
+    assert np.count_nonzero(events & ROCK) > 0, (
+        'Появление камней должно попадать в журнал.'
+    )
+    ends = episodes.episode_ends()
+    assert len(ends) > 1
+    assert (episodes['episode'][ends] == np.arange(len(ends))).all()
+    assert (episodes['tick'][ends + 1] == 1).all(), (
+        'После конца партии счёт ходов начинается заново.'
+    )
+
+
+def test_reopened_log_continues_and_repairs_columns(tmp_path):
+    replay, trace = record_game(seed=6, ticks=500)
+    with EpisodeWriter(tmp_path, 8, 6) as log:
+        replay.play(log.record)
+    # Обрыв записи: один столбец на ход короче остальных.
+    head = tmp_path / 'head.bin'
+    os.truncate(head, head.stat().st_size - 4)
+    assert len(EpisodeLog(tmp_path)) == len(trace) - 1
+    with EpisodeWriter(tmp_path, 8, 6) as log:
+        assert log.ticks == len(trace) - 1
+        first = log.episode
+        replay.play(log.record)
+    episodes = EpisodeLog(tmp_path)
+    sizes = {len(column) for column in episodes.columns.values()}
+    assert sizes == {2 * len(trace) - 1}, (
+        'Столбцы должны быть выровнены по самому короткому.'
+    )
+    assert episodes['episode'][len(trace) - 1] == first
+    assert episodes['episode'][len(trace) - 2] < first, (
+        'Дозапись должна начинаться с новой партии.'
+    )
+
+
+def test_log_for_other_board_is_rejected(tmp_path):
+    EpisodeWriter(tmp_path, 8, 6).close()
+    assert len(EpisodeLog(tmp_path)) == 0
+    with pytest.raises(ValueError):
+        EpisodeWriter(tmp_path, 10, 6)
+
+
+def test_rollout_writes_every_tick(tmp_path):
+    buffer = EpisodeBuffer(episode_capacity=8, tick_capacity=0)
+    try:
+        with EpisodeWriter(tmp_path, 8, 6) as log:
+            play(buffer, 5, seed=2, width=8, height=6,
+                 policy=greedy_policy, max_ticks=30, log=log)
+        episodes = EpisodeLog(tmp_path)
+        assert len(episodes) == buffer.header[HEADER_TICKS]
+        assert episodes['episode'][-1] == 4, (
+            'Партии, оборванные пределом ходов, тоже нумеруются.'
+        )
+    finally:
+        buffer.close()
+        buffer.shm.unlink()
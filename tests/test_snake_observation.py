@@ -0,0 +1,95 @@
+from random import Random
+
+import numpy as np
+import pytest
+
+from snake_engine import DIRECTIONS, SnakeEngine
+from snake_observation import (
+    APPLE, BODY, DIRECTION, HEAD, ROCK, Observation,
+)
+
+
+def rebuilt(state, directions):
+    observation = Observation(state.width, state.height, directions)
+    observation.rebuild(state)
+    return observation.planes
+
+
+def test_planes_follow_game_without_rebuild(_the_snake, monkeypatch):
+    monkeypatch.setattr(_the_snake, 'observation', None)
+    monkeypatch.setattr(_the_snake, 'screen', None)
+    snake, apple, rock = _the_snake.new_game(11)
+    observation = _the_snake.enable_observation(directions=True)
+    planes = observation.planes
+    actions = Random(11)
+    resets = rocks_seen = 0
+    width = _the_snake.WORLD_WIDTH
+    for _ in range(3000):
+        if actions.random() < 0.2:
+            snake.next_direction = actions.choice(DIRECTIONS)
+        elif apple.position is not None:
+            # К яблоку, чтобы змейка росла и появлялись камни.
+            head = snake.get_head_position()
+            if head % width != apple.position % width:
+                snake.next_direction = DIRECTIONS[2 + (
+                    head % width < apple.position % width
+                )]
+            else:
+                snake.next_direction = DIRECTIONS[
+                    head // width < apple.position // width
+                ]
+        length = snake.length
+        _the_snake.update(snake, apple, rock)
+        resets += snake.length < length
+        rocks_seen = max(rocks_seen, len(rock.rocks))
+        assert observation.planes is planes, (
+            'Плоскости должны обновляться на месте.'
+        )
+        assert (planes == rebuilt(_the_snake.board, True)).all(), (
+            'Плоскости должны совпадать с полем, собранным заново.'
+        )
+    assert resets and rocks_seen, 'Партия должна дойти до камней и сбросов.'
+    head = snake.get_head_position()
+    assert planes[HEAD].sum() == 1
+    assert planes[HEAD].flat[head] == 1
+    code = DIRECTIONS.index(snake.direction)
+    assert planes[DIRECTION + code].flat[head] == 1
+    assert planes[BODY].sum() == len(set(snake.positions))
+    assert planes[APPLE].flat[apple.position] == 1
+    assert planes[ROCK].sum() == len(set(rock.rocks))
+
+
+def test_new_game_resizes_planes(_the_snake, monkeypatch):
+    monkeypatch.setattr(_the_snake, 'observation', None)
+    _the_snake.new_game(1)
+    observation = _the_snake.enable_observation()
+    try:
+        _the_snake.set_world_size(40, 30)
+        _the_snake.new_game(1)
+        assert observation.planes.shape == (4, 30, 40)
+        assert (observation.planes
+                == rebuilt(_the_snake.board, False)).all()
+    finally:
+        _the_snake.set_world_size(_the_snake.GRID_WIDTH,
+                                  _the_snake.GRID_HEIGHT)
+
+
+def test_planes_live_in_batch_without_copy():
+    engines = [SnakeEngine(8, 6, seed=seed) for seed in range(3)]
+    batch = np.zeros((3, 4, 6, 8), np.uint8)
+    observations = [
+        Observation(8, 6, dtype=np.uint8, out=batch[index])
+        for index in range(3)
+    ]
+    for engine, observation in zip(engines, observations):
+        engine.step()
+        observation.rebuild(engine.state)
+    for index, engine in enumerate(engines):
+        assert np.shares_memory(observations[index].planes, batch)
+        assert batch[index, HEAD].flat[engine.state.positions[0]] == 1, (
+            'Плоскости должны лежать прямо в пакете.'
+        )
+    with pytest.raises(ValueError):
+        Observation(8, 6, out=batch[:, 0])
+    with pytest.raises(ValueError):
+        observations[0].resize(10, 6)
@@ -0,0 +1,93 @@
+import json
+
+import pytest
+
+from conftest import StopInfiniteLoop
+from snake_profiler import MetricsFile, PhaseProfiler
+
+GAME_PHASES = {
+    'handle_keys', 'move', 'camera', 'draw_snake', 'draw_apple',
+    'eat_and_spawn', 'rock_conflict', 'display_update',
+}
+
+
+@pytest.fixture
+def profiler():
+    profiler = PhaseProfiler(window=100)
+    profiler.phase('move')
+    samples = profiler.samples['move']
+    samples.extend(range(1_000_000, 201_000_000, 1_000_000))
+    profiler.totals['move'][:] = [200, sum(samples)]
+    return profiler
+
+
+def test_percentiles_use_rolling_window(profiler):
+    values = profiler.percentiles()['move']
+    assert values['p50'] == 151 and values['p99'] == 199, (
+        'Процентили должны считаться только по последним `window` замерам.'
+    )
+    assert values['max'] == 200
+
+
+def test_phase_timer_records_samples():
+    profiler = PhaseProfiler()
+    for _ in range(3):
+        with profiler.phase('draw'):
+            pass
+    assert len(profiler.samples['draw']) == 3
+    assert profiler.totals['draw'][0] == 3
+
+
+def test_record_adds_external_samples():
+    profiler = PhaseProfiler()
+    profiler.record('jitter', 5_000_000)
+    profiler.record('jitter', 1_000_000)
+    assert profiler.totals['jitter'] == [2, 6_000_000]
+    assert profiler.percentiles()['jitter']['max'] == 5.0, (
+        'Готовые замеры должны учитываться, как замеры фаз.'
+    )
+
+
+def test_json_export(profiler):
+    data = json.loads(profiler.to_json())
+    move = data['phases']['move']
+    assert move['count'] == 200 and move['p90'] == 190
+
+
+def test_prometheus_export(profiler):
+    text = profiler.to_prometheus()
+    assert '# TYPE snake_phase_seconds summary' in text
+    assert 'snake_phase_seconds{phase="move",quantile="0.5"} 0.151' in text
+    assert 'snake_phase_seconds_count{phase="move"} 200' in text
+
+
+@pytest.mark.parametrize('fmt', ('json', 'prometheus'))
+def test_metrics_file_is_written_periodically(profiler, tmp_path, fmt):
+    path = tmp_path / 'metrics'
+    metrics = MetricsFile(path, fmt, interval=3600)
+    metrics.maybe_write(profiler)
+    assert not path.exists(), 'До конца периода файл писать не нужно.'
+    metrics.interval = 0
+    metrics._next = 0
+    metrics.maybe_write(profiler)
+    assert 'move' in path.read_text(encoding='utf-8')
+
+
+def test_unknown_metrics_format(tmp_path):
+    with pytest.raises(ValueError):
+        MetricsFile(tmp_path / 'metrics', 'xml')
+
+
+@pytest.mark.timeout(1, method='thread')
+@pytest.mark.usefixtures('modified_clock')
+def test_main_records_every_phase(_the_snake, monkeypatch):
+    for name in ('profiler', 'profiler_overlay', 'metrics_file', 'Turbo'):
+        monkeypatch.setattr(_the_snake, name, getattr(_the_snake, name))
+    _the_snake.Turbo = True
+    profiler = _the_snake.enable_profiling(overlay=True)
+    with pytest.raises(StopInfiniteLoop):
+        _the_snake.main()
+    assert GAME_PHASES <= set(profiler.samples), (
+        'Все фазы игрового цикла должны замеряться.'
+    )
+    assert len(profiler.samples['move']) == _the_snake.TURBO_FRAME_SKIP
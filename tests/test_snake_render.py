@@ -0,0 +1,79 @@
+from random import Random
+from time import perf_counter, sleep
+
+import pygame
+import pytest
+
+from snake_capture import grab
+from snake_engine import DIRECTIONS
+from snake_render import FrameSnapshot, RenderThread
+
+
+def test_slow_output_does_not_block_publishing():
+    surface = pygame.Surface((200, 20))
+    sprite = pygame.Surface((20, 20))
+    sprite.fill((0, 255, 0))
+    outputs = []
+
+    def slow_output(rects):
+        sleep(0.02)
+        outputs.append(rects)
+
+    with RenderThread(surface, slow_output) as renderer:
+        started = perf_counter()
+        for tick in range(10):
+            rect = pygame.Rect(tick * 20, 0, 20, 20)
+            renderer.publish(
+                FrameSnapshot(tick, ((sprite, rect),), (rect,), False)
+            )
+        seconds = perf_counter() - started
+        assert renderer.flush(5)
+    assert seconds < 0.02, 'Публикация кадра не должна ждать вывода.'
+    assert len(outputs) < 10, (
+        'Отстающий поток должен выводить накопившиеся кадры вместе.'
+    )
+    assert sum(len(rects) for rects in outputs) == 10
+    assert renderer.tick == 9
+    assert all(
+        surface.get_at((x, 10))[:3] == (0, 255, 0) for x in range(0, 200, 20)
+    ), 'Ни одно изменение клеток не должно теряться.'
+
+
+def play(the_snake, seed, ticks):
+    snake, apple, rock = the_snake.new_game(seed)
+    actions = Random(seed)
+    for _ in range(ticks):
+        if actions.random() < 0.3:
+            snake.next_direction = actions.choice(DIRECTIONS)
+        the_snake.update(snake, apple, rock)
+        the_snake.dirty_rects.flush()
+
+
+@pytest.fixture(params=['window', 'scrolling'])
+def world(_the_snake, request):
+    if request.param == 'scrolling':
+        _the_snake.set_world_size(100, 100)
+    yield
+    _the_snake.set_world_size(_the_snake.GRID_WIDTH, _the_snake.GRID_HEIGHT)
+    _the_snake.camera.left = _the_snake.camera.top = 0
+
+
+@pytest.mark.usefixtures('world')
+def test_render_thread_draws_same_frame(_the_snake, monkeypatch):
+    monkeypatch.setattr(_the_snake, 'renderer', None)
+    _the_snake.open_offscreen()
+    play(_the_snake, 4, 400)
+    expected = grab(_the_snake.screen)
+
+    _the_snake.open_offscreen()
+    renderer = _the_snake.enable_render_thread()
+    try:
+        play(_the_snake, 4, 400)
+        assert renderer.flush(5)
+    finally:
+        _the_snake.renderer = None
+        renderer.close()
+    assert renderer.tick == _the_snake.board.ticks
+    assert (grab(_the_snake.screen) == expected).all(), (
+        'Поток отрисовки должен рисовать тот же кадр, что и основной цикл.'
+    )
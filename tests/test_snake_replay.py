@@ -0,0 +1,105 @@
+from random import Random
+
+import pytest
+
+from snake_engine import DIRECTIONS, OPPOSITE, SnakeEngine
+from snake_replay import (
+    RULES_GAME, Recorder, Replay, decode_turns, encode_turn,
+)
+
+
+def snapshot(engine):
+    state = engine.state
+    return (
+        list(state.positions), state.direction, state.apple,
+        sorted(state.rocks), state.eaten,
+    )
+
+
+def test_same_seed_gives_same_game():
+    first, second = SnakeEngine(10, 8, seed=7), SnakeEngine(10, 8, seed=7)
+    actions = Random(1)
+    for _ in range(2000):
+        action = actions.choice(DIRECTIONS + [None])
+        for engine in (first, second):
+            if engine.step(action)[2]:
+                engine.reset()
+        assert snapshot(first) == snapshot(second), (
+            'Партии с одним зерном и одними действиями должны совпадать.'
+        )
+
+
+def test_turn_encoding_roundtrip():
+    buffer = bytearray()
+    turns = [(0, 3), (1, 0), (5, 2), (40, 1), (100_000, 2)]
+    previous = 0
+    for tick, code in turns:
+        encode_turn(buffer, tick - previous, code)
+        previous = tick
+    assert list(decode_turns(buffer)) == turns
+    assert len(buffer) == 8, 'Паузы до 31 хода должны занимать один байт.'
+
+
+def test_replay_reproduces_recorded_session(tmp_path):
+    recorder = Recorder(12, 9, seed=42)
+    actions = Random(3)
+    for _ in range(5000):
+        recorder.step(actions.choice(DIRECTIONS) if actions.random() < 0.3
+                      else None)
+    path = tmp_path / 'session.snkr'
+    recorder.replay().save(path)
+
+    replay = Replay.load(path)
+    assert (replay.seed, replay.ticks) == (42, 5000)
+    assert path.stat().st_size < 5000 // 2, (
+        'Реплей должен хранить только повороты, а не каждый ход.'
+    )
+    assert snapshot(replay.play()) == snapshot(recorder.engine), (
+        'Воспроизведение должно приводить к тому же состоянию игры.'
+    )
+
+
+def test_game_rng_is_seedable(_the_snake):
+    positions = []
+    for _ in range(2):
+        _the_snake.rng.seed(5)
+        _the_snake.board.reset()
+        positions.append(
+            [_the_snake.Apple().position for _ in range(10)]
+        )
+    assert positions[0] == positions[1]
+
+
+def test_game_stores_chosen_seed(_the_snake):
+    _the_snake.new_game()
+    seed = _the_snake.game_seed
+    assert isinstance(seed, int), 'Зерно партии должно выбираться и храниться.'
+    assert _the_snake.session_replay().seed == seed
+    _the_snake.new_game(5)
+    assert _the_snake.game_seed == 5
+
+
+def game_snapshot(snake, apple, rock):
+    return (
+        list(snake.positions), snake.direction, apple.position,
+        list(rock.rocks),
+    )
+
+
+def test_game_session_replays(_the_snake):
+    snake, apple, rock = _the_snake.new_game()
+    actions = Random(4)
+    for _ in range(3000):
+        direction = actions.choice(DIRECTIONS)
+        if actions.random() < 0.3 and direction != OPPOSITE[snake.direction]:
+            snake.next_direction = direction
+        _the_snake.update(snake, apple, rock)
+    expected = game_snapshot(snake, apple, rock)
+    replay = Replay.from_bytes(_the_snake.session_replay().to_bytes())
+    assert replay.rules == RULES_GAME and replay.ticks == 3000
+    with pytest.raises(ValueError):
+        replay.play()
+
+    assert game_snapshot(*_the_snake.play_replay(replay)) == expected, (
+        'Реплей партии окна должен приводить к тому же состоянию.'
+    )
@@ -0,0 +1,127 @@
+from random import Random
+
+import pytest
+
+from snake_engine import DIRECTIONS
+from snake_rewind import History
+
+
+def board_state(board):
+    return (
+        list(board.positions), board.apple, list(board.rocks),
+        board.direction, board.eaten, board.ticks, bytes(board.counts),
+        len(board.free),
+    )
+
+
+def play(the_snake, snake, apple, rock, ticks, seed, keep=True):
+    # Змейка идёт к яблоку, иногда сворачивая наугад: так в партии
+    # есть и рост, и камни, и сбросы.
+    actions = Random(seed)
+    board = the_snake.board
+    states = []
+    for _ in range(ticks):
+        if actions.random() < 0.2:
+            snake.next_direction = actions.choice(DIRECTIONS)
+        else:
+            head_y, head_x = divmod(snake.get_head_position(), board.width)
+            apple_y, apple_x = divmod(apple.position or 0, board.width)
+            if apple_x != head_x:
+                snake.next_direction = (1 if apple_x > head_x else -1, 0)
+            else:
+                snake.next_direction = (0, 1 if apple_y > head_y else -1)
+        the_snake.update(snake, apple, rock)
+        if keep:
+            states.append(board_state(board))
+    return states
+
+
+@pytest.fixture
+def rewind_game(_the_snake, monkeypatch):
+    monkeypatch.setattr(_the_snake, 'screen', None)
+    history = History(_the_snake.board, capacity=700, keyframe_every=32)
+    monkeypatch.setattr(_the_snake, 'history', history)
+    snake, apple, rock = _the_snake.new_game(5)
+    return history, snake, apple, rock
+
+
+def test_step_back_restores_every_recorded_tick(_the_snake, rewind_game):
+    history, snake, apple, rock = rewind_game
+    board = _the_snake.board
+    states = [board_state(board)]
+    states += play(_the_snake, snake, apple, rock, 1500, 5)
+    flags = [history._flags[tick % 700] for tick in range(800, 1500)]
+    assert any(flag & 4 for flag in flags) and any(flag & 8 for flag in flags)
+    assert board.rocks or any(flag & 16 for flag in flags), (
+        'Партия теста должна включать рост, сбросы и камни.'
+    )
+
+    oldest = history.oldest
+    assert 1500 - 700 <= oldest < 1500 - 700 + 32
+    while history.position > oldest:
+        assert history.step_back() == 1
+        assert board_state(board) == states[history.position], (
+            f'Ход {history.position} восстановлен с ошибкой.'
+        )
+    assert history.step_back() == 0, 'Дальше хранимой истории не отмотать.'
+    with pytest.raises(ValueError):
+        history.seek(oldest - 1)
+    history.seek(1234)
+    assert board_state(board) == states[1234]
+
+
+def test_game_continues_from_rewound_tick(_the_snake, rewind_game):
+    history, snake, apple, rock = rewind_game
+    board = _the_snake.board
+    play(_the_snake, snake, apple, rock, 300, 6)
+    _the_snake.rewind(snake, apple)
+    assert history.position == 300 - _the_snake.REWIND_SPEED
+    history.seek(200)
+    states = play(_the_snake, snake, apple, rock, 100, 7)
+    assert history.end == 300, 'Отмотанные ходы должны забываться.'
+    history.step_back(50)
+    assert board_state(board) == states[49]
+
+
+def test_history_is_small_on_huge_board(_the_snake, monkeypatch):
+    _the_snake.set_world_size(2000, 2000)
+    try:
+        monkeypatch.setattr(_the_snake, 'screen', None)
+        monkeypatch.setattr(_the_snake, 'history', None)
+        # Четыре с половиной минуты на скорости 15 ходов в секунду:
+        history = _the_snake.enable_rewind(capacity=4096)
+        snake, apple, rock = _the_snake.new_game(1)
+        board = _the_snake.board
+        for cell in range(1, 5000):
+            snake.positions.append(snake.position - cell)
+            board.occupy(snake.position - cell)
+        history.reset()
+        play(_the_snake, snake, apple, rock, history.capacity, 1, keep=False)
+        assert history.oldest == 0
+        assert history.nbytes < 2 ** 20, (
+            'Минуты истории большого поля должны занимать единицы мегабайт.'
+        )
+        assert history.nbytes < len(board.counts), (
+            'История должна быть меньше одного снимка поля.'
+        )
+    finally:
+        _the_snake.set_world_size(_the_snake.GRID_WIDTH,
+                                  _the_snake.GRID_HEIGHT)
+
+
+def test_history_starts_from_current_board(_the_snake, monkeypatch):
+    monkeypatch.setattr(_the_snake, 'screen', None)
+    _the_snake.new_game(2)
+    history = History(_the_snake.board, capacity=64, keyframe_every=16)
+    assert history.oldest == history.end == 0
+    assert history.step_back() == 0
+
+
+def test_record_is_rejected_with_rewind(_the_snake, monkeypatch):
+    monkeypatch.setattr(
+        'sys.argv', ['the_snake.py', '--rewind', '--record', 'game.snkr']
+    )
+    with pytest.raises(SystemExit):
+        _the_snake.parse_args()
+    monkeypatch.setattr('sys.argv', ['the_snake.py', '--rewind'])
+    assert _the_snake.parse_args().rewind
@@ -0,0 +1,98 @@
+import random
+
+import numpy as np
+
+from snake_engine import SnakeEngine
+from snake_rollout import (
+    EPISODE_FIELDS, HEADER_EPISODES, HEADER_TICKS, EpisodeBuffer,
+    greedy_policy, hit_rock, play, random_policy, run_rollouts,
+)
+
+
+def test_play_writes_shared_buffers():
+    buffer = EpisodeBuffer(episode_capacity=4, tick_capacity=64)
+    try:
+        play(buffer, 6, seed=1, width=8, height=6, policy=greedy_policy)
+        assert buffer.header[HEADER_EPISODES] == 6
+        ticks = buffer.header[HEADER_TICKS]
+        assert len(buffer.recent_episodes()) == 4, (
+            'Буфер партий должен хранить только последние записи.'
+        )
+        written = buffer.trajectory[:min(ticks, 64)]
+        assert (written[:, 0] < 48).all() and (written[:, 1] < 4).all()
+    finally:
+        buffer.close()
+        buffer.shm.unlink()
+
+
+def test_run_rollouts_aggregates_all_workers():
+    report = run_rollouts(
+        9, workers=2, seed=3, width=10, height=8, policy=greedy_policy,
+        tick_capacity=256,
+    )
+    assert report.scores.size == 9
+    assert len(report.worker_ticks_per_second) == 2
+    assert report.ticks_per_second > 0
+    assert sum(report.score_distribution().values()) == 9
+    assert (report.lengths > 0).all() and np.all(report.scores >= 0)
+    assert 'ходов/с' in report.summary()
+    assert report.trajectories is None
+
+
+def test_run_rollouts_returns_trajectories():
+    report = run_rollouts(
+        4, workers=2, seed=3, width=10, height=8, policy=greedy_policy,
+        keep_trajectories=True, tick_capacity=32,
+    )
+    assert len(report.trajectories) == 2
+    for trajectory in report.trajectories:
+        assert trajectory.shape == (32, 3), (
+            'Из каждого процесса должны возвращаться последние ходы.'
+        )
+        assert (trajectory[:, 0] < 80).all()
+        assert set(trajectory[:, 1]) <= {-1, 0, 1, 2, 3}
+
+
+def test_recent_ticks_are_in_order():
+    buffer = EpisodeBuffer(episode_capacity=1, tick_capacity=8)
+    try:
+        play(buffer, 1, seed=0, width=8, height=6, policy=greedy_policy,
+             max_ticks=11)
+        ticks = buffer.recent_ticks()
+        assert len(ticks) == 8
+        assert (ticks == np.roll(buffer.trajectory, -3, axis=0)).all(), (
+            'Записи о ходах должны идти от старых к новым.'
+        )
+    finally:
+        buffer.close()
+        buffer.shm.unlink()
+
+
+def test_episode_record_replays_from_its_seed():
+    buffer = EpisodeBuffer(episode_capacity=8, tick_capacity=0)
+    try:
+        play(buffer, 8, seed=2, width=8, height=6, policy=random_policy)
+        records = buffer.recent_episodes().copy()
+    finally:
+        buffer.close()
+        buffer.shm.unlink()
+    assert len(set(records[:, EPISODE_FIELDS.index('seed')])) == 8
+    assert (records[:, EPISODE_FIELDS.index('elapsed_ns')] > 0).all()
+    for score, length, ticks, seed, _, rocks_hit in records.tolist():
+        engine = SnakeEngine(8, 6, seed)
+        random.seed(seed)
+        for _ in range(ticks):
+            state, _, done = engine.step(random_policy(engine))
+        assert (state.eaten, len(state.positions), done) == (
+            score, length, True
+        ), 'Партия должна повторяться по зерну из записи.'
+        assert hit_rock(state) == rocks_hit
+
+
+def test_report_keeps_every_episode_for_stats():
+    report = run_rollouts(
+        6, workers=2, seed=4, width=8, height=6, policy=greedy_policy,
+    )
+    assert report.seeds.size == report.durations.size == 6
+    assert (report.durations > 0).all()
+    assert set(report.rocks_hit.tolist()) <= {0, 1}
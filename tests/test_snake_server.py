@@ -0,0 +1,144 @@
+import asyncio
+from random import Random
+
+import pytest
+
+from snake_engine import DIRECTIONS, SnakeEngine
+from snake_replay import encode_varint, read_varint
+from snake_rollout import greedy_policy
+from snake_server import (
+    FULL, GameServer, MessageBuffer, Session, SessionView, full_message,
+    simulate,
+)
+
+
+def view_state(view):
+    return list(view.positions), view.apple, list(view.rocks)
+
+
+def engine_state(engine):
+    state = engine.state
+    return list(state.positions), state.apple, list(state.rocks)
+
+
+def test_varint_round_trip():
+    buffer = bytearray()
+    values = [0, 1, 127, 128, 300, 2 ** 64 - 1]
+    for value in values:
+        encode_varint(buffer, value)
+    offset, decoded = 0, []
+    while offset < len(buffer):
+        value, offset = read_varint(buffer, offset)
+        decoded.append(value)
+    assert decoded == values
+    with pytest.raises(IndexError):
+        read_varint(buffer[:-1], len(buffer) - 2)
+
+
+def test_message_buffer_joins_split_messages():
+    engine = SnakeEngine(8, 6, seed=1)
+    data = full_message(engine) * 3
+    buffer = MessageBuffer()
+    messages = []
+    for start in range(0, len(data), 5):
+        messages += buffer.feed(data[start:start + 5])
+    assert len(messages) == 3 and all(
+        message[0] == FULL for message in messages
+    ), 'Сообщения, разрезанные на части, должны собираться целиком.'
+
+
+def test_deltas_rebuild_session_on_client():
+    session = Session(SnakeEngine(8, 6, seed=2), writer=None)
+    view, buffer = SessionView(), MessageBuffer()
+    for payload in buffer.feed(full_message(session.engine)):
+        view.apply(payload)
+    actions = Random(2)
+    sizes = []
+    rocks_seen = False
+    for _ in range(3000):
+        if actions.random() < 0.3:
+            session.turn(bytes([actions.randrange(len(DIRECTIONS))]))
+        else:
+            session.action = greedy_policy(session.engine)
+        message = session.step()
+        sizes.append(len(message))
+        for payload in buffer.feed(message):
+            view.apply(payload)
+        assert view_state(view) == engine_state(session.engine), (
+            'Партия клиента должна совпадать с партией сервера.'
+        )
+        rocks_seen = rocks_seen or bool(view.rocks)
+    assert view.resets > 1 and rocks_seen
+    assert sorted(sizes)[len(sizes) // 2] <= 6, (
+        'Обычный ход должен занимать несколько байт.'
+    )
+
+
+def test_server_hosts_many_sessions_over_tcp():
+    async def scenario():
+        server = GameServer(8, 6, rate=200, seed=3)
+        listener = await server.start('127.0.0.1', 0)
+        port = listener.sockets[0].getsockname()[1]
+        ticker = asyncio.create_task(server.run())
+        connections = [
+            await asyncio.open_connection('127.0.0.1', port)
+            for _ in range(20)
+        ]
+        views = [SessionView() for _ in connections]
+        buffers = [MessageBuffer() for _ in connections]
+
+        async def read(index, timeout):
+            reader, writer = connections[index]
+            data = await asyncio.wait_for(reader.read(65536), timeout)
+            for payload in buffers[index].feed(data):
+                views[index].apply(payload)
+            writer.write(bytes([index % len(DIRECTIONS)]))
+
+        while min(view.updates for view in views) < 50:
+            await asyncio.gather(*(
+                read(index, 1) for index in range(len(connections))
+            ))
+        ticker.cancel()
+        # Дочитываем всё, что сервер успел отправить.
+        for index in range(len(connections)):
+            try:
+                while True:
+                    await read(index, 0.05)
+            except asyncio.TimeoutError:
+                pass
+        sessions = {
+            session.engine.seed: session for session in server.sessions
+        }
+        for view in views:
+            assert view_state(view) == engine_state(
+                sessions[view.seed].engine
+            ), 'Клиент должен видеть ту же партию, что и сервер.'
+        for _, writer in connections:
+            writer.close()
+        listener.close()
+        await listener.wait_closed()
+        return server
+
+    server = asyncio.run(scenario())
+    assert len(server.profiler.samples['jitter']) >= 50, (
+        'Сервер должен замерять опоздание каждого хода.'
+    )
+
+
+def test_load_simulator_reports_updates():
+    async def scenario():
+        server = GameServer(rate=100, seed=4)
+        listener = await server.start('127.0.0.1', 0)
+        port = listener.sockets[0].getsockname()[1]
+        ticker = asyncio.create_task(server.run())
+        report = await simulate('127.0.0.1', port, clients=50, seconds=0.5)
+        ticker.cancel()
+        listener.close()
+        await listener.wait_closed()
+        return report
+
+    report = asyncio.run(scenario())
+    assert report['clients'] == 50 and report['updates'] > 50 * 10
+    assert report['bytes_per_update'] < 10, (
+        'Обновления должны передаваться изменениями, а не полем целиком.'
+    )
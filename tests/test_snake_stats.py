@@ -0,0 +1,75 @@
+import sqlite3
+from random import Random
+from time import perf_counter
+
+from snake_engine import DIRECTIONS
+from snake_stats import SEED_SHIFT, StatsWriter, connect, top_scores
+
+
+def test_writer_batches_rows_in_background(tmp_path):
+    path = tmp_path / 'stats.db'
+    scores = Random(1)
+    expected = []
+    with StatsWriter(path, batch=256) as stats:
+        started = perf_counter()
+        for index in range(5000):
+            score = scores.randrange(100)
+            stats.record(score, score + 1, 10 * index, 0.5, 2 ** 64 - 1)
+            expected.append((score, index))
+        seconds = perf_counter() - started
+        stats.flush()
+        assert stats.written == 5000
+    assert seconds / 5000 < 50e-6, (
+        'Запись итога партии не должна ждать диска.'
+    )
+
+    best = top_scores(path, 5)
+    expected.sort(key=lambda item: (-item[0], item[1]))
+    assert [row['score'] for row in best] == [
+        score for score, _ in expected[:5]
+    ]
+    assert [row['id'] for row in best] == [
+        index + 1 for _, index in expected[:5]
+    ], 'При равном счёте выше должна стоять более ранняя партия.'
+    assert best[0]['seed'] == 2 ** 64 - 1
+
+    connection = connect(path)
+    assert connection.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+    plan = ' '.join(
+        str(row) for row in connection.execute(
+            'EXPLAIN QUERY PLAN '
+            'SELECT * FROM sessions ORDER BY score DESC, id LIMIT 10'
+        )
+    )
+    connection.close()
+    assert 'sessions_score' in plan and 'TEMP B-TREE' not in plan, (
+        'Таблица рекордов должна читаться по индексу, без сортировки.'
+    )
+
+
+def test_game_records_finished_sessions(_the_snake, monkeypatch, tmp_path):
+    monkeypatch.setattr(_the_snake, 'stats', None)
+    monkeypatch.setattr(_the_snake, 'screen', None)
+    path = tmp_path / 'stats.db'
+    stats = _the_snake.enable_stats(path)
+    snake, apple, rock = _the_snake.new_game(3)
+    actions = Random(3)
+    resets = 0
+    for _ in range(3000):
+        if actions.random() < 0.3:
+            snake.next_direction = actions.choice(DIRECTIONS)
+        length = snake.length
+        _the_snake.update(snake, apple, rock)
+        resets += snake.length < length
+    stats.close()
+    rows = sqlite3.connect(path).execute(
+        'SELECT score, length, ticks, seed, rocks_hit FROM sessions'
+    ).fetchall()
+    assert resets and len(rows) >= resets, (
+        'Каждая закончившаяся партия должна попадать в базу.'
+    )
+    assert all(ticks > 0 and length >= 1 for _, length, ticks, _, _ in rows)
+    assert rows[0][3] == 3 - SEED_SHIFT
+    assert all(row[3] is None for row in rows[1:]), (
+        'После первой смерти зерно партию не повторяет и не записывается.'
+    )
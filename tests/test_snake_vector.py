@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+
+from snake_engine import DIRECTIONS, OPPOSITE, ROCK_EVERY
+from snake_vector import APPLE, BODY, ROCK, VectorSnakeEnv
+
+
+def toward_apple(env):
+    head_x, head_y = env.heads[0] % env.width, env.heads[0] // env.width
+    apple_x, apple_y = env.apples[0] % env.width, env.apples[0] // env.width
+    if apple_x != head_x:
+        return DIRECTIONS.index((1, 0) if apple_x > head_x else (-1, 0))
+    return DIRECTIONS.index((0, 1) if apple_y > head_y else (0, -1))
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_parity_with_scalar_classes(_the_snake, seed):
+    env = VectorSnakeEnv(
+        1, _the_snake.GRID_WIDTH, _the_snake.GRID_HEIGHT, seed=seed
+    )
+    _the_snake.board.reset()
+    snake = _the_snake.Snake()
+    apple, rock = _the_snake.Apple(), _the_snake.Rock()
+    rng = np.random.default_rng(seed)
+
+    def sync():
+        _the_snake.board.vacate(apple.position)
+        apple.position = int(env.apples[0])
+        _the_snake.board.occupy(apple.position)
+        rock.clear()
+        for cell in np.flatnonzero(env.board[0] == ROCK):
+            rock.position = int(cell)
+            rock.spawn_rock()
+
+    sync()
+    best = 0
+    for _ in range(5000):
+        action = toward_apple(env) if rng.random() < 0.8 else -1
+        if action >= 0 and DIRECTIONS[action] != OPPOSITE[snake.direction]:
+            snake.next_direction = DIRECTIONS[action]
+        snake.move(rock)
+        _the_snake.eat_and_check_position_and_spawn_rock(snake, apple, rock)
+        _the_snake.rock_conflict(snake, rock)
+        best = max(best, env.eaten[0])
+        _, _, dones = env.step([action])
+        if dones[0]:
+            assert snake.length == 1, (
+                'Пакетный движок и `Snake` должны погибать на одном ходу.'
+            )
+            break
+        expected = [int(cell) for cell in env.body(0)]
+        assert list(dict.fromkeys(snake.positions)) == expected, (
+            'Тело змейки в пакетном движке должно совпадать с `Snake`.'
+        )
+        sync()
+    assert best >= ROCK_EVERY, 'Проверка должна доходить до камней.'
+
+
+def test_many_envs_keep_board_consistent():
+    env = VectorSnakeEnv(64, 10, 8, seed=1)
+    rng = np.random.default_rng(1)
+    total_reward = 0
+    for _ in range(500):
+        _, rewards, _ = env.step(rng.integers(-1, 4, env.num_envs))
+        total_reward += rewards.sum()
+    for index in range(env.num_envs):
+        body = env.body(index)
+        assert len(body) == env.lengths[index] == len(set(body))
+        assert set(np.flatnonzero(env.board[index] == BODY)) == set(body)
+        assert env.board[index, env.apples[index]] == APPLE
+        assert env.heads[index] == body[0]
+    assert env.observation().shape == (64, 8, 10)
+
+
+def test_full_board_ends_with_win():
+    env = VectorSnakeEnv(1, 2, 1, seed=0)
+    env.board[0] = [APPLE, BODY]
+    env.apples[0] = 0
+    _, rewards, dones = env.step([-1])
+    assert rewards[0] == 1 and not dones[0]
+    _, rewards, dones = env.step([-1])
+    assert rewards[0] == 1 and dones[0], (
+        'Партия, где яблоку не осталось места, должна заканчиваться.'
+    )
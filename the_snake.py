@@ -1,12 +1,32 @@
-from random import choice, randrange
+import argparse
+from array import array
+from collections import deque
+from random import Random, getrandbits
+from time import monotonic, perf_counter_ns
+
 import pygame
 
+from snake_autopilot import BUDGET, Autopilot
+from snake_engine import OPPOSITE, GameState, SnakeBody
+from snake_observation import Observation
+from snake_profiler import MetricsFile, NullProfiler, PhaseProfiler
+from snake_render import FrameSnapshot, RenderThread, present
+from snake_replay import RULES_GAME, Replay, TurnLog
+from snake_rewind import HISTORY_TICKS, History
+from snake_stats import StatsWriter
+
 # Константы для размеров поля и сетки:
 SCREEN_WIDTH, SCREEN_HEIGHT = 640, 480
 GRID_SIZE = 20
 GRID_WIDTH = SCREEN_WIDTH // GRID_SIZE
 GRID_HEIGHT = SCREEN_HEIGHT // GRID_SIZE
 
+# Размер игрового мира в клетках; окно показывает его часть
+# (см. `set_world_size`):
+WORLD_WIDTH = GRID_WIDTH
+WORLD_HEIGHT = GRID_HEIGHT
+MAX_WORLD_SIZE = 2000
+
 FLAG = False
 # Направления движения:
 UP = (0, -1)
@@ -27,143 +47,935 @@ ROCKET_COLOR = (0, 0, 255)
 # Цвет змейки
 SNAKE_COLOR = (0, 255, 0)
 
-# Скорость движения змейки:
-Speed = 15
+# Скорость движения змейки по умолчанию (логических ходов в секунду);
+# текущая хранится в `board.speed`:
+SPEED = 15
+
+# Частота кадров отрисовки:
+FPS = 60
+
+# Сколько ходов можно догнать за кадр, прежде чем отбросить отставание:
+MAX_STEPS_PER_FRAME = 5
+
+# Турбо-режим: логика без ограничения скорости, кадр раз в N ходов:
+Turbo = False
+TURBO_FRAME_SKIP = 10
+
+# Сколько нажатых поворотов может ждать своего хода:
+INPUT_QUEUE_SIZE = 3
+
+# Перемотка: пока клавиша зажата, каждый ход отматывает N ходов назад:
+REWIND_KEY = pygame.K_BACKSPACE
+REWIND_SPEED = 2
+
+# События, которые читает игра; остальные не попадают в очередь SDL:
+ALLOWED_EVENTS = [pygame.QUIT, pygame.KEYDOWN]
+
+# Маски поверхности без окна: байты пикселя идут в порядке R, G, B, и
+# кадр копируется в массив RGB одним куском.
+OFFSCREEN_MASKS = (0xFF, 0xFF00, 0xFF0000, 0)
+
+# Заголовки окна игрового поля:
+CAPTION = "Змейка"
+WIN_CAPTION = "Змейка: победа!"
+
+# Игровое окно и часы создаются функцией `open_window` при запуске
+# `main`, а не при импорте: без окна классы игры работают, но ничего не
+# выводят на экран.
+screen = None
+clock = None
+
+# Генератор случайных чисел игры; `new_game(seed)` делает партию
+# повторяемой, а `game_seed` хранит зерно текущей партии. После первой
+# смерти генератор уже сдвинут, поэтому `session_seed` - зерно, с которого
+# началась текущая жизнь змейки, - есть только у первой:
+rng = Random()
+game_seed = None
+session_seed = None
+
+# Повороты текущей партии для сохранения реплея:
+session_log = TurnLog()
+
+
+class CellSprites:
+    """Заранее нарисованные клетки каждого цвета.
+
+    Клетка с заливкой и рамкой рисуется один раз, а дальше только
+    копируется на экран.
+
+    Attributes:
+        surfaces (dict): Поверхность клетки для каждого цвета.
+    """
+
+    def __init__(self) -> None:
+        """Создаёт пустой кэш."""
+        self.surfaces = {}
+
+    def get(self, color: tuple) -> pygame.Surface:
+        """Возвращает поверхность клетки цвета `color`.
+
+        Args:
+            color (tuple): Цвет заливки в формате RGB.
+        """
+        surface = self.surfaces.get(color)
+        if surface is None:
+            surface = pygame.Surface((GRID_SIZE, GRID_SIZE))
+            surface.fill(color)
+            if color != BOARD_BACKGROUND_COLOR:
+                pygame.draw.rect(surface, BORDER_COLOR, surface.get_rect(), 1)
+            if pygame.display.get_surface() is not None:
+                surface = surface.convert()
+            self.surfaces[color] = surface
+        return surface
+
+
+cell_sprites = CellSprites()
+
+
+class DirtyRects:
+    """Клетки, изменившиеся за кадр.
+
+    Копирования спрайтов копятся за кадр и выполняются одним вызовом
+    `Surface.blits`, а на дисплей выводятся только их прямоугольники.
+
+    Attributes:
+        blits (list): Пары (спрайт, прямоугольник) текущего кадра.
+        rects (list): Прямоугольники, перерисованные с прошлого кадра.
+        full (bool): Нужно ли обновить весь экран целиком.
+    """
+
+    def __init__(self) -> None:
+        """Создаёт трекер; первый кадр обновляет весь экран."""
+        self.blits = []
+        self.rects = []
+        self.full = True
+
+    def blit(self, surface: pygame.Surface, position: tuple) -> None:
+        """Ставит спрайт клетки в очередь кадра.
+
+        Args:
+            surface (pygame.Surface): Спрайт клетки или другой картинки.
+            position (tuple): Координаты (x, y) клетки.
+        """
+        rect = pygame.Rect(position, surface.get_size())
+        self.blits.append((surface, rect))
+        self.rects.append(rect)
+
+    def invalidate(self) -> None:
+        """Запрашивает обновление всего экрана в следующем кадре."""
+        self.full = True
+
+    def draw_pending(self) -> None:
+        """Рисует очередь кадра на экран, не выводя её на дисплей."""
+        if self.blits:
+            if screen is not None:
+                screen.blits(self.blits, doreturn=False)
+            self.blits = []
+
+    def flush(self) -> None:
+        """Рисует кадр и выводит на дисплей изменившиеся прямоугольники.
+
+        Пока окно не открыто, кадр только отбрасывается, а кадр
+        поверхности в памяти (`open_offscreen`) на дисплей не выводится.
+        В раздельном режиме (`enable_render_thread`) кадр не рисуется, а
+        передаётся потоку отрисовки снимком.
+        """
+        if renderer is not None:
+            renderer.publish(FrameSnapshot(
+                board.ticks, tuple(self.blits), tuple(self.rects), self.full
+            ))
+            self.blits, self.rects, self.full = [], [], False
+            return
+        self.draw_pending()
+        rects, self.rects = self.rects, []
+        if screen is None or screen is not pygame.display.get_surface():
+            pass
+        elif self.full:
+            pygame.display.update()
+        elif rects:
+            pygame.display.update(rects)
+        self.full = False
+
+
+dirty_rects = DirtyRects()
+
+
+def open_window() -> pygame.Surface:
+    """Открывает игровое окно и создаёт часы, если их ещё нет.
+
+    Уже созданные часы не заменяются, поэтому их можно подменить до
+    запуска `main`.
+
+    Returns:
+        pygame.Surface: Поверхность окна.
+    """
+    global screen, clock
+    if screen is None or screen is not pygame.display.get_surface():
+        screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT), 0, 32)
+        pygame.display.set_caption(CAPTION)
+        pygame.event.set_blocked(None)
+        pygame.event.set_allowed(ALLOWED_EVENTS)
+        # Спрайты, нарисованные без окна, не приведены к его формату.
+        cell_sprites.surfaces.clear()
+        dirty_rects.invalidate()
+    if clock is None:
+        clock = pygame.time.Clock()
+    return screen
+
+
+def open_offscreen() -> pygame.Surface:
+    """Рисует игру на поверхность в памяти вместо окна.
+
+    Дисплей не нужен: кадры остаются в `screen`, откуда их читает
+    `snake_capture`.
+
+    Returns:
+        pygame.Surface: Новая чёрная поверхность размером с окно.
+    """
+    global screen
+    screen = pygame.Surface(
+        (SCREEN_WIDTH, SCREEN_HEIGHT), 0, 24, OFFSCREEN_MASKS
+    )
+    # Клетки, поставленные в очередь до этого, рисовались для другого
+    # экрана и на новую поверхность не попадают.
+    dirty_rects.blits.clear()
+    dirty_rects.invalidate()
+    return screen
+
+
+class Board(GameState):
+    """Состояние партии окна в плоских буферах на клетках мира.
+
+    Клетки - целые числа `y * WORLD_WIDTH + x`, как в `SnakeEngine`;
+    в пиксели они переводятся только при отрисовке (`Camera.to_screen`).
+    Змейка, яблоко и камни - представления над этим состоянием, а не
+    отдельные копии, поэтому `snapshot` и `restore` копируют несколько
+    буферов.
+
+    К состоянию движка добавляется число объектов в каждой клетке (при
+    поедании яблока клетка головы временно занята трижды), а свободные
+    клетки лежат в `FreeCells`, поэтому новое яблоко или камень
+    выбирается равномерно среди свободных клеток за O(1), без повторных
+    попыток.
+
+    Attributes:
+        counts (bytearray): Число объектов в каждой клетке.
+        speed (int): Скорость змейки, логических ходов в секунду.
+    """
+
+    __slots__ = ('counts', 'speed')
+
+    def __init__(self) -> None:
+        """Создаёт пустое поле размером с мир."""
+        super().__init__(WORLD_WIDTH, WORLD_HEIGHT)
+        self.speed = SPEED
+
+    def allocate(self, width: int, height: int) -> None:
+        """Выделяет буферы под мир заданного размера и очищает его."""
+        super().allocate(width, height)
+        self.counts = bytearray(width * height)
+
+    def reset(self) -> None:
+        """Освобождает все клетки мира; скорость сохраняется."""
+        self.allocate(WORLD_WIDTH, WORLD_HEIGHT)
+
+    def snapshot(self) -> tuple:
+        """Возвращает копию состояния для `restore`."""
+        return super().snapshot(), self.counts[:], self.speed
+
+    def restore(self, snapshot: tuple) -> None:
+        """Возвращает состояние к снимку мира того же размера."""
+        state, counts, self.speed = snapshot
+        super().restore(state)
+        self.counts[:] = counts
+
+    def cell(self, x_cord: int, y_cord: int) -> int:
+        """Возвращает номер клетки по её координатам в клетках мира."""
+        return y_cord * self.width + x_cord
+
+    def is_free(self, cell: int) -> bool:
+        """Проверяет, что клетка с номером `cell` ничем не занята."""
+        return not self.counts[cell]
+
+    def occupy(self, cell: int) -> None:
+        """Отмечает, что объект занял клетку `cell`."""
+        self.counts[cell] += 1
+        if self.counts[cell] == 1:
+            self.free.take(cell)
+
+    def vacate(self, cell: int) -> None:
+        """Отмечает, что объект покинул клетку `cell`."""
+        self.counts[cell] -= 1
+        if not self.counts[cell]:
+            self.free.release(cell)
+
+    def random_free(self) -> int:
+        """Возвращает случайную свободную клетку или None, если их нет."""
+        return self.free.sample(rng)
+
+
+board = Board()
+
+
+def wrap_offset(offset: int, size: int) -> int:
+    """Приводит сдвиг по кольцу длины `size` к кратчайшему."""
+    return (offset + size // 2) % size - size // 2
+
+
+class Camera:
+    """Часть мира, видимая в окне.
 
-# Настройка игрового окна:
-screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT), 0, 32)
+    Пока мир помещается в окно, камера стоит на месте. В большом мире
+    она держит голову змейки в центре окна: изображение сдвигается
+    `Surface.scroll`, и дорисовываются только открывшиеся полосы клеток,
+    поэтому время кадра не зависит от размера мира.
+
+    Attributes:
+        left (int): Столбец мира у левого края окна.
+        top (int): Строка мира у верхнего края окна.
+    """
+
+    def __init__(self) -> None:
+        """Ставит камеру в левый верхний угол мира."""
+        self.left = 0
+        self.top = 0
+
+    def to_screen(self, cell: int) -> tuple:
+        """Переводит клетку мира в экранные координаты.
+
+        Returns:
+            tuple: Координаты (x, y) в окне или None, если клетку не видно.
+        """
+        x_cord = (cell % WORLD_WIDTH - self.left) % WORLD_WIDTH
+        y_cord = (cell // WORLD_WIDTH - self.top) % WORLD_HEIGHT
+        if x_cord < GRID_WIDTH and y_cord < GRID_HEIGHT:
+            return x_cord * GRID_SIZE, y_cord * GRID_SIZE
+        return None
+
+    def follow(self, cell: int, snake, apple) -> None:
+        """Переводит камеру так, чтобы клетка `cell` была в центре.
+
+        Args:
+            cell (int): Клетка головы змейки.
+            snake (Snake): Объект змейки, чтобы дорисовать открывшиеся
+                клетки.
+            apple (Apple): Объект яблока.
+        """
+        left, top = self.left, self.top
+        if WORLD_WIDTH > GRID_WIDTH:
+            left = (cell % WORLD_WIDTH - GRID_WIDTH // 2) % WORLD_WIDTH
+        if WORLD_HEIGHT > GRID_HEIGHT:
+            top = (cell // WORLD_WIDTH - GRID_HEIGHT // 2) % WORLD_HEIGHT
+        x_shift = wrap_offset(left - self.left, WORLD_WIDTH)
+        y_shift = wrap_offset(top - self.top, WORLD_HEIGHT)
+        if screen is None or not (x_shift or y_shift):
+            # Без окна рисовать нечего: камера только переходит.
+            self.left, self.top = left, top
+            return
+        if renderer is not None:
+            # Экран принадлежит потоку отрисовки, и сдвинуть его здесь
+            # нельзя: окно перерисовывается целиком.
+            self.left, self.top = left, top
+            dirty_rects.invalidate()
+            self.repaint(snake, apple, 0, 0, GRID_WIDTH, GRID_HEIGHT)
+            return
+        # Очередь кадра посчитана для старого положения камеры.
+        dirty_rects.draw_pending()
+        self.left, self.top = left, top
+        dirty_rects.invalidate()
+        if abs(x_shift) >= GRID_WIDTH or abs(y_shift) >= GRID_HEIGHT:
+            self.repaint(snake, apple, 0, 0, GRID_WIDTH, GRID_HEIGHT)
+        else:
+            self.scroll(snake, apple, x_shift, y_shift)
+
+    def scroll(self, snake, apple, x_shift: int, y_shift: int) -> None:
+        """Сдвигает изображение окна и дорисовывает открывшиеся клетки.
+
+        Args:
+            snake (Snake): Объект змейки.
+            apple (Apple): Объект яблока.
+            x_shift (int): Сдвиг камеры по столбцам, меньше ширины окна.
+            y_shift (int): Сдвиг камеры по строкам, меньше высоты окна.
+        """
+        screen.scroll(-x_shift * GRID_SIZE, -y_shift * GRID_SIZE)
+        if x_shift > 0:
+            self.repaint(snake, apple, GRID_WIDTH - x_shift, 0,
+                         GRID_WIDTH, GRID_HEIGHT)
+        elif x_shift < 0:
+            self.repaint(snake, apple, 0, 0, -x_shift, GRID_HEIGHT)
+        if y_shift > 0:
+            self.repaint(snake, apple, 0, GRID_HEIGHT - y_shift,
+                         GRID_WIDTH, GRID_HEIGHT)
+        elif y_shift < 0:
+            self.repaint(snake, apple, 0, 0, GRID_WIDTH, -y_shift)
+        if profiler_overlay is not None and profiler_overlay.surface:
+            # Сдвинутая копия таблицы профилировщика попала на поле.
+            width, height = profiler_overlay.surface.get_size()
+            self.repaint(
+                snake, apple, 0, 0,
+                min(-(-width // GRID_SIZE) + abs(x_shift), GRID_WIDTH),
+                min(-(-height // GRID_SIZE) + abs(y_shift), GRID_HEIGHT),
+            )
+
+    def repaint(self, snake, apple, left: int, top: int, right: int,
+                bottom: int) -> None:
+        """Заново рисует клетки прямоугольника окна.
+
+        Что лежит в клетке, определяется по `board`: занятая клетка не
+        змейки и не яблока - камень.
+
+        Args:
+            snake (Snake): Объект змейки.
+            apple (Apple): Объект яблока.
+            left (int): Левый столбец прямоугольника в клетках окна.
+            top (int): Верхняя строка.
+            right (int): Правый столбец (не включая).
+            bottom (int): Нижняя строка (не включая).
+        """
+        counts = board.counts
+        sprites = {
+            color: cell_sprites.get(color)
+            for color in (BOARD_BACKGROUND_COLOR, SNAKE_COLOR, APPLE_COLOR,
+                          ROCKET_COLOR)
+        }
+        for row in range(top, bottom):
+            base = (row + self.top) % WORLD_HEIGHT * WORLD_WIDTH
+            for column in range(left, right):
+                cell = base + (column + self.left) % WORLD_WIDTH
+                if not counts[cell]:
+                    color = BOARD_BACKGROUND_COLOR
+                elif cell in snake.positions:
+                    color = SNAKE_COLOR
+                elif cell == apple.position:
+                    color = APPLE_COLOR
+                else:
+                    color = ROCKET_COLOR
+                dirty_rects.blit(
+                    sprites[color], (column * GRID_SIZE, row * GRID_SIZE)
+                )
+
+
+camera = Camera()
+
+
+def set_world_size(width: int, height: int) -> None:
+    """Задаёт размер мира в клетках; окно показывает его часть.
+
+    Новый размер действует с начала следующей партии (`new_game`).
+
+    Args:
+        width (int): Ширина мира, от `GRID_WIDTH` до `MAX_WORLD_SIZE`.
+        height (int): Высота мира, от `GRID_HEIGHT` до `MAX_WORLD_SIZE`.
+
+    Raises:
+        ValueError: Если мир меньше окна или больше `MAX_WORLD_SIZE`.
+    """
+    if not (GRID_WIDTH <= width <= MAX_WORLD_SIZE
+            and GRID_HEIGHT <= height <= MAX_WORLD_SIZE):
+        raise ValueError(
+            f'Размер мира должен быть от {GRID_WIDTH}x{GRID_HEIGHT} '
+            f'до {MAX_WORLD_SIZE}x{MAX_WORLD_SIZE} клеток.'
+        )
+    global WORLD_WIDTH, WORLD_HEIGHT
+    WORLD_WIDTH, WORLD_HEIGHT = width, height
+    board.reset()
+
+
+# Замер фаз игрового цикла; включается функцией `enable_profiling`:
+profiler = NullProfiler()
+profiler_overlay = None
+metrics_file = None
+
+
+class ProfilerOverlay:
+    """Таблица процентилей фаз в левом верхнем углу экрана.
+
+    Таблица рисуется поверх поля в каждом кадре, а её текст
+    пересчитывается раз в `refresh` секунд.
+
+    Attributes:
+        profiler (PhaseProfiler): Источник замеров.
+        refresh (float): Период обновления текста в секундах.
+        surface (pygame.Surface): Отрисованная таблица.
+    """
+
+    def __init__(self, profiler: PhaseProfiler, refresh: float = 0.5) -> None:
+        """Создаёт оверлей; шрифт загружается при первой отрисовке."""
+        self.profiler = profiler
+        self.refresh = refresh
+        self.surface = None
+        self.font = None
+        self._next = 0.0
+
+    def render(self) -> pygame.Surface:
+        """Отрисовывает таблицу процентилей в новую поверхность."""
+        if self.font is None:
+            self.font = pygame.font.SysFont('monospace', 14)
+        lines = [
+            self.font.render(
+                f'{name:<15}p50 {values["p50"]:6.3f}  '
+                f'p99 {values["p99"]:6.3f} ms',
+                True, BORDER_COLOR, BOARD_BACKGROUND_COLOR,
+            )
+            for name, values in self.profiler.percentiles().items()
+        ]
+        if not lines:
+            return None
+        surface = pygame.Surface((
+            max(line.get_width() for line in lines),
+            sum(line.get_height() for line in lines),
+        ))
+        surface.fill(BOARD_BACKGROUND_COLOR)
+        top = 0
+        for line in lines:
+            surface.blit(line, (0, top))
+            top += line.get_height()
+        return surface
+
+    def draw(self) -> None:
+        """Ставит таблицу в очередь кадра, при необходимости обновив её."""
+        now = monotonic()
+        if now >= self._next:
+            self._next = now + self.refresh
+            self.surface = self.render()
+        if self.surface is not None:
+            dirty_rects.blit(self.surface, (0, 0))
+
+
+def enable_profiling(overlay: bool = True, metrics_path=None,
+                     metrics_format: str = 'json',
+                     interval: float = 5.0) -> PhaseProfiler:
+    """Включает замер фаз игрового цикла.
+
+    Args:
+        overlay (bool): Показывать ли процентили поверх поля.
+        metrics_path (str, optional): Файл для периодической выгрузки.
+        metrics_format (str): 'json' или 'prometheus'.
+        interval (float): Период выгрузки в секундах.
+
+    Returns:
+        PhaseProfiler: Включённый профилировщик.
+    """
+    global profiler, profiler_overlay, metrics_file
+    profiler = PhaseProfiler()
+    profiler_overlay = ProfilerOverlay(profiler) if overlay else None
+    metrics_file = None
+    if metrics_path is not None:
+        metrics_file = MetricsFile(metrics_path, metrics_format, interval)
+    return profiler
+
+
+# Автопилот вместо игрока; включается функцией `enable_autopilot`:
+autopilot = None
+
+
+def enable_autopilot(budget: int = BUDGET) -> Autopilot:
+    """Передаёт управление змейкой автопилоту.
+
+    Args:
+        budget (int): Сколько клеток поиск пути расширяет за ход.
+
+    Returns:
+        Autopilot: Включённый автопилот; цель он получит в `new_game`.
+    """
+    global autopilot
+    autopilot = Autopilot(WORLD_WIDTH, WORLD_HEIGHT, board.is_free, budget)
+    return autopilot
+
+
+# Плоскости поля для агентов; включаются функцией `enable_observation`:
+observation = None
+
+
+def enable_observation(directions: bool = False,
+                       out=None) -> Observation:
+    """Включает плоскости поля, которые игра обновляет каждый ход.
+
+    Args:
+        directions (bool): Добавить каналы направления головы.
+        out (np.ndarray, optional): Массив для плоскостей, например
+            строка пакета наблюдений.
+
+    Returns:
+        Observation: Плоскости, уже собранные по текущему полю.
+    """
+    global observation
+    observation = Observation(
+        WORLD_WIDTH, WORLD_HEIGHT, directions, out=out
+    )
+    observation.rebuild(board)
+    return observation
+
+
+# История ходов для перемотки; включается функцией `enable_rewind`:
+history = None
+
+
+def enable_rewind(capacity: int = HISTORY_TICKS) -> History:
+    """Включает запись последних ходов для перемотки назад.
+
+    Args:
+        capacity (int): Сколько последних ходов можно отмотать.
+
+    Returns:
+        History: История; она начинается заново в каждой `new_game`.
+    """
+    global history
+    history = History(board, capacity)
+    return history
+
+
+def rewind(snake, apple) -> None:
+    """Отматывает партию на `REWIND_SPEED` ходов и перерисовывает окно.
+
+    Отмотанные ходы забываются, как только партия продолжится.
+
+    Args:
+        snake (Snake): Объект змейки.
+        apple (Apple): Объект яблока.
+    """
+    if not history.step_back(REWIND_SPEED):
+        return
+    snake.last = None
+    snake.next_direction = None
+    snake.turns.clear()
+    if autopilot is not None:
+        # Петля за хвостом проложена для тела, которого больше нет.
+        autopilot.reset(WORLD_WIDTH, WORLD_HEIGHT)
+        autopilot.retarget(board.apple)
+    if observation is not None:
+        observation.rebuild(board)
+    if screen is not None:
+        camera.follow(snake.get_head_position(), snake, apple)
+        dirty_rects.invalidate()
+        camera.repaint(snake, apple, 0, 0, GRID_WIDTH, GRID_HEIGHT)
 
-# Заголовок окна игрового поля:
-pygame.display.set_caption("Змейка")
 
-# Настройка времени:
-clock = pygame.time.Clock()
+# Запись итогов партий; включается функцией `enable_stats`:
+stats = None
 
-count_eaten_apples = 0
+
+def enable_stats(path) -> StatsWriter:
+    """Включает запись итогов партий в базу SQLite.
+
+    Args:
+        path (str): Путь к базе.
+
+    Returns:
+        StatsWriter: Писатель; его нужно закрыть при выходе из игры.
+    """
+    global stats
+    stats = StatsWriter(path)
+    return stats
+
+
+renderer = None
+
+
+def enable_render_thread() -> RenderThread:
+    """Включает раздельный режим: кадры рисует отдельный поток.
+
+    Открывает окно, если оно ещё не открыто. Кадр поверхности в памяти
+    поток только рисует, не выводя на дисплей.
+
+    Returns:
+        RenderThread: Поток отрисовки; его нужно закрыть при выходе.
+    """
+    global renderer
+    if screen is None:
+        open_window()
+    output = present if screen is pygame.display.get_surface() else None
+    renderer = RenderThread(screen, output)
+    return renderer
+
+
+def record_session(snake, rocks_hit: int = 0) -> None:
+    """Сохраняет итог закончившейся партии, если запись включена.
+
+    Зерно записывается только для первой партии после `new_game`:
+    следующие начинаются с середины последовательности генератора и по
+    зерну не повторяются.
+
+    Args:
+        snake (Snake): Змейка в конце партии, до сброса.
+        rocks_hit (int): 1, если партия закончилась ударом о камень.
+    """
+    global session_seed
+    if stats is not None:
+        stats.record(
+            board.eaten, snake.length, board.ticks,
+            monotonic() - snake.started, session_seed, rocks_hit,
+        )
+    session_seed = None
 
 
 class GameObject:
     """Базовый класс для всех игровых объектов.
 
     Attributes:
-        position (tuple): Текущая позиция объекта на экране (x, y).
+        position (int): Текущая клетка объекта в мире.
         body_color (tuple): Цвет объекта в формате RGB.
     """
 
     def __init__(self) -> None:
-        """Инициализирует игровой объект с позицией по центру экрана."""
-        self.position = ((SCREEN_WIDTH // 2), (SCREEN_HEIGHT // 2))
+        """Инициализирует игровой объект с позицией по центру мира."""
+        self.position = board.cell(WORLD_WIDTH // 2, WORLD_HEIGHT // 2)
         self.body_color = None
 
-    def draw(self, position: tuple) -> None:
-        """Отрисовывает объект на указанной позиции.
+    def draw(self, cell: int) -> None:
+        """Отрисовывает объект в клетке мира `cell`, если её видно."""
+        position = camera.to_screen(cell)
+        if position is not None:
+            dirty_rects.blit(cell_sprites.get(self.body_color), position)
 
-        Args:
-            position (tuple): Координаты (x, y) для отрисовки объекта.
-        """
-        rect = pygame.Rect(position, (GRID_SIZE, GRID_SIZE))
-        pygame.draw.rect(screen, self.body_color, rect)
-        pygame.draw.rect(screen, BORDER_COLOR, rect, 1)
+    def erase(self, cell: int) -> None:
+        """Закрашивает клетку мира `cell` цветом фона, если её видно."""
+        position = camera.to_screen(cell)
+        if position is not None:
+            dirty_rects.blit(
+                cell_sprites.get(BOARD_BACKGROUND_COLOR), position
+            )
 
 
 class Apple(GameObject):
     """Класс, представляющий яблоко в игре.
 
+    Клетка яблока хранится в `board.apple`.
+
     Attributes:
         body_color (tuple): Цвет яблока (красный).
+        last (int): Клетка, в которой яблоко нарисовано на экране.
     """
 
     def __init__(self) -> None:
         """Инициализирует яблоко со случайной позицией."""
         super().__init__()
         self.body_color = APPLE_COLOR
+        self.last = None
+        self.position = None
         self.randomize_position()
 
+    @property
+    def position(self) -> int:
+        """Клетка яблока или None, если яблоку не осталось места."""
+        return board.apple
+
+    @position.setter
+    def position(self, cell: int) -> None:
+        board.apple = cell
+
+    def draw_apple(self) -> None:
+        """Отрисовывает яблоко, если оно сменило позицию.
+
+        После сброса поля яблоко перерисовывается и на старом месте.
+        """
+        if self.position != self.last or dirty_rects.full:
+            self.draw(self.position)
+            self.last = self.position
+
     def randomize_position(self) -> None:
-        """Генерирует случайную позицию для яблока на игровом поле."""
-        self.position = (
-            randrange(GRID_SIZE, SCREEN_WIDTH, GRID_SIZE),
-            randrange(GRID_SIZE, SCREEN_HEIGHT, GRID_SIZE),
-        )
+        """Переносит яблоко в случайную свободную клетку поля.
+
+        Если свободных клеток нет, позиция становится None.
+        """
+        if self.position is not None:
+            board.vacate(self.position)
+        self.position = board.random_free()
+        if self.position is not None:
+            board.occupy(self.position)
+        if autopilot is not None:
+            autopilot.retarget(self.position)
+        if observation is not None:
+            observation.place_apple(self.position)
 
 
 class Rock(GameObject):
     """Класс, представляющий препятствия (камни) в игре.
 
+    Клетки камней хранятся в `board.rocks`.
+
     Attributes:
         body_color (tuple): Цвет камня (синий).
-        rocks (list): Список позиций всех камней на поле.
-        last (tuple): Последняя позиция камня.
+        position (int): Клетка для следующего камня.
+        last (int): Последняя позиция камня.
     """
 
     def __init__(self) -> None:
         """Инициализирует камень со случайной позицией."""
         super().__init__()
         self.body_color = ROCKET_COLOR
-        self.rocks = list()
+        del self.rocks[:]
         self.last = None
         self.randomize_position()
 
+    @property
+    def rocks(self) -> array:
+        """Клетки всех камней на поле в порядке появления."""
+        return board.rocks
+
     def spawn_rock(self) -> None:
         """Добавляет новый камень в список и отрисовывает его."""
         self.rocks.append(self.position)
+        board.occupy(self.position)
         self.draw(self.position)
+        if autopilot is not None:
+            autopilot.block(self.position)
+        if observation is not None:
+            observation.add_rock(self.position)
 
     def remove(self) -> None:
         """Удаляет все камни с игрового поля."""
         for rock in self.rocks:
-            last_rect = pygame.Rect(rock, (GRID_SIZE, GRID_SIZE))
-            pygame.draw.rect(screen, BOARD_BACKGROUND_COLOR, last_rect)
+            self.erase(rock)
+
+    def clear(self) -> None:
+        """Стирает все камни и освобождает их клетки."""
+        self.remove()
+        for rock in self.rocks:
+            board.vacate(rock)
+        if observation is not None:
+            observation.clear_rocks(self.rocks)
+        del self.rocks[:]
 
     def randomize_position(self) -> None:
-        """Генерирует случайную позицию для камня на игровом поле."""
-        self.position = (
-            randrange(GRID_SIZE, SCREEN_WIDTH, GRID_SIZE),
-            randrange(GRID_SIZE, SCREEN_HEIGHT, GRID_SIZE),
-        )
+        """Выбирает для следующего камня случайную свободную клетку.
+
+        Если свободных клеток нет, позиция становится None.
+        """
+        self.position = board.random_free()
+
+
+class InputQueue:
+    """Повороты, нажатые игроком, но ещё не сделанные.
+
+    За ход делается один поворот из очереди, поэтому быстрые нажатия
+    вверх-влево внутри одного хода не теряются. Поворот проверяется
+    против направления после уже стоящих в очереди поворотов, а при
+    выдаче - ещё раз против текущего направления змейки. Очередь
+    ограничена: лишние нажатия отбрасываются, чтобы змейка не догоняла
+    устаревшие команды.
+
+    Attributes:
+        turns (deque): Пары (направление, время нажатия в нс).
+        size (int): Наибольшая длина очереди.
+    """
+
+    def __init__(self, size: int = INPUT_QUEUE_SIZE) -> None:
+        """Создаёт пустую очередь."""
+        self.turns = deque()
+        self.size = size
+
+    def __len__(self) -> int:
+        """Возвращает число ждущих поворотов."""
+        return len(self.turns)
+
+    def push(self, direction: tuple, current: tuple, stamp: int) -> bool:
+        """Ставит поворот в очередь, если он что-то меняет.
+
+        Args:
+            direction (tuple): Нажатое направление.
+            current (tuple): Направление змейки до поворотов из очереди.
+            stamp (int): Время нажатия по `perf_counter_ns`.
+
+        Returns:
+            bool: Принят ли поворот; повтор направления, разворот назад
+                и нажатие при полной очереди отбрасываются.
+        """
+        last = self.turns[-1][0] if self.turns else current
+        if len(self.turns) >= self.size or direction in (
+            last, OPPOSITE[last]
+        ):
+            return False
+        self.turns.append((direction, stamp))
+        return True
+
+    def pop(self, current: tuple) -> tuple:
+        """Возвращает первый поворот, допустимый из направления `current`.
+
+        Returns:
+            tuple: (направление, время нажатия в нс) или None.
+        """
+        while self.turns:
+            direction, stamp = self.turns.popleft()
+            if direction not in (current, OPPOSITE[current]):
+                return direction, stamp
+        return None
+
+    def clear(self) -> None:
+        """Отбрасывает все ждущие повороты."""
+        self.turns.clear()
 
 
 class Snake(GameObject):
     """Класс, представляющий змейку в игре.
 
+    Сегменты и направление хранятся в `board.positions` и
+    `board.direction`.
+
     Attributes:
         body_color (tuple): Цвет змейки (зеленый).
-        length (int): Текущая длина змейки.
-        positions (list): Список позиций всех сегментов змейки.
-        direction (tuple): Текущее направление движения.
-        next_direction (tuple): Следующее направление движения.
-        last (tuple): Позиция последнего сегмента змейки.
+        position (int): Начальная клетка змейки, центр мира.
+        next_direction (tuple): Следующее направление движения; если
+            оно задано, очередь клавиш в этом ходу не читается.
+        turns (InputQueue): Повороты, нажатые игроком.
+        last (int): Клетка последнего сегмента змейки.
+        started (float): Время начала партии по `monotonic`.
     """
 
     def __init__(self) -> None:
-        """Инициализирует змейку в центре экрана."""
+        """Инициализирует змейку в центре мира."""
         super().__init__()
         self.body_color = SNAKE_COLOR
-        self.length = 1
-        self.positions = [(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2)]
+        self.positions.clear()
+        self.positions.append(self.position)
+        board.occupy(self.position)
         self.direction = RIGHT
+        if observation is not None:
+            observation.add_body(self.position)
+            observation.place_head(self.position, RIGHT)
         self.next_direction = None
+        self.turns = InputQueue()
         self.last = None
+        self.started = monotonic()
 
-    def update_direction(self) -> None:
-        """Обновляет текущее направление движения змейки."""
-        if self.next_direction:
-            self.direction = self.next_direction
-            self.next_direction = None
+    @property
+    def positions(self) -> SnakeBody:
+        """Клетки всех сегментов змейки, голова первая."""
+        return board.positions
 
-    def get_param(self, direct: tuple) -> tuple:
-        """Вычисляет новые координаты на основе направления.
+    @property
+    def direction(self) -> tuple:
+        """Текущее направление движения."""
+        return board.direction
 
-        Args:
-            direct (tuple): Направление движения (x, y).
+    @direction.setter
+    def direction(self, direct: tuple) -> None:
+        board.direction = direct
+
+    @property
+    def length(self) -> int:
+        """Текущая длина змейки."""
+        return len(board.positions)
+
+    def take_turn(self) -> int:
+        """Берёт из очереди клавиш поворот этого хода в `next_direction`.
 
         Returns:
-            tuple: Новые координаты головы змейки.
+            int: Время нажатия взятого поворота в нс или None.
         """
-        return (
-            self.positions[0][0] + direct[0] * GRID_SIZE,
-            self.positions[0][1] + direct[1] * GRID_SIZE,
-        )
+        if self.next_direction is not None:
+            return None
+        turn = self.turns.pop(self.direction)
+        if turn is None:
+            return None
+        self.next_direction, stamp = turn
+        return stamp
+
+    def update_direction(self) -> None:
+        """Обновляет текущее направление движения змейки."""
+        if self.next_direction:
+            self.direction = self.next_direction
+            self.next_direction = None
 
     def sub_move(self, direct: tuple, rock=None) -> None:
         """Обрабатывает движение змейки в указанном направлении.
@@ -172,16 +984,22 @@ class Snake(GameObject):
             direct (tuple): Направление движения.
             rock (Rock, optional): Объект камня для обработки столкновений.
         """
-        x_cord, y_cord = self.get_param(direct)
-        x_cord %= SCREEN_WIDTH
-        y_cord %= SCREEN_HEIGHT
-        cords = (x_cord, y_cord)
-        if self.length != 1 and cords in self.positions:
+        positions = self.positions
+        cell = board.neighbours[direct][positions[0]]
+        if len(positions) != 1 and cell in positions:
+            record_session(self)
             self.reset(rock)
         else:
-            self.positions.insert(0, cords)
-            self.last = self.positions[-1]
-            del self.positions[-1]
+            positions.push_head(cell)
+            board.occupy(cell)
+            self.last = positions.pop_tail()
+            board.vacate(self.last)
+            if observation is not None:
+                observation.add_body(cell)
+                observation.place_head(cell, direct)
+                # После яблока хвост может делить клетку с сегментом.
+                if not positions.count(self.last):
+                    observation.remove_body(self.last)
 
     def move(self, rock=None) -> None:
         """Обновляет позицию змейки в зависимости от текущего направления.
@@ -200,20 +1018,16 @@ class Snake(GameObject):
             self.sub_move(DOWN, rock)
 
     def draw_snake(self) -> None:
-        """Отрисовывает змейку на игровом поле."""
-        for position in self.positions[:-1]:
-            self.draw(position)
-        self.draw(self.get_head_position())
-        if self.last:
-            last_rect = pygame.Rect(self.last, (GRID_SIZE, GRID_SIZE))
-            pygame.draw.rect(screen, BOARD_BACKGROUND_COLOR, last_rect)
-
-    def get_head_position(self) -> tuple:
-        """Возвращает позицию головы змейки.
+        """Отрисовывает новую голову и стирает освободившийся хвост.
 
-        Returns:
-            tuple: Координаты (x, y) головы змейки.
+        Остальные сегменты уже нарисованы, когда были головой.
         """
+        self.draw(self.get_head_position())
+        if self.last is not None and self.last not in self.positions:
+            self.erase(self.last)
+
+    def get_head_position(self) -> int:
+        """Возвращает клетку головы змейки."""
         return self.positions[0]
 
     def reset(self, rock=None) -> None:
@@ -222,47 +1036,129 @@ class Snake(GameObject):
         Args:
             rock (Rock, optional): Объект камня для очистки при сбросе.
         """
-        for i in range(len(self.positions)):
-            self.last = self.positions[i]
-            last_rect = pygame.Rect(self.last, (GRID_SIZE, GRID_SIZE))
-            pygame.draw.rect(screen, BOARD_BACKGROUND_COLOR, last_rect)
+        for position in self.positions:
+            self.erase(position)
+            board.vacate(position)
+            if observation is not None:
+                observation.remove_body(position)
+        dirty_rects.invalidate()
         self.last = None
         self.positions.clear()
         self.positions.append(self.position)
-        self.direction = choice(DIRECTIONS)
-        self.length = 1
-        global count_eaten_apples
-        count_eaten_apples = 0
+        board.occupy(self.position)
+        self.direction = rng.choice(DIRECTIONS)
+        if observation is not None:
+            observation.add_body(self.position)
+            observation.place_head(self.position, self.direction)
+        self.turns.clear()
+        if autopilot is not None:
+            autopilot.reset(WORLD_WIDTH, WORLD_HEIGHT)
+            autopilot.retarget(board.apple)
+        board.eaten = 0
+        board.ticks = 0
+        self.started = monotonic()
         if rock:
             rock.remove()
 
 
+KEY_DIRECTIONS = {
+    pygame.K_UP: UP,
+    pygame.K_DOWN: DOWN,
+    pygame.K_LEFT: LEFT,
+    pygame.K_RIGHT: RIGHT,
+}
+
+
 def handle_keys(game_object) -> None:
     """Обрабатывает нажатия клавиш для управления змейкой.
 
+    Повороты не применяются сразу, а ставятся в очередь змейки с
+    временем нажатия; при автопилоте они не нужны и отбрасываются.
+
     Args:
         game_object (Snake): Объект змейки, которым управляет игрок.
     """
+    global Turbo
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
+            if renderer is not None:
+                # Дисплей нельзя закрывать, пока в него выводит поток.
+                renderer.close()
             pygame.quit()
             raise SystemExit
         elif event.type == pygame.KEYDOWN:
-            if event.key == pygame.K_UP and game_object.direction != DOWN:
-                game_object.next_direction = UP
-            elif event.key == pygame.K_DOWN and game_object.direction != UP:
-                game_object.next_direction = DOWN
-            elif event.key == pygame.K_LEFT and game_object.direction != RIGHT:
-                game_object.next_direction = LEFT
-            elif event.key == pygame.K_RIGHT and game_object.direction != LEFT:
-                game_object.next_direction = RIGHT
-            elif event.key == pygame.K_w:
-                global Speed
-                if Speed < 30:
-                    Speed += 5
-            elif event.key == pygame.K_s:
-                if Speed > 5:
-                    Speed -= 5
+            direction = KEY_DIRECTIONS.get(event.key)
+            if direction:
+                if autopilot is None:
+                    game_object.turns.push(
+                        direction,
+                        game_object.next_direction or game_object.direction,
+                        perf_counter_ns(),
+                    )
+            elif event.key == pygame.K_w and board.speed < 30:
+                board.speed += 5
+            elif event.key == pygame.K_s and board.speed > 5:
+                board.speed -= 5
+            elif event.key == pygame.K_t:
+                Turbo = not Turbo
+
+
+def steer(snake: Snake) -> None:
+    """Выбирает следующий ход змейки автопилотом вместо игрока.
+
+    Args:
+        snake (Snake): Объект змейки.
+    """
+    direction = autopilot.choose(
+        snake.get_head_position(), snake.direction, snake.positions
+    )
+    snake.next_direction = direction if direction != snake.direction else None
+
+
+class FixedTimestep:
+    """Счётчик логических ходов, не зависящий от частоты кадров.
+
+    Attributes:
+        lag (float): Накопленное, но ещё не отыгранное время в мс.
+        last_step (int): Время последнего хода в нс (`perf_counter_ns`).
+    """
+
+    def __init__(self) -> None:
+        """Создаёт счётчик без накопленного времени."""
+        self.lag = 0.0
+        self.last_step = None
+
+    def steps(self, elapsed: float, rate: float) -> int:
+        """Возвращает, сколько ходов сделать за прошедший кадр.
+
+        Args:
+            elapsed (float): Длительность кадра в мс.
+            rate (float): Логических ходов в секунду.
+        """
+        self.lag += elapsed
+        step = 1000 / rate
+        count = int(self.lag // step)
+        if count > MAX_STEPS_PER_FRAME:
+            self.lag = 0.0
+            return MAX_STEPS_PER_FRAME
+        self.lag -= count * step
+        return count
+
+    def jitter(self, now: int, rate: float) -> int:
+        """Отмечает сделанный ход и возвращает его отклонение от графика.
+
+        Args:
+            now (int): Время хода в нс (`perf_counter_ns`).
+            rate (float): Логических ходов в секунду.
+
+        Returns:
+            int: Насколько промежуток с прошлого хода отличается от
+            `1 / rate` секунд, в нс; для первого хода 0.
+        """
+        last, self.last_step = self.last_step, now
+        if last is None:
+            return 0
+        return abs(now - last - round(1e9 / rate))
 
 
 def rock_conflict(snake: Snake, rock: Rock) -> None:
@@ -272,26 +1168,29 @@ def rock_conflict(snake: Snake, rock: Rock) -> None:
         snake (Snake): Объект змейки.
         rock (Rock): Объект камней.
     """
-    if snake.get_head_position() in rock.rocks:
-        rock.remove()
-        rock.rocks.clear()
+    head = board.positions[0]
+    # Всё, что кроме змейки заняло клетку головы после хода, - камень.
+    if board.counts[head] > board.positions.count(head):
+        record_session(snake, rocks_hit=1)
+        rock.clear()
         snake.reset()
 
 
-def chek_positions_between_rock_and_over(
-    snake: Snake, apple: Apple, rock: Rock
-) -> None:
-    """Проверяет и корректирует позиции камня,
-    чтобы он не появлялся на змейке или яблоке.
+def win(snake: Snake, apple: Apple, rock: Rock) -> None:
+    """Сообщает о победе, когда яблоку не осталось места, и начинает заново.
+
+    Заголовок победы держится, пока в новой партии не съедено яблоко.
 
     Args:
         snake (Snake): Объект змейки.
         apple (Apple): Объект яблока.
         rock (Rock): Объект камней.
     """
-    if rock.position in snake.positions or rock.position == apple.position:
-        while rock.position in snake.positions or rock.position == apple.position:
-            rock.randomize_position()
+    pygame.display.set_caption(WIN_CAPTION)
+    record_session(snake)
+    snake.reset()
+    rock.clear()
+    apple.randomize_position()
 
 
 def eat_and_check_position_and_spawn_rock(
@@ -306,36 +1205,258 @@ def eat_and_check_position_and_spawn_rock(
     """
     if snake.get_head_position() == apple.position:
         snake.positions.append(apple.position)
-        snake.length += 1
-        global count_eaten_apples
-        count_eaten_apples += 1
+        board.occupy(apple.position)
+        board.eaten += 1
+        if board.eaten == 1:
+            pygame.display.set_caption(CAPTION)
         apple.randomize_position()
-        if count_eaten_apples % 3 == 0:
+        if apple.position is None:
+            win(snake, apple, rock)
+            return
+        if board.eaten % 3 == 0:
             rock.randomize_position()
-            chek_positions_between_rock_and_over(snake, apple, rock)
-            rock.spawn_rock()
-    if apple.position in snake.positions:
-        while apple.position in snake.positions:
-            apple.randomize_position()
+            if rock.position is not None:
+                rock.spawn_rock()
+    elif apple.position in snake.positions:
+        # После сброса змейка могла появиться прямо на яблоке.
+        apple.randomize_position()
 
 
-def main() -> None:
-    """Главная функция, запускающая и управляющая игровым циклом."""
-    pygame.init()
-    apple = Apple()
-    snake = Snake()
-    rock = Rock()
+def update(snake: Snake, apple: Apple, rock: Rock) -> None:
+    """Делает один логический ход и ставит его изменения в очередь кадра.
 
-    while True:
-        clock.tick(Speed)
-        handle_keys(snake)
+    Args:
+        snake (Snake): Объект змейки.
+        apple (Apple): Объект яблока.
+        rock (Rock): Объект камней.
+    """
+    board.ticks += 1
+    with profiler.phase('move'):
+        pressed = snake.take_turn()
+        direction = snake.next_direction
+        session_log.record(direction if direction != snake.direction else None)
         snake.move(rock)
+    with profiler.phase('camera'):
+        camera.follow(snake.get_head_position(), snake, apple)
+    if pressed is not None:
+        # От нажатия клавиши до хода, в котором змейка повернула.
+        profiler.record('input_latency', perf_counter_ns() - pressed)
+    with profiler.phase('draw_snake'):
         snake.draw_snake()
-        apple.draw(apple.position)
+    with profiler.phase('draw_apple'):
+        apple.draw_apple()
+    with profiler.phase('eat_and_spawn'):
         eat_and_check_position_and_spawn_rock(snake, apple, rock)
+    with profiler.phase('rock_conflict'):
         rock_conflict(snake, rock)
-        pygame.display.update()
+    if history is not None:
+        history.record(snake.last)
+
+
+def new_game(seed: int = None) -> tuple:
+    """Начинает новую запись партии с заданным зерном.
+
+    Args:
+        seed (int, optional): Зерно генератора; по умолчанию выбирается
+            случайно. Оно сохраняется в `game_seed`.
+
+    Returns:
+        tuple: (snake, apple, rock) новой партии.
+    """
+    global game_seed, session_seed, session_log
+    game_seed = session_seed = getrandbits(64) if seed is None else seed
+    rng.seed(game_seed)
+    session_log = TurnLog()
+    board.reset()
+    if autopilot is not None:
+        autopilot.reset(WORLD_WIDTH, WORLD_HEIGHT)
+    if observation is not None:
+        observation.resize(WORLD_WIDTH, WORLD_HEIGHT)
+    snake = Snake()
+    apple = Apple()
+    rock = Rock()
+    camera.left = camera.top = 0
+    camera.follow(snake.get_head_position(), snake, apple)
+    if history is not None:
+        history.reset()
+    return snake, apple, rock
+
+
+def session_replay() -> Replay:
+    """Возвращает реплей текущей партии."""
+    return Replay(
+        WORLD_WIDTH, WORLD_HEIGHT, game_seed, session_log.ticks,
+        session_log.turns, RULES_GAME,
+    )
+
+
+def play_replay(replay: Replay, on_frame=None) -> tuple:
+    """Проигрывает реплей партии окна ход за ходом.
+
+    Args:
+        replay (Replay): Реплей, записанный `session_replay`.
+        on_frame (callable, optional): Вызывается после кадра каждого
+            хода как `on_frame(screen)`.
+
+    Returns:
+        tuple: (snake, apple, rock) после последнего хода.
+
+    Raises:
+        ValueError: Если реплей записан по другим правилам или размер
+            его мира не поддерживается.
+    """
+    if replay.rules != RULES_GAME:
+        raise ValueError('Реплей записан не в этой игре.')
+    set_world_size(replay.width, replay.height)
+    snake, apple, rock = new_game(replay.seed)
+    for action in replay.actions():
+        snake.next_direction = action
+        update(snake, apple, rock)
+        dirty_rects.flush()
+        if on_frame is not None:
+            on_frame(screen)
+    return snake, apple, rock
+
+
+def logic_step(snake: Snake, apple: Apple, rock: Rock,
+               timestep: FixedTimestep) -> None:
+    """Делает один ход игры и замеряет его отклонение от графика.
+
+    Args:
+        snake (Snake): Объект змейки.
+        apple (Apple): Объект яблока.
+        rock (Rock): Объект камней.
+        timestep (FixedTimestep): Счётчик ходов главного цикла.
+    """
+    if autopilot is not None:
+        with profiler.phase('autopilot'):
+            steer(snake)
+    update(snake, apple, rock)
+    if not Turbo:
+        profiler.record('tick_jitter', timestep.jitter(
+            perf_counter_ns(), board.speed
+        ))
+
+
+def main(seed: int = None) -> None:
+    """Главная функция, запускающая и управляющая игровым циклом.
+
+    Args:
+        seed (int, optional): Зерно генератора случайных чисел.
+    """
+    pygame.init()
+    open_window()
+    snake, apple, rock = new_game(seed)
+
+    timestep = FixedTimestep()
+
+    while True:
+        if Turbo:
+            clock.tick()
+            steps = TURBO_FRAME_SKIP
+        else:
+            steps = timestep.steps(clock.tick(FPS), board.speed)
+        with profiler.phase('handle_keys'):
+            handle_keys(snake)
+        rewinding = (
+            history is not None and pygame.key.get_pressed()[REWIND_KEY]
+        )
+        for _ in range(steps):
+            if rewinding:
+                rewind(snake, apple)
+            else:
+                logic_step(snake, apple, rock, timestep)
+        if profiler_overlay is not None:
+            profiler_overlay.draw()
+        with profiler.phase('display_update'):
+            dirty_rects.flush()
+        if metrics_file is not None:
+            metrics_file.maybe_write(profiler)
+
+
+def parse_args() -> argparse.Namespace:
+    """Разбирает параметры командной строки."""
+    parser = argparse.ArgumentParser(description="Змейка")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument(
+        "--profile", action="store_true",
+        help="показывать процентили фаз игрового цикла поверх поля",
+    )
+    parser.add_argument(
+        "--metrics", metavar="PATH", default=None,
+        help="периодически записывать метрики фаз в файл",
+    )
+    parser.add_argument(
+        "--metrics-format", choices=("json", "prometheus"), default="json"
+    )
+    parser.add_argument(
+        "--record", metavar="PATH", default=None,
+        help="сохранить реплей партии при выходе",
+    )
+    parser.add_argument(
+        "--autopilot", action="store_true",
+        help="змейкой управляет автопилот",
+    )
+    parser.add_argument(
+        "--autopilot-budget", metavar="CELLS", type=int, default=BUDGET,
+        help="сколько клеток поиск пути расширяет за ход",
+    )
+    parser.add_argument(
+        "--stats", metavar="PATH", default=None,
+        help="записывать итоги партий в базу SQLite",
+    )
+    parser.add_argument(
+        "--rewind", action="store_true",
+        help="хранить последние ходы и отматывать их клавишей Backspace",
+    )
+    parser.add_argument(
+        "--render-thread", action="store_true",
+        help="рисовать кадры в отдельном потоке, не задерживая логику",
+    )
+    parser.add_argument(
+        "--world", metavar="WxH", type=world_size, default=None,
+        help=f"размер мира в клетках, до {MAX_WORLD_SIZE}x{MAX_WORLD_SIZE}",
+    )
+    args = parser.parse_args()
+    # Перемотка не отматывает генератор и журнал поворотов, поэтому
+    # реплей перемотанной партии её не повторит.
+    if args.record and args.rewind:
+        parser.error("--record нельзя сочетать с --rewind")
+    return args
+
+
+def world_size(text: str) -> tuple:
+    """Разбирает размер мира вида `ШИРИНАxВЫСОТА`."""
+    try:
+        width, height = map(int, text.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            f"ожидается ШИРИНАxВЫСОТА, получено {text!r}"
+        )
+    return width, height
 
 
 if __name__ == "__main__":
-    main()
+    args = parse_args()
+    if args.profile or args.metrics:
+        enable_profiling(args.profile, args.metrics, args.metrics_format)
+    if args.world:
+        set_world_size(*args.world)
+    if args.autopilot:
+        enable_autopilot(args.autopilot_budget)
+    if args.stats:
+        enable_stats(args.stats)
+    if args.rewind:
+        enable_rewind()
+    if args.render_thread:
+        enable_render_thread()
+    try:
+        main(args.seed)
+    finally:
+        print(f"Зерно партии: {game_seed}")
+        if args.record:
+            session_replay().save(args.record)
+        if stats is not None:
+            stats.close()
+        if renderer is not None:
+            renderer.close()